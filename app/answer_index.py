@@ -0,0 +1,174 @@
+"""
+In-memory answer index for /quiz/submit.
+
+Holds every item's spelling together with its normalized form, so grading a
+submission is a dict lookup plus a bounded edit distance instead of a JOIN per
+request. The index is built in the background at startup, rebuilt when the
+catalog cache is invalidated or after ANSWER_INDEX_TTL seconds (the stale copy
+keeps serving meanwhile), and callers fall back to the database for items it
+does not know yet.
+"""
+import os
+import threading
+import time
+import unicodedata
+from typing import Dict, NamedTuple, Optional
+
+from sqlalchemy import text
+
+import catalog_cache
+import metrics
+
+_TTL = float(os.getenv("ANSWER_INDEX_TTL", os.getenv("CATALOG_CACHE_TTL", "300")))
+_MAX_DISTANCE = int(os.getenv("ANSWER_MAX_EDIT_DISTANCE", "2"))
+_RETRY_SECONDS = 30
+
+ANSWER_INDEX_QUERY = text("""
+Select
+    gi.item_id,
+    gi.group_id,
+    w.spelling
+From group_items gi
+Join words w On gi.word_id = w.word_id
+""")
+
+ANSWER_INDEX_HITS = metrics.Counter("answer_index_hits_total", "Quiz submissions graded from the answer index.")
+ANSWER_INDEX_MISSES = metrics.Counter("answer_index_misses_total", "Quiz submissions that fell back to the database.")
+ANSWER_INDEX_BUILD_SECONDS = metrics.Histogram("answer_index_build_seconds", "Time to rebuild the answer index.",
+                                               buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+ANSWER_INDEX_SIZE = metrics.Gauge("answer_index_items", "Items held in the answer index.", fn=lambda: len(index))
+
+
+class Answer(NamedTuple):
+    group_id: int
+    spelling: str
+    normalized: str
+
+
+def normalize(answer: str) -> str:
+    """Case-folded, NFKC-normalized, single-spaced form used for comparisons."""
+    return " ".join(unicodedata.normalize("NFKC", answer).casefold().split())
+
+
+def bounded_levenshtein(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance restricted to a diagonal band of width max_distance,
+    O(len * max_distance). Anything beyond the bound is reported as
+    max_distance + 1.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if len(a) > len(b):
+        a, b = b, a
+
+    over = max_distance + 1
+    previous = [j if j <= max_distance else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [over] * (len(b) + 1)
+        current[0] = i if i <= max_distance else over
+        best = current[0]
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j - 1] + cost, previous[j] + 1, current[j - 1] + 1)
+            current[j] = value if value < over else over
+            if current[j] < best:
+                best = current[j]
+        if best > max_distance:
+            return over
+        previous = current
+    return min(previous[len(b)], over)
+
+
+def allowed_distance(normalized_correct: str) -> int:
+    """Typos tolerated for a word: one per four letters, capped at ANSWER_MAX_EDIT_DISTANCE."""
+    return min(_MAX_DISTANCE, len(normalized_correct) // 4)
+
+
+class AnswerIndex:
+    def __init__(self, ttl: float = _TTL):
+        self.ttl = ttl
+        self._answers: Dict[int, Answer] = {}
+        self._built_at: Optional[float] = None
+        self._stale = True
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def build(self, rows) -> int:
+        """Load every item's spelling from (item_id, group_id, spelling, ...) rows and swap the index in."""
+        started = time.perf_counter()
+        answers = {}
+        for item_id, group_id, spelling, *_ in rows:
+            normalized = normalize(spelling)
+            # Share the string when normalizing is a no-op (the common case)
+            answers[item_id] = Answer(group_id, spelling, spelling if normalized == spelling else normalized)
+        self._answers = answers
+        self._built_at = time.monotonic()
+        self._stale = False
+        ANSWER_INDEX_BUILD_SECONDS.observe(time.perf_counter() - started)
+        return len(answers)
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def needs_refresh(self) -> bool:
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        return self._stale or (self._built_at is not None and now - self._built_at > self.ttl)
+
+    def refresh_in_background(self) -> None:
+        """Rebuild on a thread unless a rebuild is already running."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="answer-index", daemon=True).start()
+
+    def _refresh(self) -> None:
+        import catalog_snapshot
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            # Under serve.py the shared snapshot has the catalog already
+            rows = catalog_snapshot.catalog_rows()
+            self.build(db.execute(ANSWER_INDEX_QUERY) if rows is None else rows)
+        except Exception as exc:
+            self._retry_at = time.monotonic() + _RETRY_SECONDS
+            print(f"answer_index: rebuild failed, grading falls back to the database: {exc}")
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing = False
+
+    def lookup(self, item_id: int, group_id: int) -> Optional[Answer]:
+        if self.needs_refresh():
+            self.refresh_in_background()
+        answer = self._answers.get(item_id)
+        if answer is None or answer.group_id != group_id:
+            ANSWER_INDEX_MISSES.inc()
+            return None
+        ANSWER_INDEX_HITS.inc()
+        return answer
+
+
+index = AnswerIndex()
+
+# A catalog import in this process means spellings may have changed
+catalog_cache.on_invalidate(lambda namespace: index.mark_stale() if namespace is None else None)
+
+
+def lookup(item_id: int, group_id: int) -> Optional[Answer]:
+    return index.lookup(item_id, group_id)
+
+
+def start() -> None:
+    index.refresh_in_background()
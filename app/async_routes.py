@@ -0,0 +1,294 @@
+"""
+`async def` versions of the catalog and quiz routes, backed by helper_sql_async.
+
+main.py includes this router ahead of its own route definitions when
+USE_ASYNC_DB is enabled, so these handlers shadow the sync ones.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Header, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Optional
+
+from models import (
+    QuizAnswerSubmit,
+    QuizAnswerResponse,
+    QuizSheetSubmit,
+    QuizSheetResponse,
+    QuizSync,
+    QuizSyncResponse,
+    HintRequest,
+    HintResponse,
+    ReviewItem,
+    UserProgress,
+    Leaderboard,
+)
+import helper_sql
+import helper_sql_async
+import helper_rag
+import hint_scheduler
+import catalog_payloads
+import pack_export
+import srs
+import progress
+import quiz_batch
+import database
+
+router = APIRouter()
+
+async def get_async_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
+if_none_match_header = Annotated[Optional[str], Header()]
+
+@router.get("/groups",
+    responses={
+        200: {"description": "One page of groups, X-Next-Cursor set when more follow"},
+        400: {"description": "Unknown field requested"},
+        404: {"description": "Groups not found"}
+    })
+async def get_groups(db: async_db_dependency, if_none_match: if_none_match_header = None,
+                     fields: Optional[str] = None, after: Optional[int] = None, limit: int = catalog_payloads.PAGE_SIZE):
+    columns = catalog_payloads.projection(fields, helper_sql.GROUP_LIST_FIELDS, helper_sql.GROUP_LIST_REQUIRED)
+    payload = await catalog_payloads.group_list_async(db, columns, after, catalog_payloads.page_limit(limit))
+    return catalog_payloads.payload_response(payload, if_none_match, "Groups not found")
+
+@router.get("/groups/{group_id}/items",
+    responses={
+        200: {"description": "One page of items in display order, X-Next-Cursor set when more follow"},
+        400: {"description": "Unknown field requested"},
+        404: {"description": "Group items not found"}
+    })
+async def get_group_items(group_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None,
+                          fields: Optional[str] = None, after: Optional[int] = None,
+                          limit: int = catalog_payloads.PAGE_SIZE):
+    columns = catalog_payloads.projection(fields, helper_sql.GROUP_ITEM_FIELDS, helper_sql.GROUP_ITEM_REQUIRED)
+    payload = await catalog_payloads.group_items_async(db, group_id, columns, after, catalog_payloads.page_limit(limit))
+    return catalog_payloads.payload_response(payload, if_none_match, "Group items not found")
+
+@router.get("/groups/{group_id}",
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Group footer not found"}
+    })
+async def get_group_footer(group_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None):
+    payload = await catalog_payloads.group_footer_async(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Group footer not found")
+
+@router.get("/items/{item_id}/details",
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Word details not found"}
+    })
+async def get_word_details(item_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None):
+    payload = await catalog_payloads.word_details_async(db, item_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Word details not found")
+
+@router.get("/groups/{group_id}/details",
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Word details not found"}
+    })
+async def get_group_word_details(group_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None):
+    payload = await catalog_payloads.group_word_details_async(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Word details not found")
+
+@router.get("/groups/{group_id}/pack",
+    responses={
+        200: {"description": "Offline quiz pack for the group (format in pack_export.py)",
+              "content": {pack_export.MEDIA_TYPE: {}}},
+        404: {"description": "Group not found"}
+    })
+async def get_group_pack(group_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None):
+    payload = await pack_export.group_pack_async(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Group not found", pack_export.MEDIA_TYPE)
+
+@router.get("/groups/{group_id}/quiz",
+    responses={
+        200: {"description": "Quiz items without their spellings"},
+        400: {"description": "Unknown field requested"},
+        404: {"description": "Group items not found"},
+        503: {"description": "Review history still loading (only with user_id)"},
+    })
+async def get_group_quiz(group_id: int, db: async_db_dependency, if_none_match: if_none_match_header = None,
+                         user_id: Optional[int] = None, fields: Optional[str] = None,
+                         after: Optional[int] = None, limit: Optional[int] = None):
+    columns = catalog_payloads.projection(fields, helper_sql.QUIZ_ITEM_FIELDS, helper_sql.GROUP_ITEM_REQUIRED)
+    if user_id is None:
+        page_size = catalog_payloads.page_limit(limit or catalog_payloads.PAGE_SIZE)
+        payload = await catalog_payloads.group_items_async(db, group_id, columns, after, page_size)
+        return catalog_payloads.payload_response(payload, if_none_match, "Group items not found")
+
+    if not srs.scheduler.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Review history is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    items = await helper_sql_async.get_group_items(db, group_id, columns)
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Group items not found",
+        )
+    return srs.group_quiz(user_id, group_id, items, max(1, min(limit or 10, 100)))
+
+@router.get(
+    "/quiz/next",
+    response_model=List[ReviewItem],
+    responses={
+        200: {"description": "Due items, most overdue first (then unseen items when group_id is given)"},
+        503: {"description": "Review history still loading"},
+    },
+)
+async def get_next_reviews(user_id: int, db: async_db_dependency, group_id: Optional[int] = None, limit: int = 10):
+    if not srs.scheduler.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Review history is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    group_item_ids = None
+    if group_id is not None:
+        items = await helper_sql_async.get_group_items(db, group_id, helper_sql.GROUP_ITEM_REQUIRED)
+        group_item_ids = [item["item_id"] for item in items]
+    return srs.next_items(user_id, group_id, max(1, min(limit, 100)), group_item_ids)
+
+@router.get(
+    "/users/{user_id}/progress",
+    response_model=UserProgress,
+    responses={
+        200: {"description": "Overall and per-group counters, completion and rank"},
+        404: {"description": "No quiz attempts for this user"},
+        503: {"description": "Progress still loading"},
+    },
+)
+async def get_user_progress(user_id: int, db: async_db_dependency):
+    if not progress.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    result = progress.user_progress(user_id, await helper_sql_async.get_group_sizes(db))
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No quiz attempts for this user",
+        )
+    return result
+
+@router.get(
+    "/groups/{group_id}/leaderboard",
+    response_model=Leaderboard,
+    responses={
+        200: {"description": "Top users by items mastered, correct answers, then fewest attempts"},
+        503: {"description": "Progress still loading"},
+    },
+)
+async def get_group_leaderboard(group_id: int, limit: int = 10, user_id: Optional[int] = None):
+    if not progress.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    return progress.leaderboard(group_id, max(1, min(limit, 100)), user_id)
+
+@router.post(
+    "/quiz/submit",
+    response_model=QuizAnswerResponse,
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Quiz item not found"}
+    },
+)
+async def submit_quiz(answer: QuizAnswerSubmit, db: async_db_dependency):
+    result = await helper_sql_async.quiz_answer(
+        db,
+        answer.item_id,
+        answer.user_answer,
+        answer.group_id,
+        answer.user_id,
+    )
+
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz item not found",
+        )
+
+    quiz_batch.record_attempts(answer.user_id, answer.group_id, [(answer.item_id, answer.user_answer, result["is_correct"])])
+    return QuizAnswerResponse(**result)
+
+@router.post(
+    "/quiz/submit/batch",
+    response_model=QuizSheetResponse,
+    responses={
+        200: {"description": "Every answer graded; items outside the group are listed in not_found"},
+        413: {"description": "More than QUIZ_SYNC_MAX_ATTEMPTS answers"},
+    },
+)
+async def submit_quiz_sheet(sheet: QuizSheetSubmit, db: async_db_dependency):
+    quiz_batch.require_batch_size(len(sheet.answers))
+    graded = await helper_sql_async.grade_sheet(db, sheet.group_id, [(a.item_id, a.user_answer) for a in sheet.answers])
+    quiz_batch.record_attempts(sheet.user_id, sheet.group_id, quiz_batch.recorded(sheet.answers, graded))
+    return quiz_batch.sheet_response(sheet.group_id, sheet.answers, graded)
+
+@router.post(
+    "/quiz/sync",
+    response_model=QuizSyncResponse,
+    responses={
+        200: {"description": "Attempts graded and recorded (not again for a repeated sync_id); unknown items are skipped"},
+        413: {"description": "More than QUIZ_SYNC_MAX_ATTEMPTS answers"},
+    },
+)
+async def sync_quiz_attempts(sync: QuizSync, db: async_db_dependency):
+    quiz_batch.require_batch_size(len(sync.attempts))
+    sheets = quiz_batch.sync_sheets(sync.attempts)
+    graded = {
+        group_id: await helper_sql_async.grade_sheet(db, group_id, [(a.item_id, a.user_answer) for a in attempts])
+        for group_id, attempts in sheets.items()
+    }
+    # Claimed only once grading succeeded, and given back if recording fails
+    duplicate = not await helper_sql_async.claim_sync(db, sync.user_id, sync.sync_id)
+    try:
+        return quiz_batch.sync_response(sync, sheets, graded, duplicate)
+    except Exception:
+        if not duplicate:
+            await helper_sql_async.release_sync(db, sync.user_id, sync.sync_id)
+        raise
+
+@router.post(
+    "/quiz/hint",
+    response_model=HintResponse,
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Quiz item not found"},
+        500: {"description": "Hint generation failed"},
+        503: {"description": "Hint generator busy, retry after the Retry-After delay"},
+    },
+)
+async def get_quiz_hint(request: HintRequest, db: async_db_dependency):
+    word_context = await helper_sql_async.get_word_details(db, request.item_id)
+    if not word_context:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz item not found",
+        )
+
+    try:
+        hint = await hint_scheduler.get_hint(word_context)
+    except hint_scheduler.HintQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except helper_rag.HintGenerationError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(exc),
+        ) from exc
+
+    return HintResponse(item_id=request.item_id, hint=hint)
@@ -0,0 +1,170 @@
+"""
+Buffered quiz attempt logging.
+
+`record()` only appends to an in-memory buffer, so /quiz/submit never waits on
+an INSERT. A background thread writes the buffer to quiz_attempts as one
+multi-row insert whenever ATTEMPT_LOG_BATCH_SIZE rows are pending or
+ATTEMPT_LOG_FLUSH_MS has passed, and `stop()` drains whatever is left on
+shutdown. If the database is unreachable the batch goes back to the front of
+the buffer; past ATTEMPT_LOG_MAX_BUFFER rows the oldest attempts are dropped
+(and counted) rather than growing without bound.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import metrics
+
+_BATCH_SIZE = int(os.getenv("ATTEMPT_LOG_BATCH_SIZE", "500"))
+_FLUSH_INTERVAL = float(os.getenv("ATTEMPT_LOG_FLUSH_MS", "1000")) / 1000
+_MAX_BUFFER = int(os.getenv("ATTEMPT_LOG_MAX_BUFFER", "100000"))
+
+ATTEMPT_BUFFER_DEPTH = metrics.Gauge("attempt_log_buffer_depth", "Quiz attempts waiting to be written.",
+                                     fn=lambda: len(log))
+ATTEMPT_FLUSH_SECONDS = metrics.Histogram("attempt_log_flush_seconds", "Time to write one batch of quiz attempts.")
+ATTEMPT_FLUSHED = metrics.Counter("attempt_log_flushed_total", "Quiz attempts written to the database.")
+ATTEMPT_FLUSH_ERRORS = metrics.Counter("attempt_log_flush_errors_total", "Attempt batches that failed to write.")
+ATTEMPT_DROPPED = metrics.Counter("attempt_log_dropped_total", "Quiz attempts dropped because the buffer was full.")
+
+
+class AttemptLog:
+    def __init__(self, batch_size: int = _BATCH_SIZE, flush_interval: float = _FLUSH_INTERVAL,
+                 max_buffer: int = _MAX_BUFFER):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def record(self, user_id: int, group_id: int, item_id: int, user_answer: str, is_correct: bool) -> None:
+        self.record_many(user_id, group_id, [(item_id, user_answer, is_correct)])
+
+    def record_many(self, user_id: int, group_id: int, attempts: List[Tuple[int, str, bool]],
+                    answered_at: Optional[List[float]] = None) -> float:
+        """
+        Buffer (item_id, user_answer, is_correct) attempts together, so they
+        share an INSERT. `answered_at` holds one epoch time per attempt
+        (synced offline attempts); by default they are stamped now. Returns
+        the recorded_at stamp, which replays use as their boundary.
+        """
+        recorded_at = time.time()
+        now = datetime.fromtimestamp(recorded_at, timezone.utc).replace(tzinfo=None)
+        times = [None] * len(attempts) if answered_at is None else answered_at
+        rows = [
+            {
+                "user_id": user_id,
+                "group_id": group_id,
+                "item_id": item_id,
+                "user_answer": user_answer[:100],
+                "is_correct": is_correct,
+                # Stored as naive UTC
+                "answered_at": now if at is None else datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None),
+                "recorded_at": now,
+            }
+            for (item_id, user_answer, is_correct), at in zip(attempts, times)
+        ]
+        with self._cond:
+            self._buffer.extend(rows)
+            self._trim()
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return recorded_at
+
+    def _trim(self) -> None:
+        excess = len(self._buffer) - self.max_buffer
+        for _ in range(max(excess, 0)):
+            self._buffer.popleft()
+            ATTEMPT_DROPPED.inc()
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._cond:
+            count = min(len(self._buffer), self.batch_size)
+            return [self._buffer.popleft() for _ in range(count)]
+
+    def flush(self) -> int:
+        """Write everything buffered so far, one batch at a time. Returns rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take()
+                if not batch:
+                    return written
+                started = time.perf_counter()
+                try:
+                    _write(batch)
+                except Exception as exc:
+                    ATTEMPT_FLUSH_ERRORS.inc()
+                    print(f"attempt_log: failed to write {len(batch)} attempts, will retry: {exc}")
+                    with self._cond:
+                        self._buffer.extendleft(reversed(batch))
+                        self._trim()
+                    return written
+                ATTEMPT_FLUSH_SECONDS.observe(time.perf_counter() - started)
+                ATTEMPT_FLUSHED.inc(len(batch))
+                written += len(batch)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="attempt-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flusher after it has drained the buffer."""
+        if self._thread is None:
+            self.flush()
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+
+def _write(batch: List[Dict[str, Any]]) -> None:
+    # Imported here so the buffer can be used without configuring a database
+    from database import engine
+    from models import QuizAttempts
+
+    with engine.begin() as conn:
+        conn.execute(QuizAttempts.__table__.insert(), batch)
+
+
+log = AttemptLog()
+
+
+def record(user_id: int, group_id: int, item_id: int, user_answer: str, is_correct: bool) -> None:
+    log.record(user_id, group_id, item_id, user_answer, is_correct)
+
+
+def record_many(user_id: int, group_id: int, attempts: List[Tuple[int, str, bool]],
+                answered_at: Optional[List[float]] = None) -> float:
+    return log.record_many(user_id, group_id, attempts, answered_at)
+
+
+def start() -> None:
+    log.start()
+
+
+def stop() -> None:
+    log.stop()
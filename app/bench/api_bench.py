@@ -0,0 +1,242 @@
+"""
+End-to-end benchmark of every API route in main.py, reported per endpoint
+(of the health probes only /health is driven, and /debug/profile is left out).
+
+Generates a synthetic catalog (data/generate_synthetic.py), seeds a SQLite
+stand-in from it, starts uvicorn with the fake hint backend and drives a
+weighted route mix, then prints throughput and p50/p95/p99 per endpoint and
+writes them as JSON:
+
+    python bench/api_bench.py --groups 1000 --items-per-group 100 --output results.json
+    python bench/api_bench.py --baseline results.json      # compare against an earlier run
+
+Use --data-dir to bench an existing set of CSVs, or --url (plus --data-dir for
+the ids) to drive a server that is already running.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import generate_synthetic
+import standin
+from loadtest import load_ids
+
+# (endpoint label, weight); weights roughly follow what the frontend calls,
+# with the offline, review and progress routes at lower rates
+ROUTE_MIX = [
+    ('GET /groups', 10),
+    ('GET /groups/{id}/items', 20),
+    ('GET /groups/{id}', 8),
+    ('GET /items/{id}/details', 20),
+    ('GET /groups/{id}/details', 8),
+    ('GET /groups/{id}/quiz', 8),
+    ('POST /quiz/submit', 16),
+    ('POST /quiz/submit/batch', 2),
+    ('GET /quiz/next', 4),
+    ('POST /quiz/hint', 4),
+    ('GET /quiz/hint/stream', 2),
+    ('GET /search', 4),
+    ('GET /users/{id}/progress', 2),
+    ('GET /groups/{id}/leaderboard', 2),
+    ('GET /groups/{id}/pack', 1),
+    ('POST /quiz/sync', 1),
+    ('GET /health', 2),
+    ('GET /metrics', 2),
+]
+# Answers per /quiz/submit/batch sheet and per /quiz/sync upload
+SHEET_SIZE = 10
+
+
+def build_request(endpoint, item_id, group_id, group_items):
+    """(method, path, json body, query params) for one call of an endpoint."""
+    method, template = endpoint.split(' ', 1)
+    sheet = random.sample(group_items, min(SHEET_SIZE, len(group_items)))
+    if endpoint == 'POST /quiz/submit':
+        return method, template, {'item_id': item_id, 'user_answer': 'guess', 'group_id': group_id, 'user_id': 1}, None
+    if endpoint == 'POST /quiz/submit/batch':
+        answers = [{'item_id': i, 'user_answer': 'guess'} for i in sheet]
+        return method, template, {'user_id': 1, 'group_id': group_id, 'answers': answers}, None
+    if endpoint == 'POST /quiz/sync':
+        attempts = [{'item_id': i, 'group_id': group_id, 'user_answer': 'guess'} for i in sheet]
+        return method, template, {'user_id': 1, 'sync_id': uuid.uuid4().hex, 'attempts': attempts}, None
+    if endpoint == 'GET /quiz/next':
+        return method, template, None, {'user_id': 1, 'group_id': group_id}
+    if endpoint == 'POST /quiz/hint':
+        return method, template, {'item_id': item_id, 'group_id': group_id, 'user_id': 1}, None
+    if endpoint == 'GET /quiz/hint/stream':
+        return method, template, None, {'item_id': item_id}
+    if endpoint == 'GET /search':
+        return method, template, None, {'q': ''.join(random.choices(string.ascii_lowercase, k=2))}
+    if endpoint == 'GET /users/{id}/progress':
+        return method, '/users/1/progress', None, None
+    if endpoint == 'GET /groups/{id}/leaderboard':
+        return method, f'/groups/{group_id}/leaderboard', None, {'user_id': 1}
+    path = template.replace('/items/{id}', f'/items/{item_id}').replace('{id}', str(group_id))
+    return method, path, None, None
+
+
+async def run_bench(base_url, ids, concurrency, duration, warmup):
+    endpoints = [name for name, _ in ROUTE_MIX]
+    weights = [weight for _, weight in ROUTE_MIX]
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    by_group = defaultdict(list)
+    for item_id, group_id in ids:
+        by_group[group_id].append(item_id)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def call(endpoint):
+            item_id, group_id = random.choice(ids)
+            method, path, body, params = build_request(endpoint, item_id, group_id, by_group[group_id])
+            started = time.perf_counter()
+            # Streaming responses are timed to the last byte
+            async with client.stream(method, path, json=body, params=params) as response:
+                await response.aread()
+            return response.status_code, time.perf_counter() - started
+
+        async def worker(deadline, record):
+            while time.perf_counter() < deadline:
+                endpoint = random.choices(endpoints, weights)[0]
+                try:
+                    status_code, elapsed = await call(endpoint)
+                except httpx.HTTPError as exc:
+                    if record:
+                        statuses[endpoint][type(exc).__name__] += 1
+                    continue
+                if record:
+                    statuses[endpoint][status_code] += 1
+                    latencies[endpoint].append(elapsed)
+
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    results = {}
+    for endpoint in endpoints:
+        samples = sorted(latencies[endpoint])
+        results[endpoint] = {
+            'requests': len(samples),
+            'rps': len(samples) / elapsed,
+            'p50_ms': standin.percentile(samples, 50) * 1000,
+            'p95_ms': standin.percentile(samples, 95) * 1000,
+            'p99_ms': standin.percentile(samples, 99) * 1000,
+            'statuses': {str(k): v for k, v in statuses[endpoint].items()},
+        }
+    total = sum(r['requests'] for r in results.values())
+    return {'elapsed_s': elapsed, 'requests': total, 'rps': total / elapsed, 'endpoints': results}
+
+
+def report(label, result, baseline=None):
+    print(f"\n[{label}] {result['requests']} requests in {result['elapsed_s']:.1f}s, {result['rps']:.1f} req/s")
+    header = f"{'endpoint':<28}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header + ('  p95 vs baseline' if baseline else ''))
+    for endpoint, r in result['endpoints'].items():
+        line = f"{endpoint:<28}{r['rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+        before = (baseline or {}).get('endpoints', {}).get(endpoint)
+        if before and before['p95_ms']:
+            line += f"  {(r['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100:+.0f}%"
+        errors = {k: v for k, v in r['statuses'].items() if not k.startswith(('2', '3'))}
+        if errors:
+            line += f"  errors {errors}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Target an existing server instead of spawning one.')
+    parser.add_argument('--data-dir', help='Existing catalog CSVs (default: generate a synthetic one).')
+    parser.add_argument('--groups', type=int, default=1000)
+    parser.add_argument('--items-per-group', type=int, default=100)
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='sync')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--hint-latency-ms', type=int, default=200,
+                        help='Latency of the fake hint backend.')
+    parser.add_argument('--no-catalog-cache', action='store_true',
+                        help='Run the server with CATALOG_CACHE_TTL=0.')
+    parser.add_argument('--output', help='Write results as JSON to this path.')
+    parser.add_argument('--baseline', help='Earlier --output file to compare p95s against.')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, mode='r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    output = {
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        'python': platform.python_version(),
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'runs': {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None and args.url:
+            parser.error('--url needs --data-dir so requests use ids that exist on that server.')
+        if data_dir is None:
+            data_dir = os.path.join(tmp, 'catalog')
+            counts = generate_synthetic.generate(data_dir, args.groups, args.items_per_group)
+            print(f"Generated {counts['groups']} groups / {counts['group_items']} items in {data_dir}")
+        ids = load_ids(data_dir)
+
+        if args.url:
+            result = asyncio.run(run_bench(args.url, ids, args.concurrency, args.duration, args.warmup))
+            output['runs'][args.url] = result
+            report(args.url, result, (baseline or {}).get('runs', {}).get(args.url))
+        else:
+            db_path = os.path.join(tmp, 'voka.sqlite3')
+            started = time.perf_counter()
+            standin.seed_sqlite(db_path, data_dir)
+            print(f"Seeded SQLite stand-in in {time.perf_counter() - started:.1f}s")
+
+            modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+            for mode in modes:
+                env = {
+                    **standin.sqlite_env(db_path),
+                    'USE_ASYNC_DB': 'true' if mode == 'async' else 'false',
+                    'HINT_BACKEND': 'fake',
+                    'FAKE_HINT_LATENCY_MS': str(args.hint_latency_ms),
+                    'HINT_CACHE_PATH': os.path.join(tmp, f'hints-{mode}.sqlite3'),
+                }
+                if args.no_catalog_cache:
+                    env['CATALOG_CACHE_TTL'] = '0'
+                port = standin.free_port()
+                proc = standin.start_server(env, port)
+                try:
+                    result = asyncio.run(run_bench(f'http://127.0.0.1:{port}', ids, args.concurrency,
+                                                   args.duration, args.warmup))
+                finally:
+                    standin.stop_server(proc)
+                output['runs'][mode] = result
+                report(mode, result, (baseline or {}).get('runs', {}).get(mode))
+
+    if args.output:
+        with open(args.output, mode='w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Concurrency load test for the sync vs. async (USE_ASYNC_DB) route sets.
+
+Against a SQLite stand-in seeded from app/data (default):
+    python bench/loadtest.py --mode both --concurrency 512 --duration 20
+
+Against an already running server (e.g. backed by local MySQL):
+    python bench/loadtest.py --url http://localhost:8000 --concurrency 512
+
+The catalog cache is disabled for spawned servers (CATALOG_CACHE_TTL=0) so the
+numbers reflect the database path rather than cache hits.
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import standin
+
+
+def load_ids(data_dir):
+    with open(os.path.join(data_dir, 'group_items.csv'), mode='r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    return [(int(r['item_id']), int(r['group_id'])) for r in rows]
+
+
+def build_requests(ids):
+    """Weighted mix of the read-heavy routes plus quiz submissions."""
+    item_id, group_id = random.choice(ids)
+    roll = random.random()
+    if roll < 0.2:
+        return 'GET', '/groups', None
+    if roll < 0.45:
+        return 'GET', f'/groups/{group_id}/items', None
+    if roll < 0.55:
+        return 'GET', f'/groups/{group_id}', None
+    if roll < 0.85:
+        return 'GET', f'/items/{item_id}/details', None
+    return 'POST', '/quiz/submit', {
+        'item_id': item_id,
+        'user_answer': 'guess',
+        'group_id': group_id,
+        'user_id': 1,
+    }
+
+
+async def run_load(base_url, ids, concurrency, duration):
+    latencies = []
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                method, path, body = build_requests(ids)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, json=body)
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as exc:
+                    statuses[type(exc).__name__] += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': standin.percentile(latencies, 50) * 1000,
+        'p95_ms': standin.percentile(latencies, 95) * 1000,
+        'p99_ms': standin.percentile(latencies, 99) * 1000,
+        'statuses': dict(statuses),
+    }
+
+
+def report(label, result):
+    print(f"[{label}] {result['requests']} requests, {result['rps']:.1f} req/s, "
+          f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+          f"p99 {result['p99_ms']:.1f} ms, statuses {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Target an existing server instead of spawning one.')
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--concurrency', type=int, default=512)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--data-dir', default=standin.DATA_DIR)
+    args = parser.parse_args()
+
+    ids = load_ids(args.data_dir)
+
+    if args.url:
+        report(args.url, asyncio.run(run_load(args.url, ids, args.concurrency, args.duration)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'voka.sqlite3')
+        standin.seed_sqlite(db_path, args.data_dir)
+        modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+        for mode in modes:
+            env = {
+                **standin.sqlite_env(db_path),
+                'USE_ASYNC_DB': 'true' if mode == 'async' else 'false',
+                'CATALOG_CACHE_TTL': '0',
+            }
+            port = standin.free_port()
+            proc = standin.start_server(env, port)
+            try:
+                result = asyncio.run(run_load(f'http://127.0.0.1:{port}', ids, args.concurrency, args.duration))
+            finally:
+                standin.stop_server(proc)
+            report(mode, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Before/after benchmark for the db/migrations indexes on the helper_sql queries.
+
+Builds the catalog tables without the migration indexes in a scratch database,
+fills them with a generated dataset, prints EXPLAIN plans and latencies for each
+hot query, applies db/migrations/*.sql and repeats.
+
+    python bench/query_bench.py                          # temporary SQLite file
+    python bench/query_bench.py --groups 5000 --items-per-group 60
+    python bench/query_bench.py --url mysql+pymysql://root:pw@localhost/voka_bench --drop-existing
+
+The MySQL form DROPS and recreates group_list, words, group_items and
+word_details in the target database, so point it at a scratch schema.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import helper_sql
+import standin
+
+QUERIES = [
+    ('get_group_items', helper_sql.GROUP_ITEMS_QUERY, 'group'),
+    ('get_group_word_details', helper_sql.GROUP_WORD_DETAILS_QUERY, 'group'),
+    ('get_word_details', helper_sql.WORD_DETAILS_QUERY, 'item'),
+    ('get_group_footer', helper_sql.GROUP_FOOTER_QUERY, 'group'),
+    ('quiz_answer', helper_sql.QUIZ_ITEM_QUERY, 'item_group'),
+]
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def create_schema(conn):
+    for table in ('word_details', 'group_items', 'words', 'group_list'):
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    for statement in standin.split_statements(standin.SCHEMA):
+        conn.execute(text(statement))
+
+
+def populate(conn, groups, items_per_group, batch_size=5000):
+    """Synthetic catalog: ~60% distinct words, words shared across groups."""
+    rng = random.Random(42)
+    word_count = max(1, int(groups * items_per_group * 0.6))
+
+    def insert(sql, rows):
+        for start in range(0, len(rows), batch_size):
+            conn.execute(text(sql), rows[start:start + batch_size])
+
+    insert("INSERT INTO group_list VALUES (:group_id, :group_number, :title_kr, :en, :kr)", [
+        {'group_id': g, 'group_number': g, 'title_kr': f'그룹 {g}', 'en': f'Footer {g}', 'kr': f'바닥글 {g}'}
+        for g in range(1, groups + 1)
+    ])
+    insert("INSERT INTO words VALUES (:word_id, :spelling)", [
+        {'word_id': w, 'spelling': ''.join(rng.choice(LETTERS) for _ in range(rng.randint(4, 12)))}
+        for w in range(1, word_count + 1)
+    ])
+    insert("INSERT INTO word_details VALUES (:word_id, :word_id, :d, :s, :t, :m)", [
+        {'word_id': w, 'd': '정의 ' * 8, 's': 'An example sentence. ' * 3, 't': '예문 번역 ' * 5, 'm': '암기 팁 ' * 4}
+        for w in range(1, word_count + 1)
+    ])
+    item_id = 0
+    items = []
+    # Insert items in shuffled group order so group_id is not clustered with item_id
+    group_order = list(range(1, groups + 1))
+    rng.shuffle(group_order)
+    for g in group_order:
+        orders = list(range(1, items_per_group + 1))
+        rng.shuffle(orders)
+        for order in orders:
+            item_id += 1
+            items.append({'item_id': item_id, 'group_id': g, 'word_id': rng.randint(1, word_count),
+                          'display_order': order, 'summary_meaning': '요약 뜻', 'display_letter': rng.choice(LETTERS)})
+    insert("INSERT INTO group_items VALUES (:item_id, :group_id, :word_id, :display_order, :summary_meaning, :display_letter)", items)
+    conn.commit()
+    return [(i['item_id'], i['group_id']) for i in items]
+
+
+def params_for(kind, ids, rng):
+    item_id, group_id = rng.choice(ids)
+    if kind == 'group':
+        return {'group_id': group_id}
+    if kind == 'item':
+        return {'item_id': item_id}
+    return {'item_id': item_id, 'group_id': group_id}
+
+
+def explain(conn, query, params, dialect):
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect == 'sqlite' else 'EXPLAIN '
+    rows = conn.execute(text(prefix + query.text), params).fetchall()
+    return [' | '.join(str(v) for v in row) for row in rows]
+
+
+def time_query(conn, query, kind, ids, iterations):
+    rng = random.Random(7)
+    samples = []
+    for _ in range(iterations):
+        params = params_for(kind, ids, rng)
+        started = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        samples.append(time.perf_counter() - started)
+    samples.sort()
+    return standin.percentile(samples, 50) * 1000, standin.percentile(samples, 95) * 1000
+
+
+def run_phase(label, conn, ids, dialect, iterations):
+    print(f"\n=== {label} ===")
+    results = {}
+    rng = random.Random(1)
+    for name, query, kind in QUERIES:
+        print(f"\n-- {name}")
+        for line in explain(conn, query, params_for(kind, ids, rng), dialect):
+            print(f"   {line}")
+        p50, p95 = time_query(conn, query, kind, ids, iterations)
+        results[name] = (p50, p95)
+        print(f"   p50 {p50:.3f} ms   p95 {p95:.3f} ms")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Scratch database URL (default: temporary SQLite file).')
+    parser.add_argument('--drop-existing', action='store_true',
+                        help='Required with --url: confirms the catalog tables there may be dropped.')
+    parser.add_argument('--groups', type=int, default=2000)
+    parser.add_argument('--items-per-group', type=int, default=50)
+    parser.add_argument('--iterations', type=int, default=500)
+    args = parser.parse_args()
+
+    if args.url and not args.drop_existing:
+        parser.error('--url drops and recreates the catalog tables; pass --drop-existing to confirm.')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url or f"sqlite:///{os.path.join(tmp, 'query_bench.sqlite3')}"
+        engine = create_engine(url)
+        dialect = engine.dialect.name
+        with engine.connect() as conn:
+            print(f"Building {args.groups} groups x {args.items_per_group} items on {dialect}...")
+            create_schema(conn)
+            conn.commit()
+            ids = populate(conn, args.groups, args.items_per_group)
+
+            before = run_phase('before (FK indexes only)', conn, ids, dialect, args.iterations)
+
+            for statement in standin.migration_statements():
+                conn.execute(text(statement))
+            conn.execute(text('ANALYZE' if dialect == 'sqlite' else
+                              'ANALYZE TABLE group_list, words, group_items, word_details'))
+            conn.commit()
+
+            after = run_phase('after db/migrations', conn, ids, dialect, args.iterations)
+        engine.dispose()
+
+    print(f"\n{'query':<26}{'before p50':>12}{'after p50':>12}{'speedup':>10}")
+    for name, _, _ in QUERIES:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<26}{b:>10.3f}ms{a:>10.3f}ms{(b / a if a else 0):>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Build time, load time and query latency of the related-word index (rag_index.py).
+
+Generates synthetic catalogs of increasing size, builds an index for each into
+a temporary directory, maps it the way the server does and times related-word
+queries for words in the index and for unseen text:
+
+    python bench/rag_bench.py --groups 100 1000 10000 --items-per-group 100
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import generate_synthetic
+import rag_index
+import standin
+
+
+def run(groups, items_per_group, dim, queries, tmp):
+    data_dir = os.path.join(tmp, f'catalog-{groups}')
+    index_dir = os.path.join(tmp, f'index-{groups}')
+    generate_synthetic.generate(data_dir, groups, items_per_group)
+    rows = rag_index.rows_from_csv(data_dir)
+
+    started = time.perf_counter()
+    words = rag_index.build(rows, index_dir, dim)
+    build_s = time.perf_counter() - started
+
+    index = rag_index.RelatedWordIndex()
+    started = time.perf_counter()
+    index.load(index_dir)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    rng = random.Random(7)
+    known, unseen = [], []
+    for _ in range(queries):
+        word_id, spelling, group_id, meaning, definition = rng.choice(rows)
+        context = {'word_id': word_id, 'group_id': group_id, 'spelling': spelling,
+                   'summary_meaning': meaning, 'full_definition': definition}
+        t = time.perf_counter()
+        index.related(context, 5)
+        known.append(time.perf_counter() - t)
+
+        context = {'spelling': spelling[::-1], 'summary_meaning': meaning, 'full_definition': definition}
+        t = time.perf_counter()
+        index.related(context, 5)
+        unseen.append(time.perf_counter() - t)
+
+    known.sort()
+    unseen.sort()
+    print(f"{words:>9,} words  {words * dim * 4 / 1e6:8.1f} MB  build {build_s:6.1f}s  load {load_ms:6.1f}ms  "
+          f"indexed p50 {standin.percentile(known, 50) * 1000:6.2f}ms p99 {standin.percentile(known, 99) * 1000:6.2f}ms  "
+          f"unseen p50 {standin.percentile(unseen, 50) * 1000:6.2f}ms p99 {standin.percentile(unseen, 99) * 1000:6.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--items-per-group', type=int, default=100)
+    parser.add_argument('--dim', type=int, default=rag_index.DEFAULT_DIM)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for groups in args.groups:
+            run(groups, args.items_per_group, args.dim, args.queries, tmp)
+
+
+if __name__ == "__main__":
+    main()
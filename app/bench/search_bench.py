@@ -0,0 +1,103 @@
+"""
+Autocomplete latency of search_index at catalog scale.
+
+Generates a synthetic catalog (default 10k groups x 100 items = 1M items),
+builds the index from it, times prefix queries of 1-4 characters for English
+spellings, Korean syllables, half-typed jamo and choseong, then measures an
+incremental rebuild after a small simulated import:
+
+    python bench/search_bench.py --groups 10000 --items-per-group 100
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import generate_synthetic
+import search_index
+import standin
+
+
+def load_rows(data_dir):
+    """(item_id, group_id, spelling, meaning, definition) rows, as SEARCH_INDEX_QUERY returns them."""
+    def read(name):
+        with open(os.path.join(data_dir, name), mode='r', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    spellings = {r['word_id']: r['spelling'] for r in read('words.csv')}
+    definitions = {r['word_id']: r['full_definition'] for r in read('word_details.csv')}
+    return [(int(r['item_id']), int(r['group_id']), spellings[r['word_id']], r['summary_meaning'],
+             definitions.get(r['word_id'], '')) for r in read('group_items.csv')]
+
+
+def query_mix(rows, count, rng):
+    """Prefixes of real entries, split across the four query shapes."""
+    queries = []
+    for _ in range(count):
+        _, _, spelling, meaning, _ = rng.choice(rows)
+        kind = rng.randrange(4)
+        if kind == 0:
+            queries.append(('english', spelling[:rng.randint(1, 4)]))
+        elif kind == 1:
+            queries.append(('syllable', meaning[:rng.randint(1, 2)]))
+        elif kind == 2:
+            # First syllable plus the next initial consonant, as mid-composition
+            queries.append(('jamo', meaning[:1] + search_index.choseong(meaning[1:2])))
+        else:
+            queries.append(('choseong', search_index.choseong(meaning)[:rng.randint(1, 3)]))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', help='Existing catalog CSVs (default: generate a synthetic one).')
+    parser.add_argument('--groups', type=int, default=10000)
+    parser.add_argument('--items-per-group', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=20000)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--changed', type=int, default=1000, help='Items modified for the incremental rebuild.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if data_dir is None:
+            data_dir = os.path.join(tmp, 'catalog')
+            generate_synthetic.generate(data_dir, args.groups, args.items_per_group)
+        rows = load_rows(data_dir)
+
+    index = search_index.SearchIndex()
+    started = time.perf_counter()
+    index.update(rows)
+    print(f"Full build: {len(rows):,} items in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    timings = {}
+    for kind, query in query_mix(rows, args.queries, rng):
+        t = time.perf_counter()
+        index.search(query, args.limit)
+        timings.setdefault(kind, []).append(time.perf_counter() - t)
+    for kind, samples in timings.items():
+        samples.sort()
+        print(f"{kind:<10} {len(samples):>6} queries  p50 {standin.percentile(samples, 50) * 1e6:7.1f}us  "
+              f"p99 {standin.percentile(samples, 99) * 1e6:7.1f}us  max {samples[-1] * 1e6:7.1f}us")
+
+    # Simulated import: respell a few items and drop a few others
+    changed = list(rows)
+    for i in rng.sample(range(len(changed)), min(args.changed, len(changed))):
+        item_id, group_id, spelling, meaning, definition = changed[i]
+        changed[i] = (item_id, group_id, spelling + 'x', meaning, definition)
+    del changed[:10]
+    started = time.perf_counter()
+    updated, removed = index.update(changed)
+    print(f"Incremental rebuild: {updated} changed, {removed} removed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Scaling benchmark for the spaced-repetition scheduler (srs.py).
+
+Replays a synthetic review history into srs.ReviewScheduler at several sizes
+and times live reviews and /quiz/next lookups against it, to show lookup cost
+tracks the heap depth (log n) rather than the size of a user's history:
+
+    python bench/srs_bench.py --reviews 100000 1000000 3000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import srs
+import standin
+
+DAY = 86400.0
+
+
+def synthetic_history(reviews, users, groups, items_per_group, days, seed=42):
+    """(user_id, group_id, item_id, is_correct, reviewed_at) rows, oldest first."""
+    rng = random.Random(seed)
+    start = time.time() - days * DAY
+    step = days * DAY / reviews
+    for n in range(reviews):
+        group_id = rng.randint(1, groups)
+        item_id = group_id * 1000 + rng.randint(1, items_per_group)
+        yield rng.randint(1, users), group_id, item_id, rng.random() < 0.75, start + n * step
+
+
+def run(reviews, users, groups, items_per_group, days, lookups):
+    scheduler = srs.ReviewScheduler()
+    started = time.perf_counter()
+    scheduler.replay(synthetic_history(reviews, users, groups, items_per_group, days))
+    replay_s = time.perf_counter() - started
+
+    rng = random.Random(7)
+    live = []
+    for _ in range(lookups):
+        group_id = rng.randint(1, groups)
+        item_id = group_id * 1000 + rng.randint(1, items_per_group)
+        t = time.perf_counter()
+        scheduler.review(rng.randint(1, users), group_id, item_id, rng.random() < 0.75)
+        live.append(time.perf_counter() - t)
+
+    user_next, group_next = [], []
+    for _ in range(lookups):
+        user_id = rng.randint(1, users)
+        t = time.perf_counter()
+        scheduler.due(user_id, None, 10)
+        user_next.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        scheduler.due(user_id, rng.randint(1, groups), 10)
+        group_next.append(time.perf_counter() - t)
+
+    def us(samples, pct):
+        return standin.percentile(sorted(samples), pct) * 1e6
+
+    states = len(scheduler._states)
+    print(f"{reviews:>10,} reviews  {states:>10,} states  replay {replay_s:6.1f}s "
+          f"({reviews / replay_s:>9,.0f}/s)  "
+          f"review p50 {us(live, 50):6.1f}us p99 {us(live, 99):6.1f}us  "
+          f"next(user) p50 {us(user_next, 50):6.1f}us p99 {us(user_next, 99):6.1f}us  "
+          f"next(group) p50 {us(group_next, 50):6.1f}us p99 {us(group_next, 99):6.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reviews', type=int, nargs='+', default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--groups', type=int, default=200)
+    parser.add_argument('--items-per-group', type=int, default=50)
+    parser.add_argument('--days', type=int, default=365, help='Span of the synthetic history.')
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    for reviews in args.reviews:
+        run(reviews, args.users, args.groups, args.items_per_group, args.days, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Local stand-ins used by the bench scripts: a SQLite copy of the catalog seeded
+from the CSVs in app/data, and a uvicorn subprocess pointed at it.
+"""
+import csv
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(APP_DIR, 'data')
+
+MIGRATIONS_DIR = os.path.join(APP_DIR, 'db', 'migrations')
+
+# Portable (SQLite and MySQL) subset of db/db_init.sql, without the indexes that
+# db/migrations adds. Table-level FOREIGN KEY clauses so InnoDB creates its
+# implicit FK indexes exactly as in production.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS group_list (
+    group_id INTEGER PRIMARY KEY,
+    group_number INTEGER NOT NULL,
+    title_kr VARCHAR(100) NOT NULL,
+    footer_phrase_en TEXT,
+    footer_phrase_kr TEXT
+);
+CREATE TABLE IF NOT EXISTS words (
+    word_id INTEGER PRIMARY KEY,
+    spelling VARCHAR(100) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_items (
+    item_id INTEGER PRIMARY KEY,
+    group_id INTEGER,
+    word_id INTEGER,
+    display_order INTEGER,
+    summary_meaning VARCHAR(100),
+    display_letter CHAR(1),
+    FOREIGN KEY (group_id) REFERENCES group_list (group_id),
+    FOREIGN KEY (word_id) REFERENCES words (word_id)
+);
+CREATE TABLE IF NOT EXISTS word_details (
+    detail_id INTEGER PRIMARY KEY,
+    word_id INTEGER,
+    full_definition TEXT,
+    example_sentence TEXT,
+    example_translation TEXT,
+    mnemonic_tip TEXT,
+    FOREIGN KEY (word_id) REFERENCES words (word_id)
+);
+"""
+
+
+def split_statements(sql):
+    """Split a .sql script into statements, dropping -- comments."""
+    lines = [line.split('--', 1)[0] for line in sql.splitlines()]
+    return [stmt.strip() for stmt in '\n'.join(lines).split(';') if stmt.strip()]
+
+
+def migration_statements(indexes_only=True):
+    """
+    Statements from db/migrations in order. By default only the CREATE INDEX
+    ones: the stand-in tables come from SCHEMA (or the models), and the CREATE
+    TABLE migrations are MySQL-only.
+    """
+    statements = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith('.sql'):
+            with open(os.path.join(MIGRATIONS_DIR, filename), mode='r', encoding='utf-8') as f:
+                statements.extend(split_statements(f.read()))
+    if indexes_only:
+        statements = [stmt for stmt in statements if stmt.upper().startswith('CREATE INDEX')]
+    return statements
+
+
+TABLE_FILES = [
+    ('group_list', 'groups.csv'),
+    ('words', 'words.csv'),
+    ('group_items', 'group_items.csv'),
+    ('word_details', 'word_details.csv'),
+]
+
+
+def seed_sqlite(path, data_dir=DATA_DIR):
+    """Create (or refresh) a SQLite catalog at `path` from the four CSVs."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SCHEMA)
+        for statement in migration_statements():
+            try:
+                conn.execute(statement)
+            except sqlite3.OperationalError as exc:
+                if 'already exists' not in str(exc):
+                    raise
+        for table, filename in TABLE_FILES:
+            with open(os.path.join(data_dir, filename), mode='r', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                columns = next(reader)
+                placeholders = ', '.join('?' for _ in columns)
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    reader,
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def sqlite_env(path):
+    """Environment variables that point both engines at a SQLite file."""
+    path = os.path.abspath(path)
+    return {
+        'DATABASE_URL': f'sqlite:///{path}',
+        'ASYNC_DATABASE_URL': f'sqlite+aiosqlite:///{path}',
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(env, port, app='main:app', extra_args=(), health_path='/health/ready'):
+    """Launch uvicorn in app/ and block until `health_path` answers 200."""
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', app, '--port', str(port),
+         '--log-level', 'warning', '--backlog', '4096', *extra_args],
+        cwd=APP_DIR,
+        env={**os.environ, **env},
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}{health_path}', timeout=1)
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 30s")
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
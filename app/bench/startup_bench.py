@@ -0,0 +1,102 @@
+"""
+Cold-start benchmark: how long a fresh worker takes to import and to serve.
+
+For each run, starts a new interpreter and times `import main`, then launches
+uvicorn against a SQLite stand-in seeded from app/data and times, from spawn,
+the first 200 from /health/live, the first catalog response (GET /groups)
+and the first 200 from /health/ready:
+
+    python bench/startup_bench.py --runs 5
+    python bench/startup_bench.py --warm-groups 50 --hint-backend ollama
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import standin
+
+_IMPORT_SCRIPT = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def time_import(env):
+    result = subprocess.run([sys.executable, '-c', _IMPORT_SCRIPT], cwd=standin.APP_DIR, env={**os.environ, **env},
+                            capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def wait_for(url, started, deadline=60.0):
+    """Seconds from `started` until `url` answers 200."""
+    while time.perf_counter() - started < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return time.perf_counter() - started
+        except OSError:
+            time.sleep(0.005)
+    raise RuntimeError(f"{url} did not answer within {deadline:.0f}s")
+
+
+def time_boot(env):
+    port = standin.free_port()
+    base = f'http://127.0.0.1:{port}'
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=standin.APP_DIR,
+        env={**os.environ, **env},
+    )
+    try:
+        live = wait_for(f'{base}/health/live', started)
+        first = wait_for(f'{base}/groups', started)
+        ready = wait_for(f'{base}/health/ready', started)
+    finally:
+        standin.stop_server(proc)
+    return live, first, ready
+
+
+def summary(name, values):
+    print(f"{name:<22} median {statistics.median(values) * 1000:8.1f}ms   "
+          f"min {min(values) * 1000:8.1f}ms   max {max(values) * 1000:8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--data-dir', default=standin.DATA_DIR)
+    parser.add_argument('--warm-groups', type=int, default=0, help='WARM_CATALOG_GROUPS for the server.')
+    parser.add_argument('--hint-backend', default='fake')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'standin.db')
+        standin.seed_sqlite(db_path, args.data_dir)
+        env = {
+            **standin.sqlite_env(db_path),
+            'HINT_BACKEND': args.hint_backend,
+            'HINT_CACHE_PATH': os.path.join(tmp, 'hints.sqlite3'),
+            'WARM_CATALOG_GROUPS': str(args.warm_groups),
+        }
+
+        imports, live, first, ready = [], [], [], []
+        for _ in range(args.runs):
+            imports.append(time_import(env))
+            run_live, run_first, run_ready = time_boot(env)
+            live.append(run_live)
+            first.append(run_first)
+            ready.append(run_ready)
+
+    print(f"{args.runs} runs, HINT_BACKEND={args.hint_backend}, WARM_CATALOG_GROUPS={args.warm_groups}")
+    summary("import main", imports)
+    summary("spawn -> /health/live", live)
+    summary("spawn -> first /groups", first)
+    summary("spawn -> /health/ready", ready)
+
+
+if __name__ == "__main__":
+    main()
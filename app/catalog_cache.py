@@ -0,0 +1,170 @@
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import metrics
+
+_DEFAULT_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+_DEFAULT_MAXSIZE = int(os.getenv("CATALOG_CACHE_MAXSIZE", "4096"))
+
+# Returned by get() on a miss, and by sources that cannot answer a lookup
+MISSING = object()
+
+
+class CatalogCache:
+    """Thread-safe TTL + LRU cache for read-mostly catalog rows."""
+
+    def __init__(self, ttl: float = _DEFAULT_TTL, maxsize: int = _DEFAULT_MAXSIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drop every entry, or only the entries of one namespace."""
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[0] == namespace]:
+                del self._data[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+cache = CatalogCache()
+
+metrics.Counter("catalog_cache_hits_total", "Catalog cache hits.", fn=lambda: cache.hits)
+metrics.Counter("catalog_cache_misses_total", "Catalog cache misses.", fn=lambda: cache.misses)
+metrics.Counter("catalog_cache_evictions_total", "Catalog cache LRU evictions.", fn=lambda: cache.evictions)
+metrics.Gauge("catalog_cache_entries", "Entries currently held in the catalog cache.", fn=lambda: len(cache._data))
+
+
+def cached(namespace: str) -> Callable:
+    """
+    Memoize a catalog lookup in the shared cache, keyed on its arguments.
+    The first argument is the caller's DB session and is left out of the key.
+    Empty results (None / []) are not stored so a later import can fill them.
+    Coroutine functions share the namespace with their sync counterparts. On a
+    miss, a source registered for the namespace is tried before the function.
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args):
+                key = (namespace,) + args[1:]
+                value = cache.get(key)
+                if value is not MISSING:
+                    return value
+                value = _from_source(namespace, args[1:])
+                if value is MISSING:
+                    value = await func(*args)
+                if value:
+                    cache.set(key, value)
+                return value
+
+            async_wrapper.uncached = func
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args):
+            key = (namespace,) + args[1:]
+            value = cache.get(key)
+            if value is not MISSING:
+                return value
+            value = _from_source(namespace, args[1:])
+            if value is MISSING:
+                value = func(*args)
+            if value:
+                cache.set(key, value)
+            return value
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+_sources: Dict[str, Callable[..., Any]] = {}
+
+
+def set_source(namespace: str, source: Optional[Callable[..., Any]]) -> None:
+    """
+    Answer misses in `namespace` from `source(*args)` (the lookup's arguments
+    without the session) instead of the database, e.g. a shared catalog
+    snapshot. The source returns MISSING to defer to the database.
+    """
+    if source is None:
+        _sources.pop(namespace, None)
+    else:
+        _sources[namespace] = source
+
+
+def _from_source(namespace: str, args: Tuple) -> Any:
+    source = _sources.get(namespace)
+    return MISSING if source is None else source(*args)
+
+
+_listeners: List[Callable[[Optional[str]], None]] = []
+
+
+def on_invalidate(listener: Callable[[Optional[str]], None]) -> None:
+    """Register a callback for invalidations, e.g. indexes derived from the catalog."""
+    _listeners.append(listener)
+
+
+def invalidate(namespace: Optional[str] = None, publish: bool = True) -> None:
+    """
+    Called by the import scripts after they commit new catalog data. Unless
+    `publish` is False, the invalidation also goes to the serve.py workers
+    over worker_bus (a no-op when serve.py is not running).
+    """
+    cache.invalidate(namespace)
+    for listener in _listeners:
+        listener(namespace)
+    if publish:
+        import worker_bus
+
+        worker_bus.publish_invalidation(namespace)
+
+
+def stats() -> Dict[str, Any]:
+    return cache.stats()
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse, Response
+
+import helper_sql
+import helper_sql_async
+from catalog_cache import cached
+
+# Default and maximum rows per page of /groups and /groups/{id}/items|quiz
+PAGE_SIZE = int(os.getenv("CATALOG_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("CATALOG_MAX_PAGE_SIZE", "1000"))
+
+
+class Payload(NamedTuple):
+    body: bytes
+    etag: str
+    # Keyset cursor of the following page, sent as X-Next-Cursor
+    next_cursor: Optional[int] = None
+
+
+def encode(content: Any, next_cursor: Optional[int] = None) -> Payload:
+    """Serialize once, the same way JSONResponse would, and tag the bytes."""
+    body = json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return Payload(body, etag, next_cursor)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 weak comparison of an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def payload_response(payload: Optional[Payload], if_none_match: Optional[str], not_found_detail: str,
+                     media_type: str = "application/json"):
+    """Serve pre-encoded catalog bytes, answering revalidations with 304."""
+    if payload is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"detail": not_found_detail}
+        )
+
+    headers = {"ETag": payload.etag}
+    if payload.next_cursor is not None:
+        headers["X-Next-Cursor"] = str(payload.next_cursor)
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(
+        content=payload.body,
+        status_code=status.HTTP_200_OK,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def page_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def projection(fields: Optional[str], allowed: Dict[str, str], required: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Parse a ?fields= query parameter, answering 400 for unknown names."""
+    try:
+        return helper_sql.parse_fields(fields, allowed, required)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+def _encoded(loader: Callable[..., Any], *args) -> Optional[Payload]:
+    results = loader(*args)
+    return encode(results) if results else None
+
+
+def _page(rows: List[Dict], after: Optional[int], limit: int, cursor_key: str) -> Optional[Payload]:
+    """Encode a page fetched with limit + 1 rows; the extra row only signals a next page."""
+    if not rows:
+        # Paging past the end is an empty page, an empty first page a missing group
+        return encode([]) if after is not None else None
+    next_cursor = rows[limit - 1][cursor_key] if len(rows) > limit else None
+    return encode(rows[:limit], next_cursor)
+
+
+@cached("payload:group_list")
+def group_list(db, fields: Tuple[str, ...] = tuple(helper_sql.GROUP_LIST_FIELDS),
+               after: Optional[int] = None, limit: int = PAGE_SIZE) -> Optional[Payload]:
+    rows = helper_sql.get_group_list(db, fields, after, limit + 1)
+    return _page(rows, after, limit, "group_id")
+
+
+@cached("payload:group_items")
+def group_items(db, group_id: int, fields: Tuple[str, ...] = tuple(helper_sql.GROUP_ITEM_FIELDS),
+                after: Optional[int] = None, limit: int = PAGE_SIZE) -> Optional[Payload]:
+    rows = helper_sql.get_group_items(db, group_id, fields, after, limit + 1)
+    return _page(rows, after, limit, "display_order")
+
+
+@cached("payload:group_footer")
+def group_footer(db, group_id: int) -> Optional[Payload]:
+    return _encoded(helper_sql.get_group_footer, db, group_id)
+
+
+@cached("payload:word_details")
+def word_details(db, item_id: int) -> Optional[Payload]:
+    return _encoded(helper_sql.get_word_details, db, item_id)
+
+
+@cached("payload:group_word_details")
+def group_word_details(db, group_id: int) -> Optional[Payload]:
+    return _encoded(helper_sql.get_group_word_details, db, group_id)
+
+
+def warm(db, groups: int) -> int:
+    """
+    Cache the first page of the group list and, for its first `groups` groups,
+    the first page of items and the footer, keyed exactly as the routes ask
+    for them. Returns the number of payloads cached.
+    """
+    limit = page_limit(PAGE_SIZE)
+    listing = group_list(db, tuple(helper_sql.GROUP_LIST_FIELDS), None, limit)
+    if listing is None:
+        return 0
+    count = 1
+    # The rows group_list() just loaded, from the cache
+    rows = helper_sql.get_group_list(db, tuple(helper_sql.GROUP_LIST_FIELDS), None, limit + 1)
+    for group in rows[:min(groups, limit)]:
+        count += group_items(db, group["group_id"], tuple(helper_sql.GROUP_ITEM_FIELDS), None, limit) is not None
+        count += group_footer(db, group["group_id"]) is not None
+    return count
+
+
+# Async variants share the cache namespaces above, so either route set can
+# serve bytes the other one encoded.
+async def _aencoded(loader: Callable[..., Awaitable[Any]], *args) -> Optional[Payload]:
+    results = await loader(*args)
+    return encode(results) if results else None
+
+
+@cached("payload:group_list")
+async def group_list_async(db, fields: Tuple[str, ...] = tuple(helper_sql.GROUP_LIST_FIELDS),
+                           after: Optional[int] = None, limit: int = PAGE_SIZE) -> Optional[Payload]:
+    rows = await helper_sql_async.get_group_list(db, fields, after, limit + 1)
+    return _page(rows, after, limit, "group_id")
+
+
+@cached("payload:group_items")
+async def group_items_async(db, group_id: int, fields: Tuple[str, ...] = tuple(helper_sql.GROUP_ITEM_FIELDS),
+                            after: Optional[int] = None, limit: int = PAGE_SIZE) -> Optional[Payload]:
+    rows = await helper_sql_async.get_group_items(db, group_id, fields, after, limit + 1)
+    return _page(rows, after, limit, "display_order")
+
+
+@cached("payload:group_footer")
+async def group_footer_async(db, group_id: int) -> Optional[Payload]:
+    return await _aencoded(helper_sql_async.get_group_footer, db, group_id)
+
+
+@cached("payload:word_details")
+async def word_details_async(db, item_id: int) -> Optional[Payload]:
+    return await _aencoded(helper_sql_async.get_word_details, db, item_id)
+
+
+@cached("payload:group_word_details")
+async def group_word_details_async(db, group_id: int) -> Optional[Payload]:
+    return await _aencoded(helper_sql_async.get_group_word_details, db, group_id)
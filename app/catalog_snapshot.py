@@ -0,0 +1,244 @@
+"""
+Read-only catalog snapshot shared by serve.py's workers through mmap.
+
+The master process builds the snapshot from a few full-table queries and every
+worker maps the same file, so the catalog sits in the page cache once instead
+of once per worker cache, and workers never query the catalog tables. While a
+snapshot is open it is registered as the catalog_cache source for the catalog
+namespaces: a miss is a binary search over a fixed-width index plus decoding
+one JSON record. On invalidation the master writes a new file, renames it into
+place and tells the workers (worker_bus), which remap it.
+
+File layout, little endian:
+    header   magic, generation u64, entry count u64, index offset u64
+    records  UTF-8 JSON documents
+    index    (namespace u32, key i64, offset u64, length u64), sorted
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+import catalog_cache
+import metrics
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.snapshot")
+SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", _DEFAULT_PATH)
+
+_MAGIC = b"VOKASNP1"
+_HEADER = struct.Struct("<8sQQQ")
+_ENTRY = struct.Struct("<Iqqq")
+
+# Record namespaces; the position is the code stored in the index
+NAMESPACES = ("group_list", "group_items", "group_footer", "word_details", "group_word_details",
+              "group_sizes", "catalog_rows")
+_CODES = {name: code for code, name in enumerate(NAMESPACES)}
+
+SNAPSHOT_BUILD_SECONDS = metrics.Histogram("catalog_snapshot_build_seconds", "Time to write the catalog snapshot.",
+                                           buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0))
+SNAPSHOT_GENERATION = metrics.Gauge("catalog_snapshot_generation", "Generation (write time in ns) of the mapped catalog snapshot.",
+                                    fn=lambda: _snapshot.generation if _snapshot else 0)
+
+_ITEMS_QUERY = """
+Select
+    g.group_id,
+    g.item_id,
+    g.display_order,
+    g.summary_meaning,
+    g.display_letter,
+    w.spelling
+From group_items g
+Join words w On g.word_id = w.word_id
+Order By g.group_id, g.display_order
+"""
+
+_FOOTERS_QUERY = """
+Select
+    group_id,
+    footer_phrase_en,
+    footer_phrase_kr
+From group_list
+"""
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.generation, self._count, self._index_at = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+
+    def _entry(self, position: int) -> Tuple[int, int, int, int]:
+        return _ENTRY.unpack_from(self._map, self._index_at + position * _ENTRY.size)
+
+    def get(self, namespace: str, key: int = 0) -> Any:
+        """The decoded record, or None when the snapshot has none."""
+        target = (_CODES[namespace], key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[:2] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self._count:
+            return None
+        code, entry_key, offset, length = self._entry(low)
+        if (code, entry_key) != target:
+            return None
+        return json.loads(self._map[offset:offset + length])
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def _rows(db, query: str) -> List[Dict[str, Any]]:
+    from sqlalchemy import text
+
+    return [dict(row._mapping) for row in db.execute(text(query))]
+
+
+def collect(db) -> Dict[Tuple[str, int], Any]:
+    """Every record of a snapshot, keyed by (namespace, key)."""
+    import helper_sql
+    import search_index
+
+    records: Dict[Tuple[str, int], Any] = {
+        ("group_list", 0): [dict(row._mapping) for row in db.execute(helper_sql.GROUP_LIST_QUERY)],
+    }
+    for row in _rows(db, _ITEMS_QUERY):
+        records.setdefault(("group_items", row.pop("group_id")), []).append(row)
+    for row in _rows(db, _FOOTERS_QUERY):
+        records[("group_footer", row.pop("group_id"))] = row
+    for row in _rows(db, helper_sql._WORD_DETAILS_SELECT + "Order By gi.group_id, gi.display_order"):
+        records.setdefault(("group_word_details", row["group_id"]), []).append(row)
+        # A word with several detail rows keeps the first one, as the per-item query does
+        records.setdefault(("word_details", row["item_id"]), row)
+    records[("group_sizes", 0)] = [list(row) for row in db.execute(helper_sql.GROUP_SIZES_QUERY)]
+
+    catalog: Dict[int, List] = {}
+    for row in db.execute(search_index.SEARCH_INDEX_QUERY):
+        catalog.setdefault(row[0], list(row))
+    records[("catalog_rows", 0)] = list(catalog.values())
+    return records
+
+
+def write(records: Dict[Tuple[str, int], Any], path: str = SNAPSHOT_PATH) -> int:
+    """Write a new generation next to `path` and rename it into place. Returns the generation."""
+    generation = time.time_ns()
+    index = []
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for (namespace, key), value in records.items():
+            data = json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+            index.append((_CODES[namespace], int(key), f.tell(), len(data)))
+            f.write(data)
+        index.sort()
+        index_at = f.tell()
+        for entry in index:
+            f.write(_ENTRY.pack(*entry))
+        f.seek(0)
+        f.write(_HEADER.pack(_MAGIC, generation, len(index), index_at))
+    os.replace(tmp_path, path)
+    return generation
+
+
+def build(path: str = SNAPSHOT_PATH) -> int:
+    """Snapshot the catalog from the database. Returns the new generation."""
+    from database import SessionLocal
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        records = collect(db)
+    finally:
+        db.close()
+    generation = write(records, path)
+    SNAPSHOT_BUILD_SECONDS.observe(time.perf_counter() - started)
+    return generation
+
+
+_snapshot: Optional[Snapshot] = None
+
+
+def _page(rows: List[Dict], cursor: str, fields: Tuple[str, ...], after: Optional[int],
+          limit: Optional[int]) -> List[Dict]:
+    """The projection and keyset page helper_sql would have selected."""
+    if after is not None:
+        rows = rows[bisect_right(rows, after, key=lambda row: row[cursor]):]
+    if limit is not None:
+        rows = rows[:limit]
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+def _group_list(fields=None, after=None, limit=None):
+    import helper_sql
+
+    rows = _snapshot.get("group_list") or []
+    return _page(rows, "group_id", fields or tuple(helper_sql.GROUP_LIST_FIELDS), after, limit)
+
+
+def _group_items(group_id, fields=None, after=None, limit=None):
+    import helper_sql
+
+    rows = _snapshot.get("group_items", group_id) or []
+    return _page(rows, "display_order", fields or tuple(helper_sql.GROUP_ITEM_FIELDS), after, limit)
+
+
+def _group_sizes():
+    return {group_id: count for group_id, count in _snapshot.get("group_sizes") or []}
+
+
+_SOURCES = {
+    "group_list": _group_list,
+    "group_items": _group_items,
+    "group_footer": lambda group_id: _snapshot.get("group_footer", group_id),
+    "word_details": lambda item_id: _snapshot.get("word_details", item_id),
+    "group_word_details": lambda group_id: _snapshot.get("group_word_details", group_id) or [],
+    "group_sizes": _group_sizes,
+}
+
+
+def is_active() -> bool:
+    return _snapshot is not None
+
+
+def generation() -> int:
+    return _snapshot.generation if _snapshot else 0
+
+
+def open_snapshot(path: str = SNAPSHOT_PATH) -> bool:
+    """Map the snapshot and serve catalog cache misses from it; False if there is none."""
+    global _snapshot
+    try:
+        snapshot = Snapshot(path)
+    except (OSError, ValueError) as exc:
+        print(f"catalog_snapshot: cannot map {path}, reading the catalog from the database: {exc}")
+        return False
+    # The previous map is not closed: lookups still running on it finish, and
+    # it is unmapped once they drop their reference
+    _snapshot = snapshot
+    for namespace, source in _SOURCES.items():
+        catalog_cache.set_source(namespace, source)
+    return True
+
+
+def reload(target: int, path: str = SNAPSHOT_PATH) -> bool:
+    """Remap unless generation `target` is already mapped. Returns True if it changed."""
+    if _snapshot is not None and _snapshot.generation == target:
+        return False
+    return open_snapshot(path)
+
+
+def catalog_rows() -> Optional[List[List]]:
+    """(item_id, group_id, spelling, meaning, definition) rows for the in-memory indexes."""
+    if _snapshot is None:
+        return None
+    return _snapshot.get("catalog_rows")
@@ -0,0 +1,155 @@
+"""
+Generate a synthetic catalog at any scale in the four-CSV layout that
+insert_csv_data.py (and bench/standin.py) load.
+
+    python data/generate_synthetic.py --groups 10000 --items-per-group 100 --output-dir /tmp/voka_1m
+
+Spellings are pronounceable pseudo-English, meanings and translations are built
+from common Hangul syllables and endings, and word lengths, sentence lengths and
+the share of words reused across groups follow the real Vocavoka_data.csv
+loosely. The same --seed always produces the same files.
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from process_csv import ITEMS_PER_GROUP
+
+ONSETS = ['b', 'c', 'd', 'f', 'g', 'h', 'l', 'm', 'n', 'p', 'r', 's', 't', 'v', 'w',
+          'br', 'cl', 'cr', 'dr', 'fl', 'gr', 'pl', 'pr', 'sh', 'sl', 'st', 'str', 'th', 'tr']
+NUCLEI = ['a', 'e', 'i', 'o', 'u', 'ea', 'ee', 'oo', 'ou', 'ai', 'io']
+CODAS = ['', '', 'd', 'l', 'm', 'n', 'r', 's', 't', 'ck', 'nd', 'nt', 'rk', 'st']
+SUFFIXES = ['', '', '', 'y', 'ous', 'ive', 'ent', 'ate', 'ion', 'ful', 'ness', 'ly', 'ize']
+
+HANGUL_SYLLABLES = list('가나다라마바사아자차카타파하고노도로모보소오조초코토포호구누두루무부수우'
+                        '주추쿠투푸후기니디리미비시이지치키티피히강경공관국근금기남능단대동명문민'
+                        '방변보사상생성세수순신실심안양연영욕용운원유은음의인일장전정조주중지진질'
+                        '창천청체충치탐통판평표풍학한함해행향험현형혜호화확환활회효후흥희')
+KR_ENDINGS = ['하다', '한', '스러운', '적인', '되다', '하게', '성', '감', '력', '']
+KR_PARTICLES = ['은', '는', '이', '가', '을', '를', '에서', '에게', '와', '로']
+KR_VERBS = ['했다', '였다', '보였다', '느꼈다', '말했다', '알려졌다', '필요하다', '중요하다']
+
+SUBJECTS = ['He', 'She', 'They', 'The manager', 'Our teacher', 'The report', 'My friend', 'The city']
+VERBS = ['was', 'seemed', 'became', 'remained', 'described it as', 'found it', 'called it']
+TAILS = ['during the meeting.', 'after the long winter.', 'in front of everyone.',
+         'without any warning.', 'for the first time.', 'at the end of the day.']
+FOOTER_EN = ['Bite off more than one can chew', 'Break the ice', 'Hit the books', 'Once in a blue moon',
+             'Under the weather', 'Burn the midnight oil', 'Call it a day', 'Cut corners']
+
+
+def spelling(rng, taken):
+    while True:
+        word = ''.join(rng.choice(ONSETS) + rng.choice(NUCLEI) + rng.choice(CODAS)
+                       for _ in range(rng.choice([1, 1, 2, 2, 3])))
+        word += rng.choice(SUFFIXES)
+        if 3 <= len(word) <= 14 and word not in taken:
+            taken.add(word)
+            return word
+
+
+def korean_word(rng, min_syllables=2, max_syllables=4):
+    stem = ''.join(rng.choice(HANGUL_SYLLABLES) for _ in range(rng.randint(min_syllables, max_syllables)))
+    return stem + rng.choice(KR_ENDINGS)
+
+
+def korean_sentence(rng, meaning):
+    words = [korean_word(rng, 1, 3) + rng.choice(KR_PARTICLES) for _ in range(rng.randint(2, 5))]
+    words.insert(rng.randrange(len(words) + 1), meaning)
+    return ' '.join(words) + ' ' + rng.choice(KR_VERBS) + '.'
+
+
+def word_row(rng, word_id, taken):
+    word = spelling(rng, taken)
+    meaning = korean_word(rng)
+    return {
+        'word_id': word_id,
+        'spelling': word,
+        'meaning': meaning,
+        'full_definition': ', '.join(korean_word(rng) for _ in range(rng.randint(1, 3))),
+        'example_sentence': f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {word} {rng.choice(TAILS)}",
+        'example_translation': korean_sentence(rng, meaning),
+        'mnemonic_tip': f"  '{word.capitalize()}' = {word[:3]}... ({korean_word(rng)} {korean_word(rng, 1, 2)})",
+    }
+
+
+def generate(output_dir, groups, items_per_group, reuse=0.4, seed=42):
+    """Write groups/words/group_items/word_details CSVs; returns the row counts."""
+    if items_per_group >= ITEMS_PER_GROUP:
+        raise ValueError(f"items_per_group must be below {ITEMS_PER_GROUP} (stable item id scheme)")
+
+    rng = random.Random(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    taken = set()
+    words = []
+    counts = {'groups': 0, 'words': 0, 'group_items': 0}
+
+    paths = {name: os.path.join(output_dir, f'{name}.csv')
+             for name in ('groups', 'words', 'group_items', 'word_details')}
+    with open(paths['groups'], mode='w', encoding='utf-8', newline='') as groups_f, \
+            open(paths['words'], mode='w', encoding='utf-8', newline='') as words_f, \
+            open(paths['group_items'], mode='w', encoding='utf-8', newline='') as items_f, \
+            open(paths['word_details'], mode='w', encoding='utf-8', newline='') as details_f:
+        groups_writer = csv.writer(groups_f)
+        words_writer = csv.writer(words_f)
+        items_writer = csv.writer(items_f)
+        details_writer = csv.writer(details_f)
+        groups_writer.writerow(['group_id', 'group_number', 'title_kr', 'footer_phrase_en', 'footer_phrase_kr'])
+        words_writer.writerow(['word_id', 'spelling'])
+        items_writer.writerow(['item_id', 'group_id', 'word_id', 'display_order', 'summary_meaning', 'display_letter'])
+        details_writer.writerow(['detail_id', 'word_id', 'full_definition', 'example_sentence',
+                                 'example_translation', 'mnemonic_tip'])
+
+        for group_id in range(1, groups + 1):
+            groups_writer.writerow([group_id, group_id, f"{korean_word(rng)} / {korean_word(rng)}",
+                                    rng.choice(FOOTER_EN), korean_sentence(rng, korean_word(rng))])
+            counts['groups'] += 1
+
+            used = set()
+            for order in range(1, items_per_group + 1):
+                # Shared vocabulary: some items point at a word another group already has
+                word = None
+                if words and rng.random() < reuse:
+                    candidate = rng.choice(words)
+                    if candidate['word_id'] not in used:
+                        word = candidate
+                if word is None:
+                    word = word_row(rng, len(words) + 1, taken)
+                    words.append(word)
+                    words_writer.writerow([word['word_id'], word['spelling']])
+                    details_writer.writerow([word['word_id'], word['word_id'], word['full_definition'],
+                                             word['example_sentence'], word['example_translation'],
+                                             word['mnemonic_tip']])
+                    counts['words'] += 1
+                used.add(word['word_id'])
+                items_writer.writerow([group_id * ITEMS_PER_GROUP + order, group_id, word['word_id'], order,
+                                       word['meaning'], word['spelling'][0]])
+                counts['group_items'] += 1
+    counts['word_details'] = counts['words']
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic vocabulary catalog as CSVs.")
+    parser.add_argument('--groups', type=int, default=10000)
+    parser.add_argument('--items-per-group', type=int, default=100)
+    parser.add_argument('--reuse', type=float, default=0.4,
+                        help='Probability that an item reuses a word from an earlier group.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', required=True,
+                        help='Directory for the CSVs (do not point it at app/data unless you mean to replace them).')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(args.output_dir, args.groups, args.items_per_group, args.reuse, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {counts['groups']} groups, {counts['words']} words, {counts['group_items']} items "
+          f"to {args.output_dir} in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
+import argparse
 import csv
+import glob
+import json
+import itertools
 import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 def process_csv():
     # Input file
@@ -116,5 +122,181 @@ def process_csv():
 
     print("Success! Created 4 separate CSV files.")
 
+# --- Pipeline mode: many group source files -> the same four normalized CSVs ---
+
+# item_id = group_id * ITEMS_PER_GROUP + display_order keeps item ids stable across runs
+ITEMS_PER_GROUP = 1000
+
+SOURCE_FIELDS = ['spelling', 'summary_meaning', 'display_letter', 'full_definition',
+                 'example_sentence', 'example_translation', 'mnemonic_tip']
+
+
+def resolve_sources(pattern):
+    """A directory means every *.csv in it; anything else is treated as a glob."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.csv')
+    return sorted(glob.glob(pattern))
+
+
+def source_key(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def iter_source_rows(path):
+    """Yield one tuple per vocabulary row, in file order, without buffering the file."""
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            spelling = (row.get('spelling') or '').strip()
+            if not spelling:
+                continue
+            yield tuple([spelling] + [row.get(field, '') for field in SOURCE_FIELDS[1:]])
+
+
+def parse_source(path):
+    """
+    Process-pool worker: parse one group file into its rows. A group holds
+    fewer than ITEMS_PER_GROUP rows, so reading stops there and an oversized
+    file is rejected without being read to the end; every result is one
+    bounded chunk.
+    """
+    rows = list(itertools.islice(iter_source_rows(path), ITEMS_PER_GROUP))
+    if len(rows) >= ITEMS_PER_GROUP:
+        raise ValueError(f"{path} has {ITEMS_PER_GROUP} or more rows; at most {ITEMS_PER_GROUP - 1} fit a group")
+    return path, rows
+
+
+def parse_in_order(pool, sources, window):
+    """
+    Parsed sources in submission order, like pool.map, but with at most
+    `window` files submitted ahead, so parsed groups never pile up in memory
+    while the parent writes.
+    """
+    pending = deque()
+    for path in sources:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(parse_source, path))
+    while pending:
+        yield pending.popleft().result()
+
+
+def load_index(path):
+    """Persistent spelling -> word_id and source -> group_id assignments."""
+    if path and os.path.exists(path):
+        with open(path, mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'words': {}, 'groups': {}, 'next_word_id': 1, 'next_group_id': 1}
+
+
+def save_index(path, index):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode='w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path):
+    """Optional group metadata keyed by source file name (without .csv)."""
+    if not path:
+        return {}
+    with open(path, mode='r', encoding='utf-8', newline='') as f:
+        return {row['source']: row for row in csv.DictReader(f)}
+
+
+def process_sources(pattern, output_dir, index_path, manifest_path=None, workers=None):
+    sources = resolve_sources(pattern)
+    if not sources:
+        print(f"No source CSVs matched {pattern}.")
+        return
+
+    index = load_index(index_path)
+    manifest = load_manifest(manifest_path)
+
+    # Assign group ids up front in sorted order so they do not depend on worker timing
+    for path in sources:
+        key = source_key(path)
+        if key not in index['groups']:
+            index['groups'][key] = index['next_group_id']
+            index['next_group_id'] += 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {
+        name: open(os.path.join(output_dir, name), mode='w', encoding='utf-8', newline='')
+        for name in ('groups.csv', 'words.csv', 'group_items.csv', 'word_details.csv')
+    }
+    try:
+        groups_writer = csv.writer(outputs['groups.csv'])
+        words_writer = csv.writer(outputs['words.csv'])
+        items_writer = csv.writer(outputs['group_items.csv'])
+        details_writer = csv.writer(outputs['word_details.csv'])
+        groups_writer.writerow(['group_id', 'group_number', 'title_kr', 'footer_phrase_en', 'footer_phrase_kr'])
+        words_writer.writerow(['word_id', 'spelling'])
+        items_writer.writerow(['item_id', 'group_id', 'word_id', 'display_order', 'summary_meaning', 'display_letter'])
+        details_writer.writerow(['detail_id', 'word_id', 'full_definition', 'example_sentence', 'example_translation', 'mnemonic_tip'])
+
+        written_words = set()
+        total_items = 0
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Results come back in submission order, so output and ids are deterministic
+            for path, rows in parse_in_order(pool, sources, 2 * workers):
+                key = source_key(path)
+                group_id = index['groups'][key]
+
+                meta = manifest.get(key, {})
+                groups_writer.writerow([
+                    group_id,
+                    meta.get('group_number') or group_id,
+                    meta.get('title_kr') or key,
+                    meta.get('footer_phrase_en', ''),
+                    meta.get('footer_phrase_kr', ''),
+                ])
+
+                for order, (spelling, summary, letter, definition, sentence, translation, tip) in enumerate(rows, 1):
+                    spelling_key = spelling.lower()
+                    word_id = index['words'].get(spelling_key)
+                    if word_id is None:
+                        word_id = index['words'][spelling_key] = index['next_word_id']
+                        index['next_word_id'] += 1
+
+                    if word_id not in written_words:
+                        # One detail row per word; the first occurrence in this run wins
+                        written_words.add(word_id)
+                        words_writer.writerow([word_id, spelling])
+                        details_writer.writerow([word_id, word_id, definition, sentence, translation, tip])
+
+                    items_writer.writerow([group_id * ITEMS_PER_GROUP + order, group_id, word_id, order, summary, letter])
+
+                total_items += len(rows)
+                print(f"{key}: group {group_id}, {len(rows)} items")
+    finally:
+        for f in outputs.values():
+            f.close()
+
+    save_index(index_path, index)
+    print(f"Success! {len(sources)} groups, {len(written_words)} words, {total_items} items written to {output_dir}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Normalize vocabulary source CSVs into groups/words/group_items/word_details CSVs. "
+                    "Without --sources, converts Vocavoka_data.csv as a single group."
+    )
+    parser.add_argument('--sources', help='Directory or glob of group source CSVs (one group per file).')
+    parser.add_argument('--output-dir', default=os.path.dirname(os.path.abspath(__file__)))
+    parser.add_argument('--index', default=None,
+                        help='Persistent id index (default: <output-dir>/id_index.json).')
+    parser.add_argument('--manifest', help='CSV with source,group_number,title_kr,footer_phrase_en,footer_phrase_kr.')
+    parser.add_argument('--workers', type=int, default=None, help='Process pool size (default: CPU count).')
+    args = parser.parse_args()
+
+    if not args.sources:
+        process_csv()
+        return
+
+    index_path = args.index or os.path.join(args.output_dir, 'id_index.json')
+    process_sources(args.sources, args.output_dir, index_path, args.manifest, args.workers)
+
+
 if __name__ == "__main__":
-    process_csv()
+    main()
@@ -1,21 +1,154 @@
 import os
+import threading
+import time
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 
+import metrics
+from instrumentation import instrument_engine
+
 
 # Load variables from .env
 load_dotenv()
 
-# Get the database URL from environment
-DATABASE_URL = f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_ROOT_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}"
+# Get the database URL from environment (DATABASE_URL overrides the MySQL parts,
+# e.g. a SQLite file for local load tests)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"mysql+pymysql://{os.getenv('MYSQL_USER')}:{os.getenv('MYSQL_ROOT_PASSWORD')}@{os.getenv('MYSQL_HOST')}:{os.getenv('MYSQL_PORT')}/{os.getenv('MYSQL_DATABASE')}"
 
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL is not set in the .env file")
 
-# SQLAlchemy engine and session setup
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async driver URL, derived from the sync one unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace(
+    "mysql+pymysql://", "mysql+aiomysql://", 1
+)
+
+# Serve the catalog/quiz routes from async handlers over the async engine
+USE_ASYNC_DB = os.getenv("USE_ASYNC_DB", "false").lower() in ("1", "true", "yes")
+
+# Connection pool sizing; size for (workers x threadpool) rather than defaults
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+POOL_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+POOL_CHECKOUT_WAIT = metrics.Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (including new connects).",
+    ("engine",),
+)
+POOL_CHECKOUT_TIMEOUTS = metrics.Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT seconds.",
+    ("engine",),
+)
+
+
+class _InstrumentedPoolMixin:
+    """Time every checkout from the queue so pool waits show up in /metrics."""
+
+    metrics_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.inc(engine=self.metrics_label)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, engine=self.metrics_label)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+
+def _pool_options(url: str, poolclass) -> dict:
+    # SQLite stand-ins keep SQLAlchemy's default pooling
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": POOL_SIZE,
+        "max_overflow": POOL_MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
+
+def _register_pool_gauges(label: str, get_engine) -> None:
+    def pool_value(read):
+        def value():
+            engine = get_engine()
+            pool = engine.pool if engine is not None else None
+            return float(read(pool)) if isinstance(pool, QueuePool) else 0.0
+        return value
+
+    def saturation(pool):
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        return pool.checkedout() / capacity if capacity else 0.0
+
+    metrics.Gauge(f"db_pool_{label}_size", "Configured persistent pool size.",
+                  fn=pool_value(lambda pool: pool.size()))
+    metrics.Gauge(f"db_pool_{label}_checked_out", "Connections currently checked out.",
+                  fn=pool_value(lambda pool: pool.checkedout()))
+    metrics.Gauge(f"db_pool_{label}_overflow", "Overflow connections currently open.",
+                  fn=pool_value(lambda pool: max(pool.overflow(), 0)))
+    metrics.Gauge(f"db_pool_{label}_saturation", "checked_out / (pool_size + max_overflow).",
+                  fn=pool_value(saturation))
+
+
+_register_pool_gauges("sync", lambda: globals().get("engine"))
+if USE_ASYNC_DB:
+    _register_pool_gauges("async", lambda: getattr(globals().get("async_engine"), "sync_engine", None))
+
+
+def _create_engines() -> None:
+    """SQLAlchemy engine and session setup, once, on first use (see __getattr__)."""
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
+    sync_engine = create_engine(DATABASE_URL, **_pool_options(DATABASE_URL, InstrumentedQueuePool))
+    instrument_engine(sync_engine, "sync")
+
+    async_engine = None
+    AsyncSessionLocal = None
+    if USE_ASYNC_DB:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, **_pool_options(ASYNC_DATABASE_URL, InstrumentedAsyncQueuePool)
+        )
+        AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+        instrument_engine(async_engine.sync_engine, "async")
+
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
+    # Assigned last: its presence marks the setup as complete
+    engine = sync_engine
+
+
+_ENGINE_ATTRIBUTES = ("engine", "SessionLocal", "async_engine", "AsyncSessionLocal")
+_engine_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    # Engines are created when first used, not at import, so importing the app
+    # (tests, tooling, worker boot) neither loads the driver nor needs a database
+    if name not in _ENGINE_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _engine_lock:
+        if "engine" not in globals():
+            _create_engines()
+    return globals()[name]
+
 
 # Base class for ORM models
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
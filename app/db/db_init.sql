@@ -44,7 +44,9 @@ CREATE TABLE group_items (
     summary_meaning VARCHAR(100), -- Short meaning shown on the card (e.g., "탐욕스러운")
     display_letter CHAR(1), -- The big letter shown above meaning (e.g., "V")
     FOREIGN KEY (group_id) REFERENCES group_list (group_id),
-    FOREIGN KEY (word_id) REFERENCES words (word_id)
+    FOREIGN KEY (word_id) REFERENCES words (word_id),
+    -- Covering index for "Where group_id = ? Order By display_order" (see db/migrations)
+    INDEX ix_group_items_group_order (group_id, display_order, word_id, summary_meaning, display_letter)
 );
 
 -- 4. WORD_DETAILS TABLE (The Popup)
@@ -58,5 +60,34 @@ CREATE TABLE word_details (
     example_sentence TEXT, -- English example
     example_translation TEXT, -- Korean translation of example
     mnemonic_tip TEXT, -- The memory aid/tip
-    FOREIGN KEY (word_id) REFERENCES words (word_id)
-);
\ No newline at end of file
+    FOREIGN KEY (word_id) REFERENCES words (word_id),
+    INDEX ix_word_details_word (word_id)
+);
+
+-- 5. QUIZ_ATTEMPTS TABLE
+-- One row per /quiz/submit, appended in batches by attempt_log.py.
+drop table if exists quiz_attempts;
+
+CREATE TABLE quiz_attempts (
+    attempt_id INTEGER PRIMARY KEY AUTO_INCREMENT,
+    user_id INTEGER NOT NULL,
+    group_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    user_answer VARCHAR(100) NOT NULL,
+    is_correct BOOLEAN NOT NULL,
+    answered_at DATETIME NOT NULL,
+    recorded_at DATETIME NOT NULL, -- when the server logged it; later than answered_at for /quiz/sync
+    INDEX ix_quiz_attempts_user_group (user_id, group_id, answered_at)
+);
+
+-- 6. QUIZ_SYNCS TABLE
+-- One row per POST /quiz/sync upload id, so a retried upload is not recorded
+-- twice. Never pruned (see db/migrations/003_quiz_syncs.sql).
+drop table if exists quiz_syncs;
+
+CREATE TABLE quiz_syncs (
+    user_id INTEGER NOT NULL,
+    sync_id VARCHAR(64) NOT NULL,
+    received_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, sync_id)
+);
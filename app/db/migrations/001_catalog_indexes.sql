@@ -0,0 +1,23 @@
+-- Indexes matched to the helper_sql hot queries.
+-- Apply once to an existing database created from an older db_init.sql:
+--     mysql -u root -p voka < db/migrations/001_catalog_indexes.sql
+-- (db_init.sql already includes them for new installs.)
+
+-- GROUP_ITEMS_QUERY / GROUP_WORD_DETAILS_QUERY:
+--   Where group_id = ? Order By display_order
+-- Equality on group_id then display_order gives rows already sorted (no filesort),
+-- and the trailing columns make it covering for GROUP_ITEMS_QUERY (InnoDB appends
+-- the item_id primary key to every secondary index). It also serves the
+-- group_id foreign key, so MySQL drops the implicit FK index.
+CREATE INDEX ix_group_items_group_order
+    ON group_items (group_id, display_order, word_id, summary_meaning, display_letter);
+
+-- WORD_DETAILS_QUERY / GROUP_WORD_DETAILS_QUERY: Join word_details On word_id.
+-- The detail columns are TEXT and cannot be part of an index, so this is a plain
+-- lookup index (it replaces the implicit FK index under a stable name).
+CREATE INDEX ix_word_details_word
+    ON word_details (word_id);
+
+-- QUIZ_ITEM_QUERY: Where item_id = ? And group_id = ?
+-- item_id is the primary key, so this is already a single-row clustered lookup;
+-- a (item_id, group_id) secondary index would never be chosen and is not added.
@@ -0,0 +1,14 @@
+-- Quiz attempts written in batches by attempt_log.py.
+-- No foreign keys: rows are appended from a background buffer and must not fail
+-- (or take locks on the catalog) if an item is re-imported in the meantime.
+CREATE TABLE IF NOT EXISTS quiz_attempts (
+    attempt_id INTEGER PRIMARY KEY AUTO_INCREMENT,
+    user_id INTEGER NOT NULL,
+    group_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    user_answer VARCHAR(100) NOT NULL,
+    is_correct BOOLEAN NOT NULL,
+    answered_at DATETIME NOT NULL,
+    -- Per-user history of a group, oldest first
+    INDEX ix_quiz_attempts_user_group (user_id, group_id, answered_at)
+);
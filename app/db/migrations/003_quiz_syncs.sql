@@ -0,0 +1,15 @@
+-- Upload ids of POST /quiz/sync, claimed before an offline upload is recorded
+-- so a retried upload is graded but not recorded twice.
+-- Apply once to an existing database created from an older db_init.sql:
+--     mysql -u root -p voka < db/migrations/003_quiz_syncs.sql
+-- (db_init.sql already includes it for new installs.)
+--
+-- Nothing prunes this table: one small row per upload. To bound it, delete
+-- rows older than any retry a client could still send, e.g.
+--     DELETE FROM quiz_syncs WHERE received_at < NOW() - INTERVAL 90 DAY;
+CREATE TABLE IF NOT EXISTS quiz_syncs (
+    user_id INTEGER NOT NULL,
+    sync_id VARCHAR(64) NOT NULL,
+    received_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, sync_id)
+);
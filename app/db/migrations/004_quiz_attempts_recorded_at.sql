@@ -0,0 +1,10 @@
+-- When the server logged each attempt. srs and progress replay the rows
+-- recorded before they started and take later ones live; answered_at cannot
+-- mark that boundary because /quiz/sync records backdated attempts.
+-- Apply once to an existing database created from an older db_init.sql:
+--     mysql -u root -p voka < db/migrations/004_quiz_attempts_recorded_at.sql
+-- (db_init.sql already includes it for new installs.)
+ALTER TABLE quiz_attempts ADD COLUMN recorded_at DATETIME NULL;
+-- Older rows get their answered_at: exact except for attempts synced offline
+UPDATE quiz_attempts SET recorded_at = answered_at WHERE recorded_at IS NULL;
+ALTER TABLE quiz_attempts MODIFY recorded_at DATETIME NOT NULL;
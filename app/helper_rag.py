@@ -1,25 +1,207 @@
+import asyncio
+import hashlib
+import inspect
 import os
-from typing import Dict, Any
+import random
+import re
+import threading
+import time
+from functools import wraps
+from typing import Dict, Any, AsyncIterator, Iterator, List, Optional
 
-import ollama
+import metrics
 
 _MODEL_NAME = os.getenv("OLLAMA_MODEL", "llama3")
 
+# "fake" swaps Ollama for a local stand-in (load tests, scheduler checks)
+_BACKEND = os.getenv("HINT_BACKEND", "ollama").lower()
+_FAKE_LATENCY = float(os.getenv("FAKE_HINT_LATENCY_MS", "500")) / 1000
+
+# Async backend resilience settings
+_OLLAMA_HOST = os.getenv("OLLAMA_HOST") or os.getenv("Ollama_HOST")
+_TIMEOUT = float(os.getenv("HINT_TIMEOUT_SECONDS", "20"))
+_MAX_RETRIES = int(os.getenv("HINT_MAX_RETRIES", "2"))
+_RETRY_BASE_DELAY = float(os.getenv("HINT_RETRY_BASE_DELAY", "0.5"))
+_BREAKER_FAILURES = int(os.getenv("HINT_BREAKER_FAILURES", "5"))
+_BREAKER_RESET = float(os.getenv("HINT_BREAKER_RESET_SECONDS", "30"))
+
 
 class HintGenerationError(Exception):
     """Raised when the hint generation pipeline fails."""
 
 
-def _build_prompt(word_context: Dict[str, Any]) -> str:
-    """Craft an instruction prompt for the LLM using available context."""
-    spelling = word_context.get("spelling", "")
-    summary = word_context.get("summary_meaning", "")
-    definition = word_context.get("full_definition", "")
-    example_sentence = word_context.get("example_sentence", "")
-    example_translation = word_context.get("example_translation", "")
-    mnemonic_tip = word_context.get("mnemonic_tip", "")
-
-    return f"""
+class ModelUnavailableError(HintGenerationError):
+    """Raised when the model is timing out/failing or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker. After `threshold` failures it opens for
+    `reset_timeout` seconds, then lets a single probe call through (half-open);
+    the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, threshold: int = _BREAKER_FAILURES, reset_timeout: float = _BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Give back a probe slot whose call ended without an outcome (cancelled)."""
+        with self._lock:
+            self._probing = False
+
+
+breaker = CircuitBreaker()
+_async_client = None
+
+LLM_REQUEST_SECONDS = metrics.Histogram(
+    "llm_request_duration_seconds",
+    "Hint generation time (retries and streaming included) by outcome.",
+    ("model", "mode", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0),
+)
+LLM_TOKENS = metrics.Counter("llm_tokens_total", "Tokens reported by the model.", ("model", "kind"))
+LLM_TOKENS_PER_SECOND = metrics.Histogram(
+    "llm_generation_tokens_per_second",
+    "Completion tokens per second of model evaluation time.",
+    ("model",),
+    buckets=(1, 2.5, 5, 10, 20, 40, 80, 160),
+)
+
+
+def _record_usage(response) -> None:
+    """Token counts Ollama reports on a full response or the final stream chunk."""
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    completion_tokens = response.get("eval_count") or 0
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, model=_MODEL_NAME, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, model=_MODEL_NAME, kind="completion")
+        eval_ns = response.get("eval_duration") or 0
+        if eval_ns:
+            LLM_TOKENS_PER_SECOND.observe(completion_tokens / (eval_ns / 1e9), model=_MODEL_NAME)
+
+
+def _metered(chunks):
+    for chunk in chunks:
+        if chunk.get("done"):
+            _record_usage(chunk)
+        yield chunk
+
+
+async def _ametered(chunks):
+    async for chunk in chunks:
+        if chunk.get("done"):
+            _record_usage(chunk)
+        yield chunk
+
+
+def _outcome(exc: Optional[BaseException]) -> str:
+    if exc is None:
+        return "ok"
+    if isinstance(exc, ModelUnavailableError):
+        return "unavailable"
+    if isinstance(exc, (GeneratorExit, asyncio.CancelledError)):
+        return "cancelled"
+    return "error"
+
+
+def _observed(mode: str):
+    """Record LLM_REQUEST_SECONDS around a hint function, plain, async or (async) generator."""
+    def observe(started: float, exc: Optional[BaseException] = None) -> None:
+        LLM_REQUEST_SECONDS.observe(time.perf_counter() - started, model=_MODEL_NAME, mode=mode,
+                                    outcome=_outcome(exc))
+
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            @wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                except BaseException as exc:
+                    observe(started, exc)
+                    raise
+                observe(started)
+            return async_gen_wrapper
+
+        if inspect.isgeneratorfunction(func):
+            @wraps(func)
+            def gen_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    yield from func(*args, **kwargs)
+                except BaseException as exc:
+                    observe(started, exc)
+                    raise
+                observe(started)
+            return gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as exc:
+                    observe(started, exc)
+                    raise
+                observe(started)
+                return result
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as exc:
+                observe(started, exc)
+                raise
+            observe(started)
+            return result
+        return wrapper
+
+    return decorator
+
+
+_PROMPT_TEMPLATE = """
 You are a helpful bilingual vocabulary tutor. The student only saw the Korean meaning
 and wants an English hint to recall the word. Provide ONE short, encouraging hint
 in Korean that nudges them toward the answer WITHOUT REVEALING THE SPELLING.
@@ -32,13 +214,142 @@ Word data (do not reveal directly):
 - Example translation: {example_translation}
 - Mnemonic tip: {mnemonic_tip}
 
+Related words the student may confuse it with or associate it to (context only):
+{related}
+
 Constraints:
 - Output must be under 50 Korean characters if possible.
 - Do not mention the exact English spelling.
 - Focus on imagery, situations, or root meanings to jog memory.
 """
 
+# Cached hints are keyed on this, so editing the template retires old entries.
+PROMPT_VERSION = hashlib.sha256(_PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+
+def model_name() -> str:
+    return _MODEL_NAME
+
+
+def _related_section(word_context: Dict[str, Any]) -> str:
+    try:
+        # numpy-backed; imported on the first hint rather than at app import
+        import rag_index
+
+        related = rag_index.related_words(word_context)
+    except Exception:
+        # Retrieval only enriches the prompt; never fail a hint over it
+        related = []
+    if not related:
+        return "- (none)"
+    return "\n".join(f"- {r['spelling']}: {r['summary_meaning']}" for r in related)
+
+
+def _build_prompt(word_context: Dict[str, Any]) -> str:
+    """Craft an instruction prompt for the LLM from the word and its related words."""
+    return _PROMPT_TEMPLATE.format(
+        related=_related_section(word_context),
+        spelling=word_context.get("spelling", ""),
+        summary=word_context.get("summary_meaning", ""),
+        definition=word_context.get("full_definition", ""),
+        example_sentence=word_context.get("example_sentence", ""),
+        example_translation=word_context.get("example_translation", ""),
+        mnemonic_tip=word_context.get("mnemonic_tip", ""),
+    )
+
+
+def _fake_reply(model: str, messages) -> List[Dict[str, Any]]:
+    """
+    The canned hint as Ollama-shaped stream chunks, the last carrying the usage
+    fields. Callers add the latency: time.sleep for sync, asyncio.sleep for async.
+    """
+    text = "힌트: 이 단어를 떠올려 보세요. " + messages[-1]["content"][-40:].strip()
+    # Rough token counts in the fields Ollama reports them in
+    usage = {
+        "done": True,
+        "prompt_eval_count": len(messages[-1]["content"]) // 4,
+        "eval_count": len(text) // 4,
+        "eval_duration": int(_FAKE_LATENCY * 1e9),
+    }
+    pieces = [text[i:i + 8] for i in range(0, len(text), 8)]
+    return [
+        *({"model": model, "message": {"role": "assistant", "content": piece}, "done": False} for piece in pieces),
+        {"model": model, "message": {"role": "assistant", "content": ""}, **usage},
+    ]
+
+
+def _joined(chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
+    text = "".join(chunk["message"]["content"] for chunk in chunks)
+    return {**chunks[-1], "message": {"role": "assistant", "content": text}}
+
+
+def _fake_chat(model: str, messages, stream: bool = False):
+    """Ollama-shaped stand-in that sleeps like a model and echoes a canned hint."""
+    chunks = _fake_reply(model, messages)
+    if not stream:
+        time.sleep(_FAKE_LATENCY)
+        return _joined(chunks)
+
+    def stream_chunks():
+        for chunk in chunks:
+            if not chunk["done"]:
+                time.sleep(_FAKE_LATENCY / (len(chunks) - 1))
+            yield chunk
+    return stream_chunks()
+
+
+async def _fake_achat(model: str, messages, stream: bool = False):
+    """_fake_chat for the event loop: waits with asyncio.sleep only."""
+    chunks = _fake_reply(model, messages)
+    if not stream:
+        await asyncio.sleep(_FAKE_LATENCY)
+        return _joined(chunks)
+
+    async def stream_chunks():
+        for chunk in chunks:
+            if not chunk["done"]:
+                await asyncio.sleep(_FAKE_LATENCY / (len(chunks) - 1))
+            yield chunk
+    return stream_chunks()
+
+
+def _get_async_client():
+    """One shared ollama.AsyncClient (and its connection pool) per process."""
+    global _async_client
+    if _async_client is None:
+        # Imported on first use: the client and its HTTP stack are slow to
+        # import and not needed with HINT_BACKEND=fake
+        import ollama
+
+        _async_client = ollama.AsyncClient(host=_OLLAMA_HOST) if _OLLAMA_HOST else ollama.AsyncClient()
+    return _async_client
+
+
+async def _achat(**kwargs):
+    if _BACKEND == "fake":
+        response = await _fake_achat(**kwargs)
+    else:
+        response = await _get_async_client().chat(**kwargs)
+    if kwargs.get("stream"):
+        return _ametered(response)
+    _record_usage(response)
+    return response
+
+
+def _chat(**kwargs):
+    if _BACKEND == "fake":
+        response = _fake_chat(**kwargs)
+    else:
+        import ollama
+
+        response = ollama.chat(**kwargs)
+    if kwargs.get("stream"):
+        return _metered(response)
+    _record_usage(response)
+    return response
 
+
+@_observed("generate")
 def generate_hint(word_context: Dict[str, Any]) -> str:
     """Create an AI-generated hint using Ollama + the supplied RAG context."""
     if not word_context:
@@ -47,7 +358,7 @@ def generate_hint(word_context: Dict[str, Any]) -> str:
     prompt = _build_prompt(word_context)
 
     try:
-        response = ollama.chat(
+        response = _chat(
             model=_MODEL_NAME,
             messages=[
                 {
@@ -67,3 +378,146 @@ def generate_hint(word_context: Dict[str, Any]) -> str:
         raise HintGenerationError("Ollama API returned an empty response.")
 
     return text.strip()
+
+
+@_observed("stream")
+def stream_hint(word_context: Dict[str, Any]) -> Iterator[str]:
+    """Yield hint text fragments as Ollama produces them (stream=True)."""
+    if not word_context:
+        raise HintGenerationError("word_context is required for hint generation.")
+
+    prompt = _build_prompt(word_context)
+
+    try:
+        stream = _chat(
+            model=_MODEL_NAME,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                },
+            ],
+            stream=True,
+        )
+        produced = False
+        for chunk in stream:
+            text = chunk.get("message", {}).get("content", "")
+            if text:
+                produced = True
+                yield text
+    except Exception as exc:
+        raise HintGenerationError(f"Ollama API error: {exc}") from exc
+
+    if not produced:
+        raise HintGenerationError("Ollama API returned an empty response.")
+
+
+def fallback_hint(word_context: Dict[str, Any]) -> str:
+    """Model-free hint from the stored mnemonic tip or example translation."""
+    spelling = (word_context.get("spelling") or "").strip()
+    for field in ("mnemonic_tip", "example_translation"):
+        text = (word_context.get(field) or "").strip()
+        if not text:
+            continue
+        if spelling:
+            text = re.sub(re.escape(spelling), "_" * len(spelling), text, flags=re.IGNORECASE)
+        return text
+    raise HintGenerationError("No stored context available for a fallback hint.")
+
+
+async def _retrying(call):
+    """Run call() with per-attempt timeouts, jittered retries and the breaker."""
+    last_error: Optional[Exception] = None
+    for attempt in range(_MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise ModelUnavailableError("Hint model unavailable (circuit open).")
+        try:
+            result = await asyncio.wait_for(call(), timeout=_TIMEOUT)
+        except Exception as exc:
+            breaker.record_failure()
+            last_error = exc
+            if attempt < _MAX_RETRIES:
+                # Full jitter keeps a class of retries from arriving in lockstep
+                await asyncio.sleep(random.uniform(0, _RETRY_BASE_DELAY * (2 ** attempt)))
+            continue
+        except BaseException:
+            # Cancelled, e.g. an SSE client left mid-probe: no outcome, but the
+            # half-open slot must be freed or the breaker never closes again
+            breaker.release()
+            raise
+        breaker.record_success()
+        return result
+    raise ModelUnavailableError(f"Ollama API error: {last_error}") from last_error
+
+
+@_observed("generate")
+async def agenerate_hint(word_context: Dict[str, Any]) -> str:
+    """Async generate_hint over the shared AsyncClient with timeouts, retries and a breaker."""
+    if not word_context:
+        raise HintGenerationError("word_context is required for hint generation.")
+
+    # Retrieval is a matrix-vector product; keep it off the event loop
+    prompt = await asyncio.to_thread(_build_prompt, word_context)
+
+    async def call():
+        response = await _achat(
+            model=_MODEL_NAME,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                },
+            ],
+        )
+        text = response.get("message", {}).get("content", "")
+        if not text:
+            raise HintGenerationError("Ollama API returned an empty response.")
+        return text.strip()
+
+    return await _retrying(call)
+
+
+@_observed("stream")
+async def astream_hint(word_context: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Async stream_hint. Opening the stream and waiting for the first fragment go
+    through the retry/breaker path; once text has been sent a failure is final.
+    """
+    if not word_context:
+        raise HintGenerationError("word_context is required for hint generation.")
+
+    prompt = await asyncio.to_thread(_build_prompt, word_context)
+
+    async def open_stream():
+        stream = await _achat(
+            model=_MODEL_NAME,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt,
+                },
+            ],
+            stream=True,
+        )
+        iterator = stream.__aiter__()
+        while True:
+            try:
+                chunk = await iterator.__anext__()
+            except StopAsyncIteration:
+                raise HintGenerationError("Ollama API returned an empty response.") from None
+            first = chunk.get("message", {}).get("content", "")
+            if first:
+                return first, iterator
+
+    first, iterator = await _retrying(open_stream)
+    yield first
+    try:
+        while True:
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout=_TIMEOUT)
+            text = chunk.get("message", {}).get("content", "")
+            if text:
+                yield text
+    except StopAsyncIteration:
+        return
+    except Exception as exc:
+        raise HintGenerationError(f"Ollama API error: {exc}") from exc
@@ -1,124 +1,311 @@
-from database import SessionLocal
+from catalog_cache import cached
+import answer_index
+from functools import lru_cache
+from datetime import datetime, timezone
 from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import TextClause
 from decimal import Decimal
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 
-def get_group_list():
-    db = SessionLocal()
-    try:
-        query = text("""
-        Select 
-            group_id, 
-            group_number, 
-            title_kr 
-        From group_list
-        """)
-        result = db.execute(query).fetchall()
-        return [dict(row._mapping) for row in result]
-    finally:
-        db.close()
-
-def get_group_items(group_id: int):
-    db = SessionLocal()
-    try:
-        query = text("""
-        Select 
-            g.item_id, 
-            g.display_order, 
-            g.summary_meaning, 
-            g.display_letter, 
-            w.spelling
-        From group_items g
-        Join words w On g.word_id = w.word_id
-        Where g.group_id = :group_id
-        """)
-        result = db.execute(query, {"group_id": group_id}).fetchall()
-        return [dict(row._mapping) for row in result]
-    finally:
-        db.close() 
-
-def get_group_footer(group_id: int):
-    db = SessionLocal()
-    try:
-        query = text("""
-        Select 
-            footer_phrase_en, 
-            footer_phrase_kr 
-        From group_list
-        Where group_id = :group_id
-        """)
-        result = db.execute(query, {"group_id": group_id}).fetchone()
-        return dict(result._mapping) if result else None
-    finally:
-        db.close()
-
-def get_word_details(item_id: int):
-    db = SessionLocal()
+# Columns a listing may be narrowed to with ?fields=, mapped to their SELECT
+# expression. Dict order is the column order of every projection.
+GROUP_LIST_FIELDS = {
+    "group_id": "group_id",
+    "group_number": "group_number",
+    "title_kr": "title_kr",
+}
+
+GROUP_ITEM_FIELDS = {
+    "item_id": "g.item_id",
+    "display_order": "g.display_order",
+    "summary_meaning": "g.summary_meaning",
+    "display_letter": "g.display_letter",
+    "spelling": "w.spelling",
+}
+
+# The quiz listing never carries the answers
+QUIZ_ITEM_FIELDS = {name: column for name, column in GROUP_ITEM_FIELDS.items() if name != "spelling"}
+
+# Always selected: the keyset cursor and the row identity
+GROUP_LIST_REQUIRED = ("group_id",)
+GROUP_ITEM_REQUIRED = ("item_id", "display_order")
+
+def parse_fields(fields: Optional[str], allowed: Dict[str, str], required: Tuple[str, ...] = ()) -> Tuple[str, ...]:
+    """
+    Normalize a comma-separated ?fields= value to a tuple in column order,
+    adding the required columns. None or "" selects every allowed column.
+    Raises ValueError for names outside `allowed`.
+    """
+    if not fields:
+        return tuple(allowed)
+    names = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = names - allowed.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in names or name in required)
+
+def _statement(*lines: str) -> TextClause:
+    return text("\n".join(line for line in lines if line))
+
+# Keyset pagination: "after" is the last group_id / display_order of the
+# previous page, so every page is an index range scan instead of an OFFSET.
+@lru_cache(maxsize=None)
+def group_list_query(fields: Tuple[str, ...], after: bool = False, limit: bool = False) -> TextClause:
+    return _statement(
+        "Select",
+        ",\n".join("    " + GROUP_LIST_FIELDS[name] for name in fields),
+        "From group_list",
+        "Where group_id > :after" if after else "",
+        "Order By group_id",
+        "Limit :limit" if limit else "",
+    )
+
+@lru_cache(maxsize=None)
+def group_items_query(fields: Tuple[str, ...], after: bool = False, limit: bool = False) -> TextClause:
+    """The words table is only joined when spelling is selected."""
+    return _statement(
+        "Select",
+        ",\n".join("    " + GROUP_ITEM_FIELDS[name] for name in fields),
+        "From group_items g",
+        "Join words w On g.word_id = w.word_id" if "spelling" in fields else "",
+        "Where g.group_id = :group_id",
+        "  And g.display_order > :after" if after else "",
+        "Order By g.display_order",
+        "Limit :limit" if limit else "",
+    )
+
+def page_params(params: Dict[str, Any], after: Optional[int], limit: Optional[int]) -> Dict[str, Any]:
+    if after is not None:
+        params["after"] = after
+    if limit is not None:
+        params["limit"] = limit
+    return params
+
+# Shared with helper_sql_async so both data-access paths run identical SQL.
+GROUP_LIST_QUERY = group_list_query(tuple(GROUP_LIST_FIELDS))
+
+GROUP_ITEMS_QUERY = group_items_query(tuple(GROUP_ITEM_FIELDS))
+
+GROUP_FOOTER_QUERY = text("""
+Select
+    footer_phrase_en,
+    footer_phrase_kr
+From group_list
+Where group_id = :group_id
+""")
+
+_WORD_DETAILS_SELECT = """
+Select
+    gi.item_id,
+    gi.group_id,
+    gi.summary_meaning,
+    gi.display_letter,
+    g.group_number,
+    w.word_id,
+    w.spelling,
+    wd.full_definition,
+    wd.example_sentence,
+    wd.example_translation,
+    wd.mnemonic_tip
+From group_items gi
+Join group_list g On gi.group_id = g.group_id
+Join words w On gi.word_id = w.word_id
+Join word_details wd On w.word_id = wd.word_id
+"""
+
+WORD_DETAILS_QUERY = text(_WORD_DETAILS_SELECT + """
+Where gi.item_id = :item_id
+""")
+
+# One round trip for every popup in a group (replaces N x WORD_DETAILS_QUERY)
+GROUP_WORD_DETAILS_QUERY = text(_WORD_DETAILS_SELECT + """
+Where gi.group_id = :group_id
+Order By gi.display_order
+""")
+
+GROUP_SIZES_QUERY = text("""
+Select
+    group_id,
+    Count(*) As item_count
+From group_items
+Group By group_id
+""")
+
+QUIZ_ITEM_QUERY = text("""
+Select
+    gi.item_id,
+    gi.group_id,
+    gi.summary_meaning,
+    gi.display_letter,
+    w.spelling
+From group_items gi
+Join words w On gi.word_id = w.word_id
+Where gi.item_id = :item_id
+  And gi.group_id = :group_id
+""")
+
+CLAIM_SYNC_QUERY = text("""
+Insert Into quiz_syncs (user_id, sync_id, received_at)
+Values (:user_id, :sync_id, :received_at)
+""")
+
+RELEASE_SYNC_QUERY = text("""
+Delete From quiz_syncs
+Where user_id = :user_id
+  And sync_id = :sync_id
+""")
+
+def claim_sync_params(user_id: int, sync_id: str) -> Dict[str, Any]:
+    # received_at is stored as naive UTC, like quiz_attempts.answered_at
+    return {"user_id": user_id, "sync_id": sync_id,
+            "received_at": datetime.now(timezone.utc).replace(tzinfo=None)}
+
+@cached("group_list")
+def get_group_list(db: Session, fields: Tuple[str, ...] = tuple(GROUP_LIST_FIELDS),
+                   after: Optional[int] = None, limit: Optional[int] = None):
+    """Groups in group_id order; pass arguments positionally (they form the cache key)."""
+    query = group_list_query(fields, after is not None, limit is not None)
+    result = db.execute(query, page_params({}, after, limit)).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_items")
+def get_group_items(db: Session, group_id: int, fields: Tuple[str, ...] = tuple(GROUP_ITEM_FIELDS),
+                    after: Optional[int] = None, limit: Optional[int] = None):
+    """A group's items in display order; pass arguments positionally (they form the cache key)."""
+    query = group_items_query(fields, after is not None, limit is not None)
+    result = db.execute(query, page_params({"group_id": group_id}, after, limit)).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_footer")
+def get_group_footer(db: Session, group_id: int):
+    result = db.execute(GROUP_FOOTER_QUERY, {"group_id": group_id}).fetchone()
+    return dict(result._mapping) if result else None
+
+@cached("word_details")
+def get_word_details(db: Session, item_id: int):
+    result = db.execute(WORD_DETAILS_QUERY, {"item_id": item_id}).fetchone()
+    return dict(result._mapping) if result else None
+
+@cached("group_word_details")
+def get_group_word_details(db: Session, group_id: int):
+    result = db.execute(GROUP_WORD_DETAILS_QUERY, {"group_id": group_id}).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_sizes")
+def get_group_sizes(db: Session) -> Dict[int, int]:
+    """Item count per group_id, for completion percentages."""
+    result = db.execute(GROUP_SIZES_QUERY).fetchall()
+    return {row.group_id: row.item_count for row in result}
+
+def grade_answer(correct_spelling: str, user_answer: str, normalized_correct: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Compare a submission against the stored spelling and build the feedback.
+    Answers within a few typos of the spelling are reported as close (still
+    incorrect) along with their edit distance and a 0-1 score.
+    """
+    if normalized_correct is None:
+        normalized_correct = answer_index.normalize(correct_spelling)
+    normalized_user = answer_index.normalize(user_answer)
+    is_correct = normalized_correct == normalized_user
+
+    allowed = answer_index.allowed_distance(normalized_correct)
+    distance = answer_index.bounded_levenshtein(normalized_correct, normalized_user, allowed)
+    is_close = not is_correct and distance <= allowed
+
+    if is_correct:
+        feedback = "Great job! That's correct."
+    elif is_close:
+        feedback = "Almost! Check your spelling."
+    else:
+        feedback = "Incorrect, please try again."
+
+    return {
+        "is_correct": is_correct,
+        "correct_answer": correct_spelling,
+        "user_answer": user_answer,
+        "feedback": feedback,
+        "is_close": is_close,
+        "edit_distance": distance if distance <= allowed else None,
+        "score": 1 - distance / max(len(normalized_correct), 1) if distance <= allowed else 0.0,
+    }
+
+# The columns batch grading needs, in GROUP_ITEM_FIELDS order
+GROUP_ANSWER_FIELDS = ("item_id", "display_order", "spelling")
+
+def sheet_answers(answers: List[Tuple[int, str]], group_id: int) -> Tuple[Dict[int, Tuple[str, Optional[str]]], bool]:
+    """
+    (spelling, normalized) per item of a sheet from the answer index, and
+    whether any item was missing from it.
+    """
+    correct: Dict[int, Tuple[str, Optional[str]]] = {}
+    missing = False
+    for item_id, _ in answers:
+        if item_id in correct:
+            continue
+        answer = answer_index.lookup(item_id, group_id)
+        if answer is None:
+            missing = True
+        else:
+            correct[item_id] = (answer.spelling, answer.normalized)
+    return correct, missing
+
+def grade_sheet_with(correct: Dict[int, Tuple[str, Optional[str]]], group_rows: List[Dict[str, Any]],
+                     answers: List[Tuple[int, str]]) -> List[Optional[Dict[str, Any]]]:
+    """Grade a sheet once the index hits and, if needed, the group's rows are at hand."""
+    for row in group_rows:
+        correct.setdefault(row["item_id"], (row["spelling"], None))
+    results = []
+    for item_id, user_answer in answers:
+        spelling = correct.get(item_id)
+        results.append(grade_answer(spelling[0], user_answer, spelling[1]) if spelling else None)
+    return results
+
+def grade_sheet(db: Session, group_id: int, answers: List[Tuple[int, str]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Grade (item_id, user_answer) pairs of one group in a single pass, in order;
+    None for items that are not in the group. Spellings come from the answer
+    index; if it lacks any, the group's spellings are loaded with one cached
+    query instead of one query per item.
+    """
+    correct, missing = sheet_answers(answers, group_id)
+    group_rows = get_group_items(db, group_id, GROUP_ANSWER_FIELDS) if missing else []
+    return grade_sheet_with(correct, group_rows, answers)
+
+def claim_sync(db: Session, user_id: int, sync_id: str) -> bool:
+    """Record an upload id for the user; False if it was applied before (a retried upload)."""
     try:
-        query = text("""
-        Select 
-            gi.item_id,
-            gi.summary_meaning,
-            gi.display_letter,
-            g.group_number,
-            w.word_id, 
-            w.spelling, 
-            wd.full_definition, 
-            wd.example_sentence, 
-            wd.example_translation, 
-            wd.mnemonic_tip 
-        From group_items gi
-        Join group_list g On gi.group_id = g.group_id
-        Join words w On gi.word_id = w.word_id
-        Join word_details wd On w.word_id = wd.word_id
-        Where gi.item_id = :item_id
-        """)
-        result = db.execute(query, {"item_id": item_id}).fetchone()
-        return dict(result._mapping) if result else None
-    finally:
-        db.close()
-
-def quiz_answer(item_id: int, user_answer: str, group_id: int, user_id: int):
+        db.execute(CLAIM_SYNC_QUERY, claim_sync_params(user_id, sync_id))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
+
+def release_sync(db: Session, user_id: int, sync_id: str) -> None:
+    """Undo claim_sync when recording the upload failed, so the client's retry is applied."""
+    db.execute(RELEASE_SYNC_QUERY, {"user_id": user_id, "sync_id": sync_id})
+    db.commit()
+
+def quiz_answer(db: Session, item_id: int, user_answer: str, group_id: int, user_id: int):
     """
     Evaluate the user's quiz submission against the stored spelling.
-    Currently we only compare the spelling and return a lightweight feedback
-    object; future iterations can log attempts keyed by user_id/group_id.
+    The spelling comes from the in-memory answer index, with a database lookup
+    for items it does not hold yet; the route logs the attempt keyed by
+    user_id/group_id through attempt_log.
     """
-    db = SessionLocal()
-    try:
-        query = text("""
-        Select 
-            gi.item_id,
-            gi.group_id,
-            gi.summary_meaning,
-            gi.display_letter,
-            w.spelling
-        From group_items gi
-        Join words w On gi.word_id = w.word_id
-        Where gi.item_id = :item_id
-          And gi.group_id = :group_id
-        """)
-
-        result = db.execute(
-            query,
-            {"item_id": item_id, "group_id": group_id}
-        ).fetchone()
-
-        if not result:
-            return None
-
-        row = dict(result._mapping)
-        normalized_correct = row["spelling"].strip().lower()
-        normalized_user = user_answer.strip().lower()
-        is_correct = normalized_correct == normalized_user
-
-        feedback = "Great job! That's correct." if is_correct else "Incorrect, please try again."
-
-        return {
-            "is_correct": is_correct,
-            "correct_answer": row["spelling"],
-            "user_answer": user_answer,
-            "feedback": feedback,
-        }
-    finally:
-        db.close()
\ No newline at end of file
+    answer = answer_index.lookup(item_id, group_id)
+    if answer is not None:
+        return grade_answer(answer.spelling, user_answer, answer.normalized)
+
+    result = db.execute(
+        QUIZ_ITEM_QUERY,
+        {"item_id": item_id, "group_id": group_id}
+    ).fetchone()
+
+    if not result:
+        return None
+
+    row = dict(result._mapping)
+    return grade_answer(row["spelling"], user_answer)
@@ -0,0 +1,106 @@
+"""
+Async mirror of helper_sql for the USE_ASYNC_DB route set.
+
+Every function runs the same SQL as its helper_sql counterpart on the async
+engine, using the request's AsyncSession, and the catalog lookups share
+helper_sql's cache namespaces.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import answer_index
+from catalog_cache import cached
+from helper_sql import (
+    GROUP_LIST_FIELDS,
+    GROUP_ITEM_FIELDS,
+    group_list_query,
+    group_items_query,
+    page_params,
+    GROUP_FOOTER_QUERY,
+    WORD_DETAILS_QUERY,
+    GROUP_WORD_DETAILS_QUERY,
+    GROUP_SIZES_QUERY,
+    QUIZ_ITEM_QUERY,
+    CLAIM_SYNC_QUERY,
+    RELEASE_SYNC_QUERY,
+    claim_sync_params,
+    GROUP_ANSWER_FIELDS,
+    grade_answer,
+    sheet_answers,
+    grade_sheet_with,
+)
+
+@cached("group_list")
+async def get_group_list(db: AsyncSession, fields: Tuple[str, ...] = tuple(GROUP_LIST_FIELDS),
+                         after: Optional[int] = None, limit: Optional[int] = None):
+    query = group_list_query(fields, after is not None, limit is not None)
+    result = (await db.execute(query, page_params({}, after, limit))).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_items")
+async def get_group_items(db: AsyncSession, group_id: int, fields: Tuple[str, ...] = tuple(GROUP_ITEM_FIELDS),
+                          after: Optional[int] = None, limit: Optional[int] = None):
+    query = group_items_query(fields, after is not None, limit is not None)
+    result = (await db.execute(query, page_params({"group_id": group_id}, after, limit))).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_footer")
+async def get_group_footer(db: AsyncSession, group_id: int):
+    result = (await db.execute(GROUP_FOOTER_QUERY, {"group_id": group_id})).fetchone()
+    return dict(result._mapping) if result else None
+
+@cached("word_details")
+async def get_word_details(db: AsyncSession, item_id: int):
+    result = (await db.execute(WORD_DETAILS_QUERY, {"item_id": item_id})).fetchone()
+    return dict(result._mapping) if result else None
+
+@cached("group_word_details")
+async def get_group_word_details(db: AsyncSession, group_id: int):
+    result = (await db.execute(GROUP_WORD_DETAILS_QUERY, {"group_id": group_id})).fetchall()
+    return [dict(row._mapping) for row in result]
+
+@cached("group_sizes")
+async def get_group_sizes(db: AsyncSession) -> Dict[int, int]:
+    """Item count per group_id, for completion percentages."""
+    result = (await db.execute(GROUP_SIZES_QUERY)).fetchall()
+    return {row.group_id: row.item_count for row in result}
+
+async def quiz_answer(db: AsyncSession, item_id: int, user_answer: str, group_id: int, user_id: int):
+    """Async counterpart of helper_sql.quiz_answer."""
+    answer = answer_index.lookup(item_id, group_id)
+    if answer is not None:
+        return grade_answer(answer.spelling, user_answer, answer.normalized)
+
+    result = (await db.execute(
+        QUIZ_ITEM_QUERY,
+        {"item_id": item_id, "group_id": group_id}
+    )).fetchone()
+
+    if not result:
+        return None
+
+    row = dict(result._mapping)
+    return grade_answer(row["spelling"], user_answer)
+
+async def grade_sheet(db: AsyncSession, group_id: int, answers: List[Tuple[int, str]]) -> List[Optional[Dict[str, Any]]]:
+    """Async counterpart of helper_sql.grade_sheet."""
+    correct, missing = sheet_answers(answers, group_id)
+    group_rows = await get_group_items(db, group_id, GROUP_ANSWER_FIELDS) if missing else []
+    return grade_sheet_with(correct, group_rows, answers)
+
+async def claim_sync(db: AsyncSession, user_id: int, sync_id: str) -> bool:
+    """Async counterpart of helper_sql.claim_sync."""
+    try:
+        await db.execute(CLAIM_SYNC_QUERY, claim_sync_params(user_id, sync_id))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return False
+    return True
+
+async def release_sync(db: AsyncSession, user_id: int, sync_id: str) -> None:
+    """Async counterpart of helper_sql.release_sync."""
+    await db.execute(RELEASE_SYNC_QUERY, {"user_id": user_id, "sync_id": sync_id})
+    await db.commit()
@@ -0,0 +1,258 @@
+"""
+Persistent hint cache keyed on (item_id, model, prompt version).
+
+Each key holds up to HINT_CACHE_VARIANTS hints. Once a key is warm (all variants
+present) hints are served at random from SQLite without calling Ollama; the
+table is bounded to HINT_CACHE_MAX_ENTRIES rows with least-recently-used
+eviction. Run this module to pre-generate hints for whole groups offline:
+
+    python hint_cache.py --groups 1 2 3
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import helper_rag
+import metrics
+
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "hint_cache.sqlite3")
+_CACHE_PATH = os.getenv("HINT_CACHE_PATH", _DEFAULT_PATH)
+_MAX_ENTRIES = int(os.getenv("HINT_CACHE_MAX_ENTRIES", "100000"))
+_VARIANTS = int(os.getenv("HINT_CACHE_VARIANTS", "3"))
+
+# Check the size bound every N inserts instead of on each one
+_EVICT_CHECK_EVERY = 100
+
+HINT_CACHE_HITS = metrics.Counter("hint_cache_hits_total", "Hints served from the persistent cache.")
+HINT_CACHE_MISSES = metrics.Counter("hint_cache_misses_total", "Hint requests that had to call the model.")
+HINT_FALLBACKS = metrics.Counter("hint_fallbacks_total", "Hints built from stored context while the model was unavailable.")
+HINT_BREAKER_OPEN = metrics.Gauge("hint_breaker_open", "1 while the hint model circuit breaker is open.",
+                                  fn=lambda: 0.0 if helper_rag.breaker.state == "closed" else 1.0)
+HINT_TIME_TO_FIRST_TOKEN = metrics.Histogram(
+    "hint_time_to_first_token_seconds",
+    "Time from a streaming hint request to its first text fragment.",
+    ("source",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+
+
+class HintCache:
+    def __init__(self, path: str = _CACHE_PATH, max_entries: int = _MAX_ENTRIES, variants: int = _VARIANTS):
+        self.path = path
+        self.max_entries = max_entries
+        self.variants = variants
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS hints (
+                    item_id INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    variant INTEGER NOT NULL,
+                    hint TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (item_id, model, prompt_version, variant)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_hints_last_used ON hints (last_used)")
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(item_id: int):
+        return (item_id, helper_rag.model_name(), helper_rag.PROMPT_VERSION)
+
+    def variants_for(self, item_id: int) -> List[str]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT hint FROM hints WHERE item_id = ? AND model = ? AND prompt_version = ? ORDER BY variant",
+                self._key(item_id),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, item_id: int) -> Optional[str]:
+        """A random cached variant, or None while the key is not fully warm."""
+        key = self._key(item_id)
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT variant, hint FROM hints WHERE item_id = ? AND model = ? AND prompt_version = ?",
+                key,
+            ).fetchall()
+            if len(rows) < self.variants:
+                return None
+            variant, hint = random.choice(rows)
+            conn.execute(
+                "UPDATE hints SET last_used = ? WHERE item_id = ? AND model = ? AND prompt_version = ? AND variant = ?",
+                (time.time(), *key, variant),
+            )
+        return hint
+
+    def add(self, item_id: int, hint: str) -> None:
+        key = self._key(item_id)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            (next_variant,) = conn.execute(
+                "SELECT COALESCE(MAX(variant) + 1, 0) FROM hints WHERE item_id = ? AND model = ? AND prompt_version = ?",
+                key,
+            ).fetchone()
+            if next_variant >= self.variants:
+                return
+            conn.execute(
+                "INSERT OR IGNORE INTO hints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (*key, next_variant, hint, now, now),
+            )
+            self._inserts += 1
+            if self._inserts % _EVICT_CHECK_EVERY == 0:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM hints").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM hints WHERE rowid IN (SELECT rowid FROM hints ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM hints")
+
+
+cache = HintCache()
+
+
+def lookup(word_context: Dict[str, Any]) -> Optional[str]:
+    """A cached hint for the word if its key is warm, counting the hit or miss."""
+    item_id = word_context.get("item_id")
+    hint = cache.get(item_id) if item_id is not None else None
+    if hint is None:
+        HINT_CACHE_MISSES.inc()
+    else:
+        HINT_CACHE_HITS.inc()
+    return hint
+
+
+def generate(word_context: Dict[str, Any]) -> str:
+    """Call the model and keep the result as one of the word's variants."""
+    hint = helper_rag.generate_hint(word_context)
+    item_id = word_context.get("item_id")
+    if item_id is not None:
+        cache.add(item_id, hint)
+    return hint
+
+
+def get_hint(word_context: Dict[str, Any]) -> str:
+    """Serve a cached hint for the word, generating (and storing) one on a miss."""
+    hint = lookup(word_context)
+    return hint if hint is not None else generate(word_context)
+
+
+def fallback(word_context: Dict[str, Any]) -> str:
+    HINT_FALLBACKS.inc()
+    return helper_rag.fallback_hint(word_context)
+
+
+async def agenerate(word_context: Dict[str, Any]) -> str:
+    """
+    Async generate: model call through the resilient AsyncClient backend. While
+    the breaker is open the stored-context fallback is returned (and not cached).
+    """
+    try:
+        hint = await helper_rag.agenerate_hint(word_context)
+    except helper_rag.ModelUnavailableError:
+        if helper_rag.breaker.state == "closed":
+            raise
+        return fallback(word_context)
+
+    item_id = word_context.get("item_id")
+    if item_id is not None:
+        await asyncio.to_thread(cache.add, item_id, hint)
+    return hint
+
+
+async def astream_generate(word_context: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Stream a new hint from the model and store the assembled hint when it
+    completes; the fallback is sent instead if the breaker opens before any
+    text. Callers check the cache first (hint_scheduler.stream_hint).
+    """
+    parts = []
+    try:
+        async for fragment in helper_rag.astream_hint(word_context):
+            parts.append(fragment)
+            yield fragment
+    except helper_rag.ModelUnavailableError:
+        if parts or helper_rag.breaker.state == "closed":
+            raise
+        yield fallback(word_context)
+        return
+
+    hint = "".join(parts).strip()
+    item_id = word_context.get("item_id")
+    if item_id is not None and hint:
+        await asyncio.to_thread(cache.add, item_id, hint)
+
+
+def warm_groups(group_ids: List[int]) -> None:
+    """Fill every variant slot for every item of the given groups."""
+    import helper_sql
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        for group_id in group_ids:
+            words = helper_sql.get_group_word_details(db, group_id)
+            if not words:
+                print(f"Group {group_id}: no items found, skipping.")
+                continue
+
+            generated = 0
+            started = time.perf_counter()
+            for word_context in words:
+                missing = cache.variants - len(cache.variants_for(word_context["item_id"]))
+                for _ in range(max(missing, 0)):
+                    try:
+                        cache.add(word_context["item_id"], helper_rag.generate_hint(word_context))
+                        generated += 1
+                    except helper_rag.HintGenerationError as exc:
+                        print(f"  item {word_context['item_id']}: {exc}")
+                        break
+            elapsed = time.perf_counter() - started
+            print(f"Group {group_id}: {len(words)} items, {generated} hints generated in {elapsed:.1f}s.")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate cached hints for whole groups.")
+    parser.add_argument("--groups", type=int, nargs="+", required=True, help="Group ids to warm.")
+    parser.add_argument("--clear", action="store_true", help="Drop every cached hint before warming.")
+    args = parser.parse_args()
+
+    if args.clear:
+        cache.clear()
+    warm_groups(args.groups)
+
+
+if __name__ == "__main__":
+    main()
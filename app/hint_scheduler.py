@@ -0,0 +1,228 @@
+"""
+Admission control in front of the hint generator.
+
+- Single-flight: concurrent requests for the same item share one model call;
+  streaming requests (/quiz/hint/stream) follow one shared model stream.
+- Bounded concurrency: at most HINT_MAX_CONCURRENCY model calls run at once.
+- Load shedding: once HINT_MAX_QUEUE calls are already waiting for a slot, new
+  work is rejected with HintQueueFull so the API can answer 503 + Retry-After
+  immediately instead of piling up behind a saturated model.
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from fastapi.concurrency import run_in_threadpool
+
+import helper_rag
+import hint_cache
+import metrics
+
+_MAX_CONCURRENCY = int(os.getenv("HINT_MAX_CONCURRENCY", "2"))
+_MAX_QUEUE = int(os.getenv("HINT_MAX_QUEUE", "32"))
+_RETRY_AFTER = int(os.getenv("HINT_RETRY_AFTER", "5"))
+
+HINT_QUEUE_DEPTH = metrics.Gauge("hint_queue_depth", "Hint generations waiting for a model slot.",
+                                 fn=lambda: scheduler.waiting)
+HINT_ACTIVE = metrics.Gauge("hint_active_generations", "Hint generations currently running.",
+                            fn=lambda: scheduler.active)
+HINT_QUEUE_WAIT = metrics.Histogram("hint_queue_wait_seconds", "Time spent waiting for a model slot.")
+HINT_COALESCED = metrics.Counter("hint_coalesced_total", "Requests that joined an in-flight generation.")
+HINT_SHED = metrics.Counter("hint_shed_total", "Requests rejected because the queue was full.")
+
+
+class HintQueueFull(Exception):
+    """Raised when the wait queue for model slots is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Hint generator is busy, please retry shortly.")
+        self.retry_after = retry_after
+
+
+class SharedStream:
+    """One model stream fanned out to every request for the same item."""
+
+    def __init__(self):
+        self.fragments: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, fragment: str) -> None:
+        async with self._changed:
+            self.fragments.append(fragment)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[BaseException] = None) -> None:
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Every fragment from the first, then the stream's error if it failed."""
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: sent < len(self.fragments) or self.done)
+                fragments = self.fragments[sent:]
+            for fragment in fragments:
+                yield fragment
+            sent += len(fragments)
+            if self.done and sent == len(self.fragments):
+                if self.error is not None:
+                    raise self.error
+                return
+
+    async def result(self) -> str:
+        return "".join([fragment async for fragment in self.follow()]).strip()
+
+
+class HintScheduler:
+    def __init__(self, max_concurrency: int = _MAX_CONCURRENCY, max_queue: int = _MAX_QUEUE,
+                 retry_after: int = _RETRY_AFTER):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.waiting = 0
+        self.active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._streams: Dict[Hashable, SharedStream] = {}
+        # Strong references to the stream producers; the loop only keeps weak ones
+        self._tasks: Set["asyncio.Task[None]"] = set()
+
+    def _admit(self) -> None:
+        # Counted before the task starts so a burst in one loop tick is bounded too
+        if self.waiting + self.active >= self.max_concurrency + self.max_queue:
+            HINT_SHED.inc()
+            raise HintQueueFull(self.retry_after)
+        self.waiting += 1
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, joining an identical in-flight call or stream when there is one."""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            HINT_COALESCED.inc()
+            return await asyncio.shield(inflight)
+        shared = self._streams.get(key)
+        if shared is not None:
+            HINT_COALESCED.inc()
+            return await shared.result()
+
+        self._admit()
+        task = asyncio.ensure_future(self._execute(fn))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one client disconnecting does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def stream(self, key: Hashable, open_stream: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Fragments of open_stream() for key, following an identical in-flight
+        stream or call when there is one. Admission happens here, before
+        anything is sent, so HintQueueFull can still become a plain 503.
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            HINT_COALESCED.inc()
+            return _awaited(asyncio.shield(inflight))
+        shared = self._streams.get(key)
+        if shared is not None:
+            HINT_COALESCED.inc()
+            return shared.follow()
+
+        self._admit()
+        shared = self._streams[key] = SharedStream()
+
+        async def pump():
+            async for fragment in open_stream():
+                await shared.publish(fragment)
+
+        async def produce():
+            # A task of its own, so followers disconnecting never cancel it
+            try:
+                await self._execute(pump)
+            except BaseException as exc:
+                await shared.finish(exc)
+                if not isinstance(exc, Exception):
+                    raise
+            else:
+                await shared.finish()
+            finally:
+                self._streams.pop(key, None)
+
+        task = asyncio.ensure_future(produce())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return shared.follow()
+
+    async def _execute(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        queued_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        HINT_QUEUE_WAIT.observe(time.perf_counter() - queued_at)
+
+        self.active += 1
+        try:
+            return await fn()
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+async def _awaited(hint: Awaitable[str]) -> AsyncIterator[str]:
+    yield await hint
+
+
+async def _single(hint: str) -> AsyncIterator[str]:
+    yield hint
+
+
+scheduler = HintScheduler()
+
+
+async def get_hint(word_context: Dict[str, Any]) -> str:
+    """Cached hint if warm, otherwise a scheduled (coalesced, bounded) generation."""
+    hint = await run_in_threadpool(hint_cache.lookup, word_context)
+    if hint is not None:
+        return hint
+    if helper_rag.breaker.state == "open":
+        # Do not queue behind a model that is known to be down
+        return hint_cache.fallback(word_context)
+    return await scheduler.run(
+        word_context["item_id"],
+        lambda: hint_cache.agenerate(word_context),
+    )
+
+
+async def stream_hint(word_context: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    get_hint for /quiz/hint/stream: a warm cache (or the fallback while the
+    breaker is open) gives the whole hint as one fragment, otherwise the model
+    stream is scheduled like get_hint. Raises HintQueueFull before streaming.
+    """
+    started = time.perf_counter()
+    hint = await run_in_threadpool(hint_cache.lookup, word_context)
+    if hint is None and helper_rag.breaker.state == "open":
+        hint = hint_cache.fallback(word_context)
+    if hint is not None:
+        hint_cache.HINT_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, source="cache")
+        return _single(hint)
+    fragments = scheduler.stream(word_context["item_id"], lambda: hint_cache.astream_generate(word_context))
+    return _timed(fragments, started)
+
+
+async def _timed(fragments: AsyncIterator[str], started: float) -> AsyncIterator[str]:
+    first = True
+    async for fragment in fragments:
+        if first:
+            hint_cache.HINT_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - started, source="model")
+            first = False
+        yield fragment
@@ -1,105 +1,192 @@
 import sys
 import os
 import csv
-from sqlalchemy import text
+import json
+import time
+import argparse
+from itertools import islice
+from sqlalchemy import create_engine, text
 
 # Ensure we can import from the current directory
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import engine
+import catalog_cache
 
-def insert_csv_data():
-    print("Connecting to database...")
-    
-    data_dir = os.path.join(os.path.dirname(__file__), 'data')
-    groups_file = os.path.join(data_dir, 'groups.csv')
-    words_file = os.path.join(data_dir, 'words.csv')
-    group_items_file = os.path.join(data_dir, 'group_items.csv')
-    word_details_file = os.path.join(data_dir, 'word_details.csv')
-
-    with engine.connect() as connection:
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_CHECKPOINT = os.path.join(DEFAULT_DATA_DIR, '.insert_csv_checkpoint.json')
+
+# (table, csv file, columns, columns refreshed on duplicate key), in FK order
+TABLES = [
+    ('group_list', 'groups.csv',
+     ['group_id', 'group_number', 'title_kr', 'footer_phrase_en', 'footer_phrase_kr'],
+     ['title_kr', 'footer_phrase_en', 'footer_phrase_kr']),
+    ('words', 'words.csv',
+     ['word_id', 'spelling'],
+     ['spelling']),
+    ('group_items', 'group_items.csv',
+     ['item_id', 'group_id', 'word_id', 'display_order', 'summary_meaning', 'display_letter'],
+     ['group_id', 'word_id', 'display_order', 'summary_meaning', 'display_letter']),
+    ('word_details', 'word_details.csv',
+     ['detail_id', 'word_id', 'full_definition', 'example_sentence', 'example_translation', 'mnemonic_tip'],
+     ['full_definition', 'example_sentence', 'example_translation', 'mnemonic_tip']),
+]
+
+
+def upsert_statement(table, columns, update_columns):
+    # VALUES(col) keeps the ON DUPLICATE clause parameter-free, which lets PyMySQL
+    # rewrite executemany() into a single multi-row INSERT per batch.
+    return text(
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join(':' + c for c in columns)}) "
+        f"ON DUPLICATE KEY UPDATE {', '.join(f'{c}=VALUES({c})' for c in update_columns)}"
+    )
+
+
+def iter_batches(filepath, batch_size, skip=0):
+    """Stream a CSV as lists of row dicts without loading the whole file."""
+    with open(filepath, mode='r', encoding='utf-8', newline='') as f:
+        rows = islice(csv.DictReader(f), skip, None)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path, mode='r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode='w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def load_table_batched(connection, table, filepath, columns, update_columns, batch_size, checkpoint, checkpoint_path):
+    """executemany() in batches, committing and checkpointing after each one."""
+    statement = upsert_statement(table, columns, update_columns)
+    done = checkpoint.get(table, 0)
+    if done:
+        print(f"  resuming {table} after {done} rows")
+
+    started = time.perf_counter()
+    loaded = 0
+    for batch in iter_batches(filepath, batch_size, skip=done):
         trans = connection.begin()
         try:
-            # 0. Clean up existing data (Optional: for testing purposes, user might want to keep it? 
-            # The prompt says "add data", but usually with explicit IDs we might clash.
-            # I will use INSERT IGNORE logic or assume empty/clean DB for this specific "turn the data .csv file into... proper files that can later be used to add data" request implies bootstrapping.
-            # But valid SQL standard is safer. I'll just use INSERT and let it fail if dupes, or I should truncate?
-            # Given previous convo about "Creating Test Data", I'll assume it's fine to clean or just insert.
-            # Let's try to just INSERT. If ID conflicts, it will error, which is good feedback.
-            
-            # Disable FK checks to allow arbitrary order if needed, but we will go in order.
-            connection.execute(text("SET FOREIGN_KEY_CHECKS = 0;"))
-            
-            # Function to read CSV
-            def read_csv(filepath):
-                with open(filepath, mode='r', encoding='utf-8') as f:
-                    return list(csv.DictReader(f))
-
-            # 1. Insert Groups
-            print(f"Loading {groups_file}...")
-            groups = read_csv(groups_file)
-            for row in groups:
-                 connection.execute(text("""
-                    INSERT INTO group_list (group_id, group_number, title_kr, footer_phrase_en, footer_phrase_kr)
-                    VALUES (:group_id, :group_number, :title_kr, :footer_phrase_en, :footer_phrase_kr)
-                    ON DUPLICATE KEY UPDATE 
-                        title_kr=:title_kr, 
-                        footer_phrase_en=:footer_phrase_en, 
-                        footer_phrase_kr=:footer_phrase_kr
-                """), row)
-            print(f"Inserted/Updated {len(groups)} groups.")
-
-            # 2. Insert Words
-            print(f"Loading {words_file}...")
-            words = read_csv(words_file)
-            for row in words:
-                connection.execute(text("""
-                    INSERT INTO words (word_id, spelling)
-                    VALUES (:word_id, :spelling)
-                    ON DUPLICATE KEY UPDATE spelling=:spelling
-                """), row)
-            print(f"Inserted/Updated {len(words)} words.")
-
-            # 3. Insert Group Items
-            print(f"Loading {group_items_file}...")
-            items = read_csv(group_items_file)
-            for row in items:
-                connection.execute(text("""
-                    INSERT INTO group_items (item_id, group_id, word_id, display_order, summary_meaning, display_letter)
-                    VALUES (:item_id, :group_id, :word_id, :display_order, :summary_meaning, :display_letter)
-                    ON DUPLICATE KEY UPDATE 
-                        group_id=:group_id, 
-                        word_id=:word_id, 
-                        display_order=:display_order, 
-                        summary_meaning=:summary_meaning, 
-                        display_letter=:display_letter
-                """), row)
-            print(f"Inserted/Updated {len(items)} group items.")
-
-            # 4. Insert Word Details
-            print(f"Loading {word_details_file}...")
-            details = read_csv(word_details_file)
-            for row in details:
-                connection.execute(text("""
-                    INSERT INTO word_details (detail_id, word_id, full_definition, example_sentence, example_translation, mnemonic_tip)
-                    VALUES (:detail_id, :word_id, :full_definition, :example_sentence, :example_translation, :mnemonic_tip)
-                    ON DUPLICATE KEY UPDATE 
-                        full_definition=:full_definition, 
-                        example_sentence=:example_sentence, 
-                        example_translation=:example_translation, 
-                        mnemonic_tip=:mnemonic_tip
-                """), row)
-            print(f"Inserted/Updated {len(details)} word details.")
-
-            connection.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
+            connection.execute(statement, batch)
             trans.commit()
-            print("CSV Data inserted successfully!")
-
-        except Exception as e:
+        except Exception:
             trans.rollback()
-            print(f"Error occurred: {e}")
-            print("Rolled back changes.")
+            print(f"  batch starting at row {done + 1} of {table} failed; "
+                  f"rerun to resume from the checkpoint")
             raise
+        done += len(batch)
+        loaded += len(batch)
+        checkpoint[table] = done
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.perf_counter() - started
+        print(f"  {table}: {done} rows ({loaded / elapsed:,.0f} rows/sec)")
+    return loaded
+
+
+def _line_terminator(filepath):
+    with open(filepath, mode='rb') as f:
+        return '\\r\\n' if f.readline().endswith(b'\r\n') else '\\n'
+
+
+def load_table_infile(connection, table, filepath, columns):
+    """LOAD DATA LOCAL INFILE fast path; REPLACE gives the same upsert semantics."""
+    trans = connection.begin()
+    try:
+        result = connection.execute(text(
+            f"LOAD DATA LOCAL INFILE :path REPLACE INTO TABLE {table} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            f"LINES TERMINATED BY '{_line_terminator(filepath)}' "
+            f"IGNORE 1 LINES ({', '.join(columns)})"
+        ), {"path": os.path.abspath(filepath)})
+        trans.commit()
+    except Exception:
+        trans.rollback()
+        raise
+    return result.rowcount
+
+
+def insert_csv_data(data_dir=DEFAULT_DATA_DIR, batch_size=DEFAULT_BATCH_SIZE,
+                    checkpoint_path=DEFAULT_CHECKPOINT, use_load_data=False):
+    print("Connecting to database...")
+
+    checkpoint = load_checkpoint(checkpoint_path)
+    load_engine = engine
+    if use_load_data:
+        # The client has to opt in to LOCAL INFILE (server needs local_infile=ON too)
+        load_engine = create_engine(engine.url, connect_args={"local_infile": True})
+
+    with load_engine.connect() as connection:
+        # Session-level, so it holds across every batch on this connection
+        connection.execute(text("SET FOREIGN_KEY_CHECKS = 0;"))
+        connection.commit()
+        try:
+            for table, filename, columns, update_columns in TABLES:
+                filepath = os.path.join(data_dir, filename)
+                if checkpoint.get(table) == 'done':
+                    print(f"Skipping {filepath} (already loaded)")
+                    continue
+
+                print(f"Loading {filepath}...")
+                started = time.perf_counter()
+                if use_load_data:
+                    count = load_table_infile(connection, table, filepath, columns)
+                else:
+                    count = load_table_batched(connection, table, filepath, columns, update_columns,
+                                               batch_size, checkpoint, checkpoint_path)
+                elapsed = time.perf_counter() - started
+                rate = count / elapsed if elapsed > 0 else float(count)
+                print(f"Inserted/Updated {count} rows into {table} in {elapsed:.2f}s ({rate:,.0f} rows/sec).")
+
+                checkpoint[table] = 'done'
+                save_checkpoint(checkpoint_path, checkpoint)
+        finally:
+            connection.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
+            connection.commit()
+
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    catalog_cache.invalidate()
+    print("CSV Data inserted successfully!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load the four catalog CSVs into MySQL.")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR,
+                        help='Directory containing groups.csv, words.csv, group_items.csv and word_details.csv.')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help='Rows per multi-row INSERT and per commit.')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Checkpoint file used to resume after a failed batch '
+                             '(default: <data-dir>/.insert_csv_checkpoint.json).')
+    parser.add_argument('--no-resume', action='store_true',
+                        help='Ignore and overwrite an existing checkpoint.')
+    parser.add_argument('--load-data', action='store_true',
+                        help='Use LOAD DATA LOCAL INFILE instead of batched inserts.')
+    args = parser.parse_args()
+
+    checkpoint_path = args.checkpoint or os.path.join(args.data_dir, '.insert_csv_checkpoint.json')
+    if args.no_resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    insert_csv_data(args.data_dir, args.batch_size, checkpoint_path, args.load_data)
+
 
 if __name__ == "__main__":
-    insert_csv_data()
+    main()
@@ -6,6 +6,7 @@ from sqlalchemy import text
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import engine
+import catalog_cache
 
 def insert_test_data():
     print("Connecting to database...")
@@ -105,6 +106,7 @@ def insert_test_data():
                 })
 
             trans.commit()
+            catalog_cache.invalidate()
             print("Test data inserted successfully!")
         except Exception as e:
             trans.rollback()
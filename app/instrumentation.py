@@ -0,0 +1,133 @@
+"""
+Request and database timing exported through metrics.
+
+RequestMetricsMiddleware times every HTTP request by its route template
+(/groups/{group_id}/items, not the concrete path), including the body of
+streamed responses. instrument_engine() hooks SQLAlchemy's cursor events so
+every statement is timed under a fingerprint: the SQL with literals and bind
+parameters replaced by "?" and repeated VALUES / IN lists collapsed, hashed to
+a short id. db_query_info maps each id back to its statement.
+"""
+import hashlib
+import os
+import re
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+
+import metrics
+
+_MAX_FINGERPRINTS = int(os.getenv("DB_QUERY_FINGERPRINTS_MAX", "200"))
+_SLOW_QUERY_SECONDS = float(os.getenv("DB_SLOW_QUERY_MS", "500")) / 1000
+
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last body chunk.",
+    ("method", "route", "status"),
+)
+HTTP_IN_FLIGHT = metrics.Gauge("http_requests_in_flight", "Requests currently being handled.")
+
+DB_QUERY_SECONDS = metrics.Histogram(
+    "db_query_duration_seconds",
+    "Cursor execution time per statement fingerprint.",
+    ("engine", "fingerprint"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+DB_QUERY_ERRORS = metrics.Counter("db_query_errors_total", "Statements that raised.", ("engine", "fingerprint"))
+DB_SLOW_QUERIES = metrics.Counter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS.",
+                                  ("engine", "fingerprint"))
+DB_QUERY_INFO = metrics.Gauge("db_query_info", "Normalized statement of each fingerprint (always 1).",
+                              ("fingerprint", "statement"))
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware, so streamed bodies are timed to their last chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; unmatched paths
+            # share one label so scanners cannot blow up the series count
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route, status=str(status_code),
+            )
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_REPEATED_ROWS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """SQL with literals and parameters as "?"; IN lists and multi-row VALUES collapse."""
+    statement = _STRING.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _LIST.sub("(?+)", statement)
+    statement = _REPEATED_ROWS.sub("(?+)", statement)
+    return _SPACE.sub(" ", statement).strip()
+
+
+_fingerprints = set()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    normalized = normalize_statement(statement)
+    digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+    if digest not in _fingerprints:
+        if len(_fingerprints) >= _MAX_FINGERPRINTS:
+            return "other"
+        _fingerprints.add(digest)
+        DB_QUERY_INFO.set(1, fingerprint=digest, statement=normalized[:300])
+    return digest
+
+
+def instrument_engine(engine, label: str) -> None:
+    """Time cursor executions on `engine` (pass async_engine.sync_engine for async)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        key = fingerprint(statement)
+        DB_QUERY_SECONDS.observe(elapsed, engine=label, fingerprint=key)
+        if elapsed >= _SLOW_QUERY_SECONDS:
+            DB_SLOW_QUERIES.inc(engine=label, fingerprint=key)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        if exception_context.statement:
+            DB_QUERY_ERRORS.inc(engine=label, fingerprint=fingerprint(exception_context.statement))
@@ -1,25 +1,129 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import FastAPI, Depends, HTTPException, Header, status
+from fastapi.responses import JSONResponse, FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+import json
+import os
+import threading
+import time
 import models
 from models import (
     QuizAnswerSubmit,
     QuizAnswerResponse,
+    QuizSheetSubmit,
+    QuizSheetResponse,
+    QuizSync,
+    QuizSyncResponse,
     HintRequest,
     HintResponse,
+    ReviewItem,
+    SearchResult,
+    UserProgress,
+    Leaderboard,
 )
-from database import engine, SessionLocal
-from typing import Annotated, Dict, List, Tuple
+import database
+from database import USE_ASYNC_DB
+from typing import Annotated, Dict, List, Optional, Tuple
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import helper_sql
 import helper_rag
+import hint_scheduler
+import catalog_payloads
+import pack_export
+import quiz_batch
+import async_routes
+import metrics
+import profiler
+from instrumentation import RequestMetricsMiddleware
+import attempt_log
+import srs
+import progress
+import answer_index
+import search_index
+import catalog_cache
+import catalog_snapshot
+import worker_bus
 # import auth
 # from charts import get_chart_data
 
-app = FastAPI()
+# serve.py creates the schema once in its master process instead
+SCHEMA_SETUP = os.getenv("SKIP_SCHEMA_SETUP", "false").lower() not in ("1", "true", "yes")
+# Set by serve.py for its workers
+WORKER_POOL = os.getenv("WORKER_POOL", "false").lower() in ("1", "true", "yes")
+# Groups whose first catalog pages are cached before /health/ready passes
+WARM_CATALOG_GROUPS = int(os.getenv("WARM_CATALOG_GROUPS", "0"))
+_SCHEMA_RETRY_SECONDS = 5
+
+# Startup steps /health/ready waits for, completed by prepare()
+startup_checks = {"schema": not SCHEMA_SETUP, "catalog_warm": WARM_CATALOG_GROUPS <= 0}
+
+def apply_worker_message(message: Dict):
+    if "graded" in message:
+        user_id, group_id, graded, recorded_at = message["graded"]
+        for item_id, is_correct, answered_at in graded:
+            srs.record_review(user_id, group_id, item_id, is_correct, answered_at)
+            progress.record(user_id, group_id, item_id, is_correct, answered_at, recorded_at)
+        return
+    # A new snapshot may change any namespace, including the indexes' rows
+    remapped = catalog_snapshot.reload(message["generation"])
+    if remapped or "invalidate" in message:
+        catalog_cache.invalidate(None if remapped else message["invalidate"], publish=False)
+
+def prepare():
+    """Startup work that needs the database, run on a thread so the worker serves meanwhile."""
+    while not startup_checks["schema"]:
+        try:
+            models.Base.metadata.create_all(bind=database.engine)
+            startup_checks["schema"] = True
+        except Exception as exc:
+            print(f"startup: schema setup failed, retrying in {_SCHEMA_RETRY_SECONDS}s: {exc}")
+            time.sleep(_SCHEMA_RETRY_SECONDS)
+
+    # Replays quiz_attempts in the background; /quiz/next answers 503 until done
+    srs.start()
+    # Counters load from quiz_attempts in the background, then reconcile periodically
+    progress.start()
+    # Built in the background; submissions use the database until it is ready
+    answer_index.start()
+    search_index.start()
+
+    # Memory-maps the offline-built matrix; hints work without it. Imported
+    # here so numpy loads after the worker is already accepting requests
+    import rag_index
+    rag_index.load()
+
+    if not startup_checks["catalog_warm"]:
+        db = database.SessionLocal()
+        try:
+            cached = catalog_payloads.warm(db, WARM_CATALOG_GROUPS)
+            print(f"startup: cached {cached} catalog pages")
+        except Exception as exc:
+            print(f"startup: catalog warm-up failed, pages load on first request: {exc}")
+        finally:
+            db.close()
+        startup_checks["catalog_warm"] = True
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing here waits for the database, so /health/live passes at once
+    if WORKER_POOL:
+        # Catalog reads come from the master's snapshot; invalidations and
+        # graded answers from sibling workers arrive over the worker bus
+        catalog_snapshot.open_snapshot()
+        worker_bus.subscribe(apply_worker_message)
+    attempt_log.start()
+    threading.Thread(target=prepare, name="startup", daemon=True).start()
+    yield
+    # Drains buffered quiz attempts before the process exits
+    attempt_log.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -28,117 +132,259 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-models.Base.metadata.create_all(bind=engine)
+# Response compression: gzip, br (optional brotli-asgi package, gzip fallback
+# for clients without br) or off. Event streams are never compressed, and
+# quiz packs are zlib-compressed already.
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "gzip").lower()
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1000"))
+
+if RESPONSE_COMPRESSION == "br":
+    try:
+        from brotli_asgi import BrotliMiddleware
+    except ImportError:
+        print("RESPONSE_COMPRESSION=br needs the brotli-asgi package; using gzip.")
+        RESPONSE_COMPRESSION = "gzip"
+    else:
+        app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, excluded_handlers=[r"/stream$", r"/pack$"])
+if RESPONSE_COMPRESSION == "gzip":
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+                       exclude_content_types=(*DEFAULT_EXCLUDED_CONTENT_TYPES, pack_export.MEDIA_TYPE))
+
+# Outermost, so request latency includes compression
+app.add_middleware(RequestMetricsMiddleware)
+
+# Registered before the sync routes below so the async handlers win the match.
+if USE_ASYNC_DB:
+    app.include_router(async_routes.router)
 
 def get_db():
-    db = SessionLocal()
+    db = database.SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
 db_dependency = Annotated[Session, Depends(get_db)]
+if_none_match_header = Annotated[Optional[str], Header()]
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/live")
+def liveness_check():
+    """The process is up and serving; restart it only if this fails."""
+    return {"status": "alive"}
+
+@app.get(
+    "/health/ready",
+    responses={
+        200: {"description": "Startup finished; route traffic here"},
+        503: {"description": "Still starting; the checks show what is pending"},
+    },
+)
+def readiness_check():
+    checks = {
+        **startup_checks,
+        "review_history": srs.scheduler.ready,
+        "progress": progress.is_ready(),
+    }
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "starting", "checks": checks},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/debug/profile", response_class=PlainTextResponse, include_in_schema=False)
+async def get_profile(seconds: float = 10, interval_ms: float = 5, include_idle: bool = False,
+                      x_profiler_token: Annotated[Optional[str], Header()] = None):
+    """Collapsed stacks of this worker for flame graphs; 404 unless PROFILER_ENABLED with a PROFILER_TOKEN."""
+    if not profiler.PROFILER_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not profiler.authorized(x_profiler_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid profiler token")
+    try:
+        folded = await run_in_threadpool(profiler.sample, seconds, max(interval_ms, 1) / 1000, include_idle)
+    except profiler.ProfilerBusy as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from exc
+    return PlainTextResponse(folded)
+
+@app.get(
+    "/search",
+    response_model=List[SearchResult],
+    responses={
+        200: {"description": "Prefix matches: spelling, then Korean meaning (jamo or choseong), then definition words"},
+        503: {"description": "Search index still building"},
+    },
+)
+def search_words(q: str, limit: int = 20):
+    results = search_index.search(q, max(1, min(limit, 100)))
+    if results is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Search index is still building, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    return results
+
+# Listings are paged by keyset: pass the X-Next-Cursor of one page as `after`
+# to get the next; `fields` is a comma-separated subset of the columns.
 @app.get("/groups",
     responses={
-        200: {"description": "Successful response"},
+        200: {"description": "One page of groups, X-Next-Cursor set when more follow"},
+        400: {"description": "Unknown field requested"},
         404: {"description": "Groups not found"}
     })
-def get_groups(db: db_dependency):
-    results = helper_sql.get_group_list()
-    
-    if not results:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"detail": "Groups not found"}
-        )
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=results
-        )
+def get_groups(db: db_dependency, if_none_match: if_none_match_header = None,
+               fields: Optional[str] = None, after: Optional[int] = None, limit: int = catalog_payloads.PAGE_SIZE):
+    columns = catalog_payloads.projection(fields, helper_sql.GROUP_LIST_FIELDS, helper_sql.GROUP_LIST_REQUIRED)
+    payload = catalog_payloads.group_list(db, columns, after, catalog_payloads.page_limit(limit))
+    return catalog_payloads.payload_response(payload, if_none_match, "Groups not found")
 
 @app.get("/groups/{group_id}/items",
     responses={
-        200: {"description": "Successful response"},
+        200: {"description": "One page of items in display order, X-Next-Cursor set when more follow"},
+        400: {"description": "Unknown field requested"},
         404: {"description": "Group items not found"}
     })
-def get_group_items(group_id: int, db: db_dependency):
-    results = helper_sql.get_group_items(group_id)
-    
-    if not results:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"detail": "Group items not found"}
-        )
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=results
-        )
+def get_group_items(group_id: int, db: db_dependency, if_none_match: if_none_match_header = None,
+                    fields: Optional[str] = None, after: Optional[int] = None, limit: int = catalog_payloads.PAGE_SIZE):
+    columns = catalog_payloads.projection(fields, helper_sql.GROUP_ITEM_FIELDS, helper_sql.GROUP_ITEM_REQUIRED)
+    payload = catalog_payloads.group_items(db, group_id, columns, after, catalog_payloads.page_limit(limit))
+    return catalog_payloads.payload_response(payload, if_none_match, "Group items not found")
 
 @app.get("/groups/{group_id}",
     responses={
         200: {"description": "Successful response"},
         404: {"description": "Group footer not found"}
     })
-def get_group_footer(group_id: int, db: db_dependency):
-    results = helper_sql.get_group_footer(group_id)
-    
-    if not results:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"detail": "Group footer not found"}
-        )
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=results
-        )
+def get_group_footer(group_id: int, db: db_dependency, if_none_match: if_none_match_header = None):
+    payload = catalog_payloads.group_footer(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Group footer not found")
 
 @app.get("/items/{item_id}/details",
     responses={
         200: {"description": "Successful response"},
         404: {"description": "Word details not found"}
     })
-def get_word_details(item_id: int, db: db_dependency):
-    results = helper_sql.get_word_details(item_id)
-    
-    if not results:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"detail": "Word details not found"}
-        )
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=results
+def get_word_details(item_id: int, db: db_dependency, if_none_match: if_none_match_header = None):
+    payload = catalog_payloads.word_details(db, item_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Word details not found")
+
+@app.get("/groups/{group_id}/details",
+    responses={
+        200: {"description": "Successful response"},
+        404: {"description": "Word details not found"}
+    })
+def get_group_word_details(group_id: int, db: db_dependency, if_none_match: if_none_match_header = None):
+    payload = catalog_payloads.group_word_details(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Word details not found")
+
+@app.get("/groups/{group_id}/pack",
+    responses={
+        200: {"description": "Offline quiz pack for the group (format in pack_export.py)",
+              "content": {pack_export.MEDIA_TYPE: {}}},
+        404: {"description": "Group not found"}
+    })
+def get_group_pack(group_id: int, db: db_dependency, if_none_match: if_none_match_header = None):
+    payload = pack_export.group_pack(db, group_id)
+    return catalog_payloads.payload_response(payload, if_none_match, "Group not found", pack_export.MEDIA_TYPE)
+
+def require_srs_ready():
+    if not srs.scheduler.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Review history is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
         )
 
 @app.get("/groups/{group_id}/quiz",
     responses={
-        200: {"description": "Successful response"},
-        404: {"description": "Group items not found"}
+        200: {"description": "Quiz items without their spellings"},
+        400: {"description": "Unknown field requested"},
+        404: {"description": "Group items not found"},
+        503: {"description": "Review history still loading (only with user_id)"},
     })
-def get_group_quiz(group_id: int, db: db_dependency):
-    results = helper_sql.get_group_items(group_id)
-    
-    if not results:
-        return JSONResponse(
+def get_group_quiz(group_id: int, db: db_dependency, if_none_match: if_none_match_header = None,
+                   user_id: Optional[int] = None, fields: Optional[str] = None,
+                   after: Optional[int] = None, limit: Optional[int] = None):
+    columns = catalog_payloads.projection(fields, helper_sql.QUIZ_ITEM_FIELDS, helper_sql.GROUP_ITEM_REQUIRED)
+    if user_id is None:
+        page_size = catalog_payloads.page_limit(limit or catalog_payloads.PAGE_SIZE)
+        payload = catalog_payloads.group_items(db, group_id, columns, after, page_size)
+        return catalog_payloads.payload_response(payload, if_none_match, "Group items not found")
+
+    # Per-user quiz: due reviews first, then words the user has not seen
+    require_srs_ready()
+    items = helper_sql.get_group_items(db, group_id, columns)
+    if not items:
+        raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            content={"detail": "Group items not found"}
+            detail="Group items not found",
         )
-    
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content=results
+    return srs.group_quiz(user_id, group_id, items, max(1, min(limit or 10, 100)))
+
+@app.get(
+    "/quiz/next",
+    response_model=List[ReviewItem],
+    responses={
+        200: {"description": "Due items, most overdue first (then unseen items when group_id is given)"},
+        503: {"description": "Review history still loading"},
+    },
+)
+def get_next_reviews(user_id: int, db: db_dependency, group_id: Optional[int] = None, limit: int = 10):
+    require_srs_ready()
+    group_item_ids = None
+    if group_id is not None:
+        items = helper_sql.get_group_items(db, group_id, helper_sql.GROUP_ITEM_REQUIRED)
+        group_item_ids = [item["item_id"] for item in items]
+    return srs.next_items(user_id, group_id, max(1, min(limit, 100)), group_item_ids)
+
+def require_progress_ready():
+    if not progress.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Progress is still loading, please retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+@app.get(
+    "/users/{user_id}/progress",
+    response_model=UserProgress,
+    responses={
+        200: {"description": "Overall and per-group counters, completion and rank"},
+        404: {"description": "No quiz attempts for this user"},
+        503: {"description": "Progress still loading"},
+    },
+)
+def get_user_progress(user_id: int, db: db_dependency):
+    require_progress_ready()
+    result = progress.user_progress(user_id, helper_sql.get_group_sizes(db))
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No quiz attempts for this user",
         )
+    return result
+
+@app.get(
+    "/groups/{group_id}/leaderboard",
+    response_model=Leaderboard,
+    responses={
+        200: {"description": "Top users by items mastered, correct answers, then fewest attempts"},
+        503: {"description": "Progress still loading"},
+    },
+)
+def get_group_leaderboard(group_id: int, limit: int = 10, user_id: Optional[int] = None):
+    require_progress_ready()
+    return progress.leaderboard(group_id, max(1, min(limit, 100)), user_id)
 
 @app.post(
     "/quiz/submit",
@@ -150,6 +396,7 @@ def get_group_quiz(group_id: int, db: db_dependency):
 )
 def submit_quiz(answer: QuizAnswerSubmit, db: db_dependency):
     result = helper_sql.quiz_answer(
+        db,
         answer.item_id,
         answer.user_answer,
         answer.group_id,
@@ -162,8 +409,49 @@ def submit_quiz(answer: QuizAnswerSubmit, db: db_dependency):
             detail="Quiz item not found",
         )
 
+    quiz_batch.record_attempts(answer.user_id, answer.group_id, [(answer.item_id, answer.user_answer, result["is_correct"])])
     return QuizAnswerResponse(**result)
 
+@app.post(
+    "/quiz/submit/batch",
+    response_model=QuizSheetResponse,
+    responses={
+        200: {"description": "Every answer graded; items outside the group are listed in not_found"},
+        413: {"description": "More than QUIZ_SYNC_MAX_ATTEMPTS answers"},
+    },
+)
+def submit_quiz_sheet(sheet: QuizSheetSubmit, db: db_dependency):
+    """Grade and record a whole quiz sheet for one group in one request."""
+    quiz_batch.require_batch_size(len(sheet.answers))
+    graded = helper_sql.grade_sheet(db, sheet.group_id, [(a.item_id, a.user_answer) for a in sheet.answers])
+    quiz_batch.record_attempts(sheet.user_id, sheet.group_id, quiz_batch.recorded(sheet.answers, graded))
+    return quiz_batch.sheet_response(sheet.group_id, sheet.answers, graded)
+
+@app.post(
+    "/quiz/sync",
+    response_model=QuizSyncResponse,
+    responses={
+        200: {"description": "Attempts graded and recorded (not again for a repeated sync_id); unknown items are skipped"},
+        413: {"description": "More than QUIZ_SYNC_MAX_ATTEMPTS answers"},
+    },
+)
+def sync_quiz_attempts(sync: QuizSync, db: db_dependency):
+    """Upload attempts made offline from a quiz pack. They are graded again here."""
+    quiz_batch.require_batch_size(len(sync.attempts))
+    sheets = quiz_batch.sync_sheets(sync.attempts)
+    graded = {
+        group_id: helper_sql.grade_sheet(db, group_id, [(a.item_id, a.user_answer) for a in attempts])
+        for group_id, attempts in sheets.items()
+    }
+    # Claimed only once grading succeeded, and given back if recording fails
+    duplicate = not helper_sql.claim_sync(db, sync.user_id, sync.sync_id)
+    try:
+        return quiz_batch.sync_response(sync, sheets, graded, duplicate)
+    except Exception:
+        if not duplicate:
+            helper_sql.release_sync(db, sync.user_id, sync.sync_id)
+        raise
+
 @app.post(
     "/quiz/hint",
     response_model=HintResponse,
@@ -171,10 +459,11 @@ def submit_quiz(answer: QuizAnswerSubmit, db: db_dependency):
         200: {"description": "Successful response"},
         404: {"description": "Quiz item not found"},
         500: {"description": "Hint generation failed"},
+        503: {"description": "Hint generator busy, retry after the Retry-After delay"},
     },
 )
-def get_quiz_hint(request: HintRequest, db: db_dependency):
-    word_context = helper_sql.get_word_details(request.item_id)
+async def get_quiz_hint(request: HintRequest, db: db_dependency):
+    word_context = await run_in_threadpool(helper_sql.get_word_details, db, request.item_id)
     #test only
     # word_context = {
     #     "spelling": "apple",
@@ -191,11 +480,64 @@ def get_quiz_hint(request: HintRequest, db: db_dependency):
         )
 
     try:
-        hint = helper_rag.generate_hint(word_context)
+        hint = await hint_scheduler.get_hint(word_context)
+    except hint_scheduler.HintQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     except helper_rag.HintGenerationError as exc:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(exc),
         ) from exc
 
-    return HintResponse(item_id=request.item_id, hint=hint)
\ No newline at end of file
+    return HintResponse(item_id=request.item_id, hint=hint)
+
+def _sse(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.get(
+    "/quiz/hint/stream",
+    responses={
+        200: {"description": "Server-Sent Events: token*, then done or error"},
+        404: {"description": "Quiz item not found"},
+        503: {"description": "Hint generator busy; retry after Retry-After seconds"},
+    },
+)
+async def stream_quiz_hint(item_id: int, db: db_dependency):
+    word_context = await run_in_threadpool(helper_sql.get_word_details, db, item_id)
+    if not word_context:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz item not found",
+        )
+
+    # Admitted before the response starts, so shedding is still a plain 503
+    try:
+        fragments = await hint_scheduler.stream_hint(word_context)
+    except hint_scheduler.HintQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+    async def events():
+        parts = []
+        try:
+            async for fragment in fragments:
+                parts.append(fragment)
+                yield _sse("token", {"text": fragment})
+        except helper_rag.HintGenerationError as exc:
+            # Headers are already sent, so failures become an error event
+            yield _sse("error", {"status": status.HTTP_500_INTERNAL_SERVER_ERROR, "detail": str(exc)})
+            return
+        yield _sse("done", {"item_id": item_id, "hint": "".join(parts).strip()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,8 @@
 from database import Base
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, Boolean, DateTime
+from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Users(Base):
     __tablename__ = "users"
@@ -30,12 +31,16 @@ class GroupItems(Base):
     __tablename__ = "group_items"
 
     item_id = Column(Integer, primary_key=True, index=True)
-    group_id = Column(Integer, ForeignKey("groups.group_id"))
+    group_id = Column(Integer, ForeignKey("group_list.group_id"))
     word_id = Column(Integer, ForeignKey("words.word_id"))
     display_order = Column(Integer, nullable=False)
     summary_meaning = Column(String(100))
     display_letter = Column(String(1))
 
+    __table_args__ = (
+        Index("ix_group_items_group_order", "group_id", "display_order", "word_id", "summary_meaning", "display_letter"),
+    )
+
 class WordDetails(Base):
     __tablename__ = "word_details"
 
@@ -46,6 +51,35 @@ class WordDetails(Base):
     example_translation = Column(String(255))
     mnemonic_tip = Column(String(255))
 
+    __table_args__ = (
+        Index("ix_word_details_word", "word_id"),
+    )
+
+class QuizAttempts(Base):
+    __tablename__ = "quiz_attempts"
+
+    attempt_id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    group_id = Column(Integer, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    user_answer = Column(String(100), nullable=False)
+    is_correct = Column(Boolean, nullable=False)
+    answered_at = Column(DateTime, nullable=False)
+    # When the server logged it; differs from answered_at for synced attempts
+    recorded_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_quiz_attempts_user_group", "user_id", "group_id", "answered_at"),
+    )
+
+# Upload ids already applied by /quiz/sync, so a retried upload is not recorded twice
+class QuizSyncs(Base):
+    __tablename__ = "quiz_syncs"
+
+    user_id = Column(Integer, primary_key=True)
+    sync_id = Column(String(64), primary_key=True)
+    received_at = Column(DateTime, nullable=False)
+
 class QuizAnswerSubmit(BaseModel):
     item_id: int
     user_answer: str
@@ -57,6 +91,103 @@ class QuizAnswerResponse(BaseModel):
     correct_answer: str
     user_answer: str
     feedback: str
+    is_close: bool = False
+    edit_distance: Optional[int] = None
+    score: float = 0.0
+
+class QuizSheetAnswer(BaseModel):
+    item_id: int
+    user_answer: str
+
+class QuizSheetSubmit(BaseModel):
+    user_id: int
+    group_id: int
+    answers: List[QuizSheetAnswer]
+
+class QuizSheetResult(QuizAnswerResponse):
+    item_id: int
+
+class QuizSheetResponse(BaseModel):
+    group_id: int
+    answered: int
+    correct: int
+    score: float
+    # In submission order; items not in the group are listed in not_found instead
+    results: List[QuizSheetResult]
+    not_found: List[int]
+
+class QuizSyncAttempt(BaseModel):
+    item_id: int
+    group_id: int
+    user_answer: str
+    # When it was answered offline (naive = UTC); defaults to the upload time
+    answered_at: Optional[datetime] = None
+
+class QuizSync(BaseModel):
+    user_id: int
+    # Client-generated per upload; a retry with the same id is graded, not recorded again
+    sync_id: str = Field(min_length=1, max_length=64)
+    attempts: List[QuizSyncAttempt]
+
+class QuizSyncResponse(BaseModel):
+    accepted: int
+    correct: int
+    # True when sync_id was already applied and nothing was recorded this time
+    duplicate: bool = False
+    # In request order; None where the item was not found
+    results: List[Optional[QuizAnswerResponse]]
+
+class ReviewItem(BaseModel):
+    item_id: int
+    group_id: int
+    due_at: Optional[float] = None
+    is_new: bool
+
+class SearchResult(BaseModel):
+    item_id: int
+    group_id: int
+    spelling: str
+    summary_meaning: str
+    match: str
+
+class GroupProgress(BaseModel):
+    group_id: int
+    attempts: int
+    correct: int
+    accuracy: float
+    streak: int
+    best_streak: int
+    last_seen: float
+    mastered_items: int
+    item_count: int
+    completion: float
+    rank: int
+
+class UserProgress(BaseModel):
+    user_id: int
+    attempts: int
+    correct: int
+    accuracy: float
+    streak: int
+    best_streak: int
+    last_seen: float
+    mastered_items: int
+    rank: int
+    groups: List[GroupProgress]
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    mastered_items: int
+    correct: int
+    attempts: int
+    accuracy: float
+
+class Leaderboard(BaseModel):
+    group_id: Optional[int] = None
+    total_users: int
+    entries: List[LeaderboardEntry]
+    user: Optional[LeaderboardEntry] = None
 
 class HintRequest(BaseModel):
     item_id: int
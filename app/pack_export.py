@@ -0,0 +1,283 @@
+"""
+Offline quiz packs: everything a client needs to run one group's quiz locally.
+
+A pack holds the group's items with their word details, the pre-generated
+hints from the hint cache and the normalized answers plus the typo allowance
+of each, so a client grades with the same rules as /quiz/submit and sends
+the attempts back in one POST /quiz/sync. Packs carry the answers by design;
+the server grades synced attempts again and never trusts the client's result.
+
+Layout: magic b"VOKAPACK", a format version byte, then one zlib stream of
+
+    strings  count, then each string as its UTF-8 byte length + bytes
+    header   group_id, group_number, then string refs for title_kr,
+             footer_phrase_en, footer_phrase_kr, hint model, prompt version
+    items    count, then per item: item_id and display_order as signed
+             deltas from the previous item, typos allowed, string
+             refs for spelling, normalized answer, summary_meaning,
+             display_letter, full_definition, example_sentence,
+             example_translation, mnemonic_tip, then hint count and refs
+
+Integers are LEB128 varints (signed ones zigzag-encoded). A string ref is an
+index into the string table, whose entry 0 is "" and stands for missing
+values. Every distinct string is stored once.
+
+    python pack_export.py --groups 1 2 3 --output-dir packs
+    python pack_export.py --inspect packs/group-1.vokapack
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import answer_index
+import helper_rag
+import helper_sql
+from catalog_cache import cached
+from catalog_payloads import Payload
+
+MAGIC = b"VOKAPACK"
+FORMAT_VERSION = 1
+MEDIA_TYPE = "application/vnd.voka.pack"
+
+_DETAIL_FIELDS = ("full_definition", "example_sentence", "example_translation", "mnemonic_tip")
+ITEM_STRING_FIELDS = ("spelling", "normalized", "summary_meaning", "display_letter") + _DETAIL_FIELDS
+HEADER_STRING_FIELDS = ("title_kr", "footer_phrase_en", "footer_phrase_kr", "model", "prompt_version")
+
+
+def write_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError("varints are unsigned; zigzag-encode signed values")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def write_signed(out: bytearray, value: int) -> None:
+    write_varint(out, (value << 1) ^ (value >> 63))
+
+
+def read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def read_signed(data: bytes, pos: int) -> Tuple[int, int]:
+    value, pos = read_varint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+
+class StringTable:
+    def __init__(self):
+        self.strings: List[str] = [""]
+        self._refs: Dict[str, int] = {"": 0}
+
+    def ref(self, value: Optional[str]) -> int:
+        value = value or ""
+        ref = self._refs.get(value)
+        if ref is None:
+            ref = self._refs[value] = len(self.strings)
+            self.strings.append(value)
+        return ref
+
+    def encode(self, out: bytearray) -> None:
+        write_varint(out, len(self.strings))
+        for value in self.strings:
+            data = value.encode("utf-8")
+            write_varint(out, len(data))
+            out += data
+
+
+def encode_pack(group: Dict[str, Any], items: List[Dict[str, Any]]) -> bytes:
+    """Pack a group (HEADER_STRING_FIELDS + group_id/number) and its items, in display order."""
+    strings = StringTable()
+    body = bytearray()
+    write_varint(body, group["group_id"])
+    write_varint(body, group["group_number"])
+    for field in HEADER_STRING_FIELDS:
+        write_varint(body, strings.ref(group.get(field)))
+
+    write_varint(body, len(items))
+    previous_item = previous_order = 0
+    for item in items:
+        write_signed(body, item["item_id"] - previous_item)
+        write_signed(body, item["display_order"] - previous_order)
+        previous_item, previous_order = item["item_id"], item["display_order"]
+        write_varint(body, item["typos_allowed"])
+        for field in ITEM_STRING_FIELDS:
+            write_varint(body, strings.ref(item.get(field)))
+        write_varint(body, len(item["hints"]))
+        for hint in item["hints"]:
+            write_varint(body, strings.ref(hint))
+
+    content = bytearray()
+    strings.encode(content)
+    content += body
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(bytes(content), 9)
+
+
+def decode_pack(data: bytes) -> Dict[str, Any]:
+    """The inverse of encode_pack; raises ValueError for other files or versions."""
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a quiz pack")
+    version = data[len(MAGIC)]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Pack format {version} is not supported (expected {FORMAT_VERSION})")
+    content = zlib.decompress(data[len(MAGIC) + 1:])
+
+    count, pos = read_varint(content, 0)
+    strings = []
+    for _ in range(count):
+        length, pos = read_varint(content, pos)
+        strings.append(content[pos:pos + length].decode("utf-8"))
+        pos += length
+
+    group: Dict[str, Any] = {}
+    group["group_id"], pos = read_varint(content, pos)
+    group["group_number"], pos = read_varint(content, pos)
+    for field in HEADER_STRING_FIELDS:
+        ref, pos = read_varint(content, pos)
+        group[field] = strings[ref]
+
+    count, pos = read_varint(content, pos)
+    items = []
+    item_id = display_order = 0
+    for _ in range(count):
+        delta, pos = read_signed(content, pos)
+        item_id += delta
+        delta, pos = read_signed(content, pos)
+        display_order += delta
+        item: Dict[str, Any] = {"item_id": item_id, "display_order": display_order}
+        item["typos_allowed"], pos = read_varint(content, pos)
+        for field in ITEM_STRING_FIELDS:
+            ref, pos = read_varint(content, pos)
+            item[field] = strings[ref]
+        hints, pos = read_varint(content, pos)
+        item["hints"] = []
+        for _ in range(hints):
+            ref, pos = read_varint(content, pos)
+            item["hints"].append(strings[ref])
+        items.append(item)
+    group["items"] = items
+    return group
+
+
+def _group(groups: List[Dict[str, Any]], group_id: int) -> Optional[Dict[str, Any]]:
+    for group in groups:
+        if group["group_id"] == group_id:
+            return group
+    return None
+
+
+def _assemble(group: Dict[str, Any], rows: List[Dict[str, Any]], footer: Optional[Dict[str, Any]],
+              detail_rows: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    import hint_cache
+
+    details: Dict[int, Dict[str, Any]] = {}
+    for row in detail_rows:
+        # A word with several detail rows keeps the first one, as /items/{id}/details does
+        details.setdefault(row["item_id"], row)
+    header = {
+        **group,
+        **(footer or {}),
+        "model": helper_rag.model_name(),
+        "prompt_version": helper_rag.PROMPT_VERSION,
+    }
+    items = []
+    for row in rows:
+        detail = details.get(row["item_id"], {})
+        normalized = answer_index.normalize(row["spelling"])
+        items.append({
+            **row,
+            **{field: detail.get(field) for field in _DETAIL_FIELDS},
+            "normalized": normalized,
+            "typos_allowed": answer_index.allowed_distance(normalized),
+            "hints": hint_cache.cache.variants_for(row["item_id"]),
+        })
+    return header, items
+
+
+def collect(db, group_id: int) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """The group header and its items with details, answers and cached hints; None if unknown."""
+    group = _group(helper_sql.get_group_list(db), group_id)
+    rows = helper_sql.get_group_items(db, group_id)
+    if group is None or not rows:
+        return None
+    return _assemble(group, rows, helper_sql.get_group_footer(db, group_id),
+                     helper_sql.get_group_word_details(db, group_id))
+
+
+async def collect_async(db, group_id: int) -> Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """collect() over an AsyncSession, for the USE_ASYNC_DB routes."""
+    import helper_sql_async
+
+    group = _group(await helper_sql_async.get_group_list(db), group_id)
+    rows = await helper_sql_async.get_group_items(db, group_id)
+    if group is None or not rows:
+        return None
+    return _assemble(group, rows, await helper_sql_async.get_group_footer(db, group_id),
+                     await helper_sql_async.get_group_word_details(db, group_id))
+
+
+def _payload(collected: Optional[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> Optional[Payload]:
+    if collected is None:
+        return None
+    body = encode_pack(*collected)
+    return Payload(body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"')
+
+
+@cached("payload:pack")
+def group_pack(db, group_id: int) -> Optional[Payload]:
+    return _payload(collect(db, group_id))
+
+
+@cached("payload:pack")
+async def group_pack_async(db, group_id: int) -> Optional[Payload]:
+    return _payload(await collect_async(db, group_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export offline quiz packs, or print one.")
+    parser.add_argument("--groups", type=int, nargs="*", default=[], help="Group ids (default: every group).")
+    parser.add_argument("--output-dir", default="packs")
+    parser.add_argument("--inspect", metavar="PACK", help="Decode a pack file and print it as JSON.")
+    args = parser.parse_args()
+
+    if args.inspect:
+        with open(args.inspect, "rb") as f:
+            print(json.dumps(decode_pack(f.read()), ensure_ascii=False, indent=2))
+        return
+
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        group_ids = args.groups or [group["group_id"] for group in helper_sql.get_group_list(db)]
+        os.makedirs(args.output_dir, exist_ok=True)
+        for group_id in group_ids:
+            payload = group_pack(db, group_id)
+            if payload is None:
+                print(f"Group {group_id}: not found, skipping.")
+                continue
+            path = os.path.join(args.output_dir, f"group-{group_id}.vokapack")
+            with open(path, "wb") as f:
+                f.write(payload.body)
+            print(f"Group {group_id}: {len(payload.body)} bytes -> {path}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
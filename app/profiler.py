@@ -0,0 +1,91 @@
+"""
+Opt-in sampling profiler for capturing flame graphs from a running worker.
+
+A background thread snapshots every other thread's Python stack with
+sys._current_frames() at a fixed interval and counts identical stacks. The
+result is in the collapsed ("folded") format read by flamegraph.pl,
+speedscope and inferno: one "frame;frame;frame count" line per stack, root
+first. Sampling costs nothing while no profile is running, and only one
+profile runs per process at a time.
+
+    PROFILER_ENABLED=true PROFILER_TOKEN=... uvicorn main:app
+    curl -H "X-Profiler-Token: $PROFILER_TOKEN" \\
+        "localhost:8000/debug/profile?seconds=30" > app.folded
+    flamegraph.pl app.folded > app.svg
+"""
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+# Required in the X-Profiler-Token header; without one the profiler stays off
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN") or None
+if PROFILER_ENABLED and PROFILER_TOKEN is None:
+    print("profiler: PROFILER_ENABLED is ignored without PROFILER_TOKEN; /debug/profile stays disabled.")
+    PROFILER_ENABLED = False
+MAX_SECONDS = float(os.getenv("PROFILER_MAX_SECONDS", "60"))
+
+_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is already being captured in this process."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+def sample(seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+    """
+    Sample all threads for `seconds` and return collapsed stacks. Threads
+    parked in a wait (idle pool workers, the event loop's selector) are left
+    out unless include_idle is set, so the graph shows where work happens.
+    """
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker.")
+    try:
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + min(seconds, MAX_SECONDS)
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not include_idle and _is_idle(frame):
+                    continue
+                thread_name = names.get(ident) or f"thread-{ident}"
+                stacks[thread_name + ";" + _stack(frame)] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    finally:
+        _lock.release()
+
+
+_IDLE_FUNCTIONS = {"wait", "select", "poll", "_worker", "get", "accept", "sleep"}
+_IDLE_FILES = {"threading.py", "selectors.py", "queue.py", "thread.py", "socket.py"}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return code.co_name in _IDLE_FUNCTIONS and os.path.basename(code.co_filename) in _IDLE_FILES
+
+
+def authorized(token: Optional[str]) -> bool:
+    if PROFILER_TOKEN is None:
+        return False
+    return token is not None and hmac.compare_digest(token.encode("utf-8"), PROFILER_TOKEN.encode("utf-8"))
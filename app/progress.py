@@ -0,0 +1,332 @@
+"""
+Per-user progress and group leaderboards, maintained incrementally.
+
+Every graded answer updates running counters (attempts, correct, current and
+best streak, last seen, distinct items answered correctly) for the user's
+(user, group) pair and for the user overall. Each group, plus the overall
+board under None, keeps its users in a SortedList of rank keys, so a rank
+lookup is a bisect and a submission moves one key in O(log n).
+
+Like srs, the state is derived from quiz_attempts: it is replayed at startup
+and then updated per /quiz/submit. A reconcile job rebuilds it from the table
+every PROGRESS_RECONCILE_SECONDS and swaps it in, which corrects any drift and
+folds in submissions handled by other workers.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sortedcontainers import SortedList
+
+import metrics
+
+_RECONCILE_SECONDS = float(os.getenv("PROGRESS_RECONCILE_SECONDS", "3600"))
+
+PROGRESS_UPDATES = metrics.Counter("progress_updates_total", "Graded answers applied to progress counters.")
+PROGRESS_USERS = metrics.Gauge("progress_users", "Users with progress counters.", fn=lambda: len(board._user_groups))
+PROGRESS_REBUILD_SECONDS = metrics.Histogram("progress_rebuild_seconds", "Time to rebuild progress from quiz_attempts.",
+                                             buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+PROGRESS_DRIFT = metrics.Gauge("progress_reconcile_drift",
+                               "Counters the last reconcile found different from the live state.")
+
+CounterKey = Tuple[int, Optional[int]]
+
+
+class Counters:
+    __slots__ = ("attempts", "correct", "streak", "best_streak", "last_seen", "mastered")
+
+    def __init__(self):
+        self.attempts = 0
+        self.correct = 0
+        self.streak = 0
+        self.best_streak = 0
+        self.last_seen = 0.0
+        self.mastered: Set[int] = set()
+
+    @property
+    def accuracy(self) -> float:
+        return self.correct / self.attempts if self.attempts else 0.0
+
+    def rank_key(self, user_id: int) -> Tuple[int, int, int, int]:
+        """Ascending sort order: most items mastered, then most correct, then fewest attempts."""
+        return (-len(self.mastered), -self.correct, self.attempts, user_id)
+
+    def as_tuple(self) -> Tuple:
+        return (self.attempts, self.correct, self.streak, self.best_streak, len(self.mastered))
+
+
+class ProgressBoard:
+    def __init__(self, started_at: Optional[float] = None):
+        self._counters: Dict[CounterKey, Counters] = {}
+        self._boards: Dict[Optional[int], SortedList] = {}
+        self._user_groups: Dict[int, Set[int]] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        self._pending: List[Tuple[int, int, int, bool, float]] = []
+        # Replay covers attempts recorded before this board was created; later
+        # ones arrive through record() and wait in _pending until it is ready
+        self.started_at = time.time() if started_at is None else started_at
+
+    def record(self, user_id: int, group_id: int, item_id: int, correct: bool, answered_at: float) -> None:
+        with self._lock:
+            if not self.ready:
+                self._pending.append((user_id, group_id, item_id, correct, answered_at))
+                return
+            self._apply(user_id, group_id, item_id, correct, answered_at)
+
+    def _apply(self, user_id: int, group_id: int, item_id: int, correct: bool, answered_at: float,
+               ranked: bool = True) -> None:
+        """Update both counter sets; `ranked` also moves the user's leaderboard keys."""
+        self._user_groups.setdefault(user_id, set()).add(group_id)
+        for key in ((user_id, group_id), (user_id, None)):
+            counters = self._counters.get(key)
+            if ranked:
+                leaderboard = self._boards.get(key[1])
+                if leaderboard is None:
+                    leaderboard = self._boards[key[1]] = SortedList()
+                if counters is not None:
+                    leaderboard.remove(counters.rank_key(user_id))
+            if counters is None:
+                counters = self._counters[key] = Counters()
+            counters.attempts += 1
+            if correct:
+                counters.correct += 1
+                counters.mastered.add(item_id)
+            # An answer older than the last one seen (a synced backlog) counts,
+            # but streaks are left to the next rebuild, which sorts by answered_at
+            if answered_at >= counters.last_seen:
+                if correct:
+                    counters.streak += 1
+                    counters.best_streak = max(counters.best_streak, counters.streak)
+                else:
+                    counters.streak = 0
+                counters.last_seen = answered_at
+            if ranked:
+                leaderboard.add(counters.rank_key(user_id))
+        PROGRESS_UPDATES.inc()
+
+    def replay(self, rows, chunk_size: int = 10000) -> int:
+        """
+        Build counters from (user_id, group_id, item_id, is_correct, answered_at)
+        rows, oldest first, then apply what was recorded meanwhile. Boards are
+        sorted once at the end instead of re-ranking on every row.
+        """
+        count = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                count += self._apply_chunk(chunk)
+                chunk = []
+        count += self._apply_chunk(chunk)
+        with self._lock:
+            boards: Dict[Optional[int], List] = {}
+            for (user_id, group_id), counters in self._counters.items():
+                boards.setdefault(group_id, []).append(counters.rank_key(user_id))
+            self._boards = {group_id: SortedList(keys) for group_id, keys in boards.items()}
+            for update in self._pending:
+                self._apply(*update)
+            self._pending = []
+            self.ready = True
+        return count
+
+    def _apply_chunk(self, chunk) -> int:
+        with self._lock:
+            for user_id, group_id, item_id, is_correct, answered_at in chunk:
+                self._apply(user_id, group_id, item_id, bool(is_correct), answered_at, ranked=False)
+        return len(chunk)
+
+    def _entry(self, user_id: int, group_id: Optional[int], counters: Counters) -> Dict:
+        return {
+            "rank": self._boards[group_id].bisect_left(counters.rank_key(user_id)) + 1,
+            "user_id": user_id,
+            "mastered_items": len(counters.mastered),
+            "correct": counters.correct,
+            "attempts": counters.attempts,
+            "accuracy": counters.accuracy,
+        }
+
+    def rank(self, user_id: int, group_id: Optional[int] = None) -> Optional[int]:
+        """1-based position on a group's board (None: overall), in O(log n)."""
+        with self._lock:
+            counters = self._counters.get((user_id, group_id))
+            if counters is None:
+                return None
+            return self._boards[group_id].bisect_left(counters.rank_key(user_id)) + 1
+
+    def leaderboard(self, group_id: Optional[int], limit: int = 10, user_id: Optional[int] = None) -> Dict:
+        with self._lock:
+            leaderboard = self._boards.get(group_id) or SortedList()
+            entries = []
+            for key in leaderboard.islice(0, limit):
+                entry = self._entry(key[-1], group_id, self._counters[(key[-1], group_id)])
+                entries.append(entry)
+            user = None
+            if user_id is not None and (user_id, group_id) in self._counters:
+                user = self._entry(user_id, group_id, self._counters[(user_id, group_id)])
+            return {"group_id": group_id, "total_users": len(leaderboard), "entries": entries, "user": user}
+
+    def progress(self, user_id: int, group_sizes: Dict[int, int]) -> Optional[Dict]:
+        """The user's overall counters and one row per group attempted, by group_id."""
+        with self._lock:
+            overall = self._counters.get((user_id, None))
+            if overall is None:
+                return None
+            groups = []
+            for group_id in sorted(self._user_groups.get(user_id, ())):
+                counters = self._counters[(user_id, group_id)]
+                size = group_sizes.get(group_id, 0)
+                groups.append({
+                    "group_id": group_id,
+                    "attempts": counters.attempts,
+                    "correct": counters.correct,
+                    "accuracy": counters.accuracy,
+                    "streak": counters.streak,
+                    "best_streak": counters.best_streak,
+                    "last_seen": counters.last_seen,
+                    "mastered_items": len(counters.mastered),
+                    "item_count": size,
+                    "completion": min(len(counters.mastered) / size, 1.0) if size else 0.0,
+                    "rank": self._boards[group_id].bisect_left(counters.rank_key(user_id)) + 1,
+                })
+            return {
+                "user_id": user_id,
+                "attempts": overall.attempts,
+                "correct": overall.correct,
+                "accuracy": overall.accuracy,
+                "streak": overall.streak,
+                "best_streak": overall.best_streak,
+                "last_seen": overall.last_seen,
+                "mastered_items": len(overall.mastered),
+                "rank": self._boards[None].bisect_left(overall.rank_key(user_id)) + 1,
+                "groups": groups,
+            }
+
+    def drift(self, other: "ProgressBoard") -> int:
+        """Counter sets that differ between two boards."""
+        with self._lock, other._lock:
+            keys = self._counters.keys() | other._counters.keys()
+            return sum(
+                1 for key in keys
+                if key not in self._counters or key not in other._counters
+                or self._counters[key].as_tuple() != other._counters[key].as_tuple()
+            )
+
+
+board = ProgressBoard()
+# Board being rebuilt by the reconcile job; it receives live updates too
+_rebuilding: Optional[ProgressBoard] = None
+_swap_lock = threading.Lock()
+
+
+def _rows(db, cutoff: float):
+    from sqlalchemy import select
+    from models import QuizAttempts
+
+    # Times are stored as naive UTC; rows recorded from the cutoff on reach the
+    # board through record() instead, whenever they were answered
+    cutoff_at = datetime.fromtimestamp(cutoff, timezone.utc).replace(tzinfo=None)
+    query = (
+        select(QuizAttempts.user_id, QuizAttempts.group_id, QuizAttempts.item_id,
+               QuizAttempts.is_correct, QuizAttempts.answered_at)
+        .where(QuizAttempts.recorded_at < cutoff_at)
+        .order_by(QuizAttempts.answered_at, QuizAttempts.attempt_id)
+    )
+    rows = db.execute(query, execution_options={"yield_per": 10000})
+    return ((u, g, i, c, a.replace(tzinfo=timezone.utc).timestamp()) for u, g, i, c, a in rows)
+
+
+def _build(target: ProgressBoard) -> int:
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return target.replay(_rows(db, target.started_at))
+    finally:
+        db.close()
+
+
+def _load() -> None:
+    started = time.perf_counter()
+    try:
+        count = _build(board)
+    except Exception as exc:
+        print(f"progress: loading quiz_attempts failed, starting from empty counters: {exc}")
+        board.replay([])
+        return
+    PROGRESS_REBUILD_SECONDS.observe(time.perf_counter() - started)
+    print(f"progress: loaded {count} quiz attempts in {time.perf_counter() - started:.1f}s")
+
+
+def reconcile() -> int:
+    """Rebuild from quiz_attempts next to the live board and swap it in. Returns the drift."""
+    global board, _rebuilding
+    import attempt_log
+
+    started = time.perf_counter()
+    with _swap_lock:
+        # Stamped under the lock, so every record() that sees _rebuilding unset
+        # was recorded before the cutoff and is read back from the table
+        _rebuilding = fresh = ProgressBoard(time.time())
+    try:
+        # Attempts recorded before the cutoff must be in the table when it is read
+        attempt_log.log.flush()
+        _build(fresh)
+    except Exception:
+        with _swap_lock:
+            _rebuilding = None
+        raise
+    drift = board.drift(fresh)
+    with _swap_lock:
+        board, _rebuilding = fresh, None
+    PROGRESS_DRIFT.set(drift)
+    PROGRESS_REBUILD_SECONDS.observe(time.perf_counter() - started)
+    return drift
+
+
+def _reconcile_loop() -> None:
+    while True:
+        time.sleep(_RECONCILE_SECONDS)
+        try:
+            drift = reconcile()
+        except Exception as exc:
+            print(f"progress: reconcile failed, keeping the live counters: {exc}")
+            continue
+        if drift:
+            print(f"progress: reconcile corrected {drift} counters")
+
+
+def start() -> None:
+    threading.Thread(target=_load, name="progress-load", daemon=True).start()
+    if _RECONCILE_SECONDS > 0:
+        threading.Thread(target=_reconcile_loop, name="progress-reconcile", daemon=True).start()
+
+
+def record(user_id: int, group_id: int, item_id: int, correct: bool, answered_at: Optional[float] = None,
+           recorded_at: Optional[float] = None) -> None:
+    """
+    Apply a graded answer. `recorded_at` is attempt_log's stamp for its row:
+    a board being rebuilt reads rows recorded before its cutoff from the
+    table, so it only takes the later ones from here.
+    """
+    answered_at = time.time() if answered_at is None else answered_at
+    recorded_at = time.time() if recorded_at is None else recorded_at
+    with _swap_lock:
+        current, rebuilding = board, _rebuilding
+    current.record(user_id, group_id, item_id, correct, answered_at)
+    if rebuilding is not None and recorded_at >= rebuilding.started_at:
+        rebuilding.record(user_id, group_id, item_id, correct, answered_at)
+
+
+def is_ready() -> bool:
+    return board.ready
+
+
+def user_progress(user_id: int, group_sizes: Dict[int, int]) -> Optional[Dict]:
+    return board.progress(user_id, group_sizes)
+
+
+def leaderboard(group_id: Optional[int], limit: int = 10, user_id: Optional[int] = None) -> Dict:
+    return board.leaderboard(group_id, limit, user_id)
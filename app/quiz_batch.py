@@ -0,0 +1,108 @@
+"""
+Recording graded answers and shaping batch results, shared by the sync and
+async quiz routes.
+"""
+import os
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from models import QuizAnswerResponse, QuizSheetResult, QuizSheetResponse, QuizSync, QuizSyncAttempt, QuizSyncResponse
+import attempt_log
+import progress
+import srs
+import worker_bus
+
+# Most answers accepted by one /quiz/sync or /quiz/submit/batch
+QUIZ_SYNC_MAX_ATTEMPTS = int(os.getenv("QUIZ_SYNC_MAX_ATTEMPTS", "1000"))
+
+
+def record_attempts(user_id: int, group_id: int, attempts: List[Tuple[int, str, bool]],
+                    answered_at: Optional[List[float]] = None) -> None:
+    """
+    Log (item_id, user_answer, is_correct) attempts as one buffered batch and
+    apply them to srs and progress, here and in the sibling workers.
+    `answered_at` gives each attempt's epoch time; by default they happen now.
+    """
+    if not attempts:
+        return
+    if answered_at is None:
+        answered_at = [time.time()] * len(attempts)
+    recorded_at = attempt_log.record_many(user_id, group_id, attempts, answered_at)
+    for (item_id, _, is_correct), at in zip(attempts, answered_at):
+        srs.record_review(user_id, group_id, item_id, is_correct, at)
+        progress.record(user_id, group_id, item_id, is_correct, at, recorded_at)
+    worker_bus.share_graded(user_id, group_id, [
+        (item_id, is_correct, at) for (item_id, _, is_correct), at in zip(attempts, answered_at)
+    ], recorded_at)
+
+
+def require_batch_size(count: int) -> None:
+    if count > QUIZ_SYNC_MAX_ATTEMPTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {QUIZ_SYNC_MAX_ATTEMPTS} answers per request",
+        )
+
+
+def recorded(answers: List, graded: List[Optional[Dict]]) -> List[Tuple[int, str, bool]]:
+    """The attempts worth recording: answers to items that were found."""
+    return [(answer.item_id, answer.user_answer, result["is_correct"])
+            for answer, result in zip(answers, graded) if result is not None]
+
+
+def sheet_response(group_id: int, answers: List, graded: List[Optional[Dict]]) -> QuizSheetResponse:
+    results = [QuizSheetResult(item_id=answer.item_id, **result)
+               for answer, result in zip(answers, graded) if result is not None]
+    return QuizSheetResponse(
+        group_id=group_id,
+        answered=len(results),
+        correct=sum(result.is_correct for result in results),
+        score=sum(result.score for result in results),
+        results=results,
+        not_found=[answer.item_id for answer, result in zip(answers, graded) if result is None],
+    )
+
+
+def offline_time(answered_at: Optional[datetime], now: float) -> float:
+    """Epoch time of a synced attempt: naive means UTC, missing or future means now."""
+    if answered_at is None:
+        return now
+    if answered_at.tzinfo is None:
+        answered_at = answered_at.replace(tzinfo=timezone.utc)
+    return min(answered_at.timestamp(), now)
+
+
+def sync_sheets(attempts: List[QuizSyncAttempt]) -> Dict[int, List[QuizSyncAttempt]]:
+    """Synced attempts per group, in upload order, so each group is graded as one sheet."""
+    sheets: Dict[int, List[QuizSyncAttempt]] = {}
+    for attempt in attempts:
+        sheets.setdefault(attempt.group_id, []).append(attempt)
+    return sheets
+
+
+def sync_response(sync: QuizSync, sheets: Dict[int, List[QuizSyncAttempt]],
+                  graded: Dict[int, List[Optional[Dict]]], duplicate: bool) -> QuizSyncResponse:
+    """
+    Record each group's graded sheet at the attempts' own times, unless the
+    upload is a duplicate, and answer with the results in upload order.
+    """
+    if not duplicate:
+        now = time.time()
+        for group_id, attempts in sheets.items():
+            found = [attempt for attempt, result in zip(attempts, graded[group_id]) if result is not None]
+            record_attempts(sync.user_id, group_id, recorded(attempts, graded[group_id]),
+                            [offline_time(attempt.answered_at, now) for attempt in found])
+    remaining = {group_id: iter(results) for group_id, results in graded.items()}
+    results = []
+    for attempt in sync.attempts:
+        result = next(remaining[attempt.group_id])
+        results.append(QuizAnswerResponse(**result) if result is not None else None)
+    return QuizSyncResponse(
+        accepted=sum(result is not None for result in results),
+        correct=sum(result is not None and result.is_correct for result in results),
+        duplicate=duplicate,
+        results=results,
+    )
@@ -0,0 +1,316 @@
+"""
+Related-word retrieval for hint prompts.
+
+Every word is embedded as a hashed, signed TF-IDF vector of character n-grams
+over its spelling, Korean meanings and definition (no model download, CPU
+only), L2-normalized and stored as a float32 .npy matrix. The server maps the
+matrix read-only (np.load(mmap_mode="r")), so loading is zero-copy and pages
+are shared between workers; a query is one matrix-vector product plus
+argpartition. Words from the same group get a small score bonus.
+
+Build the index offline (from the database, or from catalog CSVs):
+
+    python rag_index.py
+    python rag_index.py --data-dir data --output-dir data/rag_index
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import metrics
+
+_DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rag_index")
+_INDEX_DIR = os.getenv("RAG_INDEX_DIR", _DEFAULT_DIR)
+_TOP_K = int(os.getenv("RAG_RELATED_K", "3"))
+_MIN_SCORE = float(os.getenv("RAG_MIN_SCORE", "0.2"))
+_GROUP_BONUS = float(os.getenv("RAG_GROUP_BONUS", "0.1"))
+
+DEFAULT_DIM = 256
+# Feature hashes are folded to this many buckets for the IDF table, then to `dim`
+_BUCKETS = 1 << 20
+FORMAT_VERSION = 1
+# Arrays saved next to words.json, under generation-stamped names it lists
+_ARRAYS = ("vectors", "groups", "idf")
+_ARRAY_FILE = re.compile(r"^(?:vectors|groups|idf)(?:\.\d+)?\.npy$")
+
+# Meanings weigh double: shared Korean meanings are the best synonym signal
+FIELD_WEIGHTS = (("spelling", 1.0), ("meanings", 2.0), ("definition", 1.0))
+
+_TOKEN = re.compile(r"\w+")
+
+RAG_QUERY_SECONDS = metrics.Histogram("rag_related_query_seconds", "Time to find related words for a hint prompt.")
+
+RAG_WORDS_QUERY = """
+Select
+    w.word_id,
+    w.spelling,
+    gi.group_id,
+    gi.summary_meaning,
+    wd.full_definition
+From words w
+Join group_items gi On gi.word_id = w.word_id
+Left Join word_details wd On wd.word_id = w.word_id
+Order By w.word_id, gi.item_id
+"""
+
+
+def _is_hangul(token: str) -> bool:
+    return any("가" <= ch <= "힣" for ch in token)
+
+
+def features(value: str) -> Iterable[str]:
+    """Whole tokens plus char n-grams: 1-2 syllables for Hangul, 3-5 letters otherwise."""
+    for token in _TOKEN.findall(value.casefold()):
+        yield "w:" + token
+        if _is_hangul(token):
+            sizes, padded = (1, 2), token
+        else:
+            sizes, padded = (3, 4, 5), f"<{token}>"
+        for n in sizes:
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n]
+
+
+def bucket_counts(doc: Dict[str, str]) -> Counter:
+    counts: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for feature in features(doc.get(field) or ""):
+            counts[zlib.crc32(feature.encode("utf-8")) & (_BUCKETS - 1)] += weight
+    return counts
+
+
+def embed(counts: Counter, idf: np.ndarray, dim: int) -> np.ndarray:
+    """Sublinear TF-IDF, folded into `dim` signed slots and L2-normalized."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for bucket, tf in counts.items():
+        sign = 1.0 if (bucket >> 19) & 1 else -1.0
+        vector[bucket % dim] += sign * (1.0 + math.log(tf)) * idf[bucket]
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class RelatedWordIndex:
+    def __init__(self):
+        self.vectors: Optional[np.ndarray] = None
+        self.groups: Optional[np.ndarray] = None
+        self.idf: Optional[np.ndarray] = None
+        self.word_ids: List[int] = []
+        self.spellings: List[str] = []
+        self.meanings: List[str] = []
+        self.dim = DEFAULT_DIM
+        self._rows: Dict[int, int] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.vectors is not None
+
+    def load(self, path: str = _INDEX_DIR) -> bool:
+        meta = _read_meta(path)
+        if meta is None:
+            return False
+        if meta.get("version") != FORMAT_VERSION:
+            print(f"rag_index: {path} has format {meta.get('version')}, expected {FORMAT_VERSION}; rebuild it.")
+            return False
+        files = _array_files(meta)
+        # mmap_mode="r": pages are read on demand and shared, nothing is copied
+        self.vectors = np.load(os.path.join(path, files["vectors"]), mmap_mode="r")
+        self.groups = np.load(os.path.join(path, files["groups"]), mmap_mode="r")
+        self.idf = np.load(os.path.join(path, files["idf"]), mmap_mode="r")
+        self.dim = meta["dim"]
+        self.word_ids = meta["word_ids"]
+        self.spellings = meta["spellings"]
+        self.meanings = meta["meanings"]
+        self._rows = {word_id: row for row, word_id in enumerate(self.word_ids)}
+        return True
+
+    def query_vector(self, word_context: Dict[str, Any]) -> np.ndarray:
+        row = self._rows.get(word_context.get("word_id"))
+        if row is not None:
+            return np.asarray(self.vectors[row])
+        doc = {
+            "spelling": word_context.get("spelling", ""),
+            "meanings": word_context.get("summary_meaning", ""),
+            "definition": word_context.get("full_definition", ""),
+        }
+        return embed(bucket_counts(doc), self.idf, self.dim)
+
+    def related(self, word_context: Dict[str, Any], k: int = _TOP_K, min_score: float = _MIN_SCORE,
+                group_bonus: float = _GROUP_BONUS) -> List[Dict[str, Any]]:
+        """Top-k words by cosine similarity (plus the same-group bonus), excluding the word itself."""
+        if not self.ready or k <= 0:
+            return []
+        started = time.perf_counter()
+        scores = self.vectors @ self.query_vector(word_context)
+        group_id = word_context.get("group_id")
+        if group_id is not None and group_bonus:
+            scores = scores + group_bonus * (self.groups == group_id)
+        row = self._rows.get(word_context.get("word_id"))
+        if row is not None:
+            scores[row] = -np.inf
+
+        k = min(k, len(scores) - (row is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        RAG_QUERY_SECONDS.observe(time.perf_counter() - started)
+        return [
+            {"spelling": self.spellings[i], "summary_meaning": self.meanings[i], "score": float(scores[i])}
+            for i in top if scores[i] >= min_score
+        ]
+
+
+index = RelatedWordIndex()
+_load_lock = threading.Lock()
+_load_attempted = False
+
+
+def load() -> bool:
+    """Map the offline-built index once per process; a missing index just disables retrieval."""
+    global _load_attempted
+    with _load_lock:
+        if not _load_attempted:
+            _load_attempted = True
+            if not index.load():
+                print(f"rag_index: no index at {_INDEX_DIR}; hints use the single word only "
+                      f"(build it with `python rag_index.py`).")
+    return index.ready
+
+
+def related_words(word_context: Dict[str, Any], k: int = _TOP_K) -> List[Dict[str, Any]]:
+    if not load():
+        return []
+    return index.related(word_context, k)
+
+
+def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, "words.json"), mode="r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _array_files(meta: Dict[str, Any]) -> Dict[str, str]:
+    # Indexes built before the arrays were generation-stamped use fixed names
+    return meta.get("files") or {name: f"{name}.npy" for name in _ARRAYS}
+
+
+def _merge_rows(rows: Iterable) -> List[Dict[str, Any]]:
+    """One document per word from (word_id, spelling, group_id, meaning, definition) rows."""
+    docs: Dict[int, Dict[str, Any]] = {}
+    for word_id, spelling, group_id, meaning, definition in rows:
+        doc = docs.get(word_id)
+        if doc is None:
+            doc = docs[word_id] = {"word_id": int(word_id), "spelling": spelling, "group_id": int(group_id),
+                                   "meanings": [], "definition": definition or ""}
+        if meaning and meaning not in doc["meanings"]:
+            doc["meanings"].append(meaning)
+    for doc in docs.values():
+        doc["meanings"] = " ".join(doc["meanings"])
+    return list(docs.values())
+
+
+def rows_from_csv(data_dir: str) -> List[tuple]:
+    def read(name):
+        with open(os.path.join(data_dir, name), mode="r", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    spellings = {r["word_id"]: r["spelling"] for r in read("words.csv")}
+    definitions = {}
+    for r in read("word_details.csv"):
+        definitions.setdefault(r["word_id"], r["full_definition"])
+    return [(int(r["word_id"]), spellings[r["word_id"]], int(r["group_id"]), r["summary_meaning"],
+             definitions.get(r["word_id"], "")) for r in read("group_items.csv")]
+
+
+def rows_from_db() -> List[tuple]:
+    from sqlalchemy import text
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return [tuple(row) for row in db.execute(text(RAG_WORDS_QUERY))]
+    finally:
+        db.close()
+
+
+def build(rows: Iterable, output_dir: str = _INDEX_DIR, dim: int = DEFAULT_DIM) -> int:
+    """
+    Embed every word and write the vectors, groups and idf arrays plus
+    words.json. Safe while servers have the index mapped: arrays go to new
+    generation-stamped files, never over mapped ones, and words.json, which
+    names them, is renamed into place last, so a loading worker sees either
+    the old set or the new one. Arrays older than the previous set are removed.
+    """
+    docs = _merge_rows(rows)
+    counts = [bucket_counts(doc) for doc in docs]
+
+    df = np.zeros(_BUCKETS, dtype=np.int32)
+    for doc_counts in counts:
+        df[np.fromiter(doc_counts.keys(), dtype=np.int64, count=len(doc_counts))] += 1
+    idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+
+    vectors = np.zeros((len(docs), dim), dtype=np.float32)
+    for row, doc_counts in enumerate(counts):
+        vectors[row] = embed(doc_counts, idf, dim)
+
+    os.makedirs(output_dir, exist_ok=True)
+    previous = _read_meta(output_dir)
+    generation = time.time_ns()
+    files = {name: f"{name}.{generation}.npy" for name in _ARRAYS}
+    np.save(os.path.join(output_dir, files["vectors"]), vectors)
+    np.save(os.path.join(output_dir, files["groups"]), np.array([d["group_id"] for d in docs], dtype=np.int32))
+    np.save(os.path.join(output_dir, files["idf"]), idf)
+    # words.json last: its presence marks a complete index
+    tmp_path = os.path.join(output_dir, f"words.json.{os.getpid()}.tmp")
+    with open(tmp_path, mode="w", encoding="utf-8") as f:
+        json.dump({
+            "version": FORMAT_VERSION,
+            "dim": dim,
+            "files": files,
+            "word_ids": [d["word_id"] for d in docs],
+            "spellings": [d["spelling"] for d in docs],
+            "meanings": [d["meanings"] for d in docs],
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(output_dir, "words.json"))
+
+    # A worker that read the previous words.json may still be about to open its
+    # arrays; older ones can go (unlinking keeps existing mappings valid)
+    keep = set(files.values()) | (set(_array_files(previous).values()) if previous else set())
+    for name in os.listdir(output_dir):
+        if _ARRAY_FILE.match(name) and name not in keep:
+            os.remove(os.path.join(output_dir, name))
+    return len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the related-word index used by hint prompts.")
+    parser.add_argument("--data-dir", help="Build from catalog CSVs instead of the database.")
+    parser.add_argument("--output-dir", default=_INDEX_DIR)
+    parser.add_argument("--dim", type=int, default=DEFAULT_DIM, help="Embedding dimensions.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    rows = rows_from_csv(args.data_dir) if args.data_dir else rows_from_db()
+    count = build(rows, args.output_dir, args.dim)
+    size_mb = count * args.dim * 4 / 1e6
+    print(f"Indexed {count} words ({size_mb:.1f} MB of vectors) into {args.output_dir} "
+          f"in {time.perf_counter() - started:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
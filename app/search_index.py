@@ -0,0 +1,269 @@
+"""
+In-process prefix search over spellings, Korean meanings and definitions.
+
+Each searchable field is a sorted array of (key, item_id) pairs, so a prefix
+query is one bisect plus a short forward scan. Korean meanings are indexed by
+their jamo decomposition, which lets a half-typed syllable ("탐ㅇ") match, and
+by their initial consonants for choseong search ("ㅌㅇ" finds "탐욕"). Builds
+are incremental: rows are diffed against the current index and only changed
+items are re-tokenized and merged into the existing arrays.
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import text
+
+import catalog_cache
+import metrics
+
+_TTL = float(os.getenv("SEARCH_INDEX_TTL", os.getenv("CATALOG_CACHE_TTL", "300")))
+_RETRY_SECONDS = 30
+
+SEARCH_INDEX_QUERY = text("""
+Select
+    gi.item_id,
+    gi.group_id,
+    w.spelling,
+    gi.summary_meaning,
+    wd.full_definition
+From group_items gi
+Join words w On gi.word_id = w.word_id
+Left Join word_details wd On wd.word_id = gi.word_id
+""")
+
+SEARCH_QUERY_SECONDS = metrics.Histogram("search_query_seconds", "Time to answer a /search query from the index.",
+                                         buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05))
+SEARCH_BUILD_SECONDS = metrics.Histogram("search_index_build_seconds", "Time to (re)build the search index.",
+                                         buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+SEARCH_INDEX_ITEMS = metrics.Gauge("search_index_items", "Items held in the search index.", fn=lambda: len(index))
+
+# Hangul syllable composition: 0xAC00 + (initial * 21 + medial) * 28 + final
+_INITIALS = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_MEDIALS = ["ㅏ", "ㅐ", "ㅑ", "ㅒ", "ㅓ", "ㅔ", "ㅕ", "ㅖ", "ㅗ", "ㅗㅏ", "ㅗㅐ", "ㅗㅣ", "ㅛ", "ㅜ", "ㅜㅓ", "ㅜㅔ",
+            "ㅜㅣ", "ㅠ", "ㅡ", "ㅡㅣ", "ㅣ"]
+_FINALS = ["", "ㄱ", "ㄲ", "ㄱㅅ", "ㄴ", "ㄴㅈ", "ㄴㅎ", "ㄷ", "ㄹ", "ㄹㄱ", "ㄹㅁ", "ㄹㅂ", "ㄹㅅ", "ㄹㅌ", "ㄹㅍ",
+           "ㄹㅎ", "ㅁ", "ㅂ", "ㅂㅅ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+# Standalone compound jamo a user may type, split the same way as above
+_COMPOUND_JAMO = {"ㄳ": "ㄱㅅ", "ㄵ": "ㄴㅈ", "ㄶ": "ㄴㅎ", "ㄺ": "ㄹㄱ", "ㄻ": "ㄹㅁ", "ㄼ": "ㄹㅂ", "ㄽ": "ㄹㅅ",
+                  "ㄾ": "ㄹㅌ", "ㄿ": "ㄹㅍ", "ㅀ": "ㄹㅎ", "ㅄ": "ㅂㅅ", "ㅘ": "ㅗㅏ", "ㅙ": "ㅗㅐ", "ㅚ": "ㅗㅣ",
+                  "ㅝ": "ㅜㅓ", "ㅞ": "ㅜㅔ", "ㅟ": "ㅜㅣ", "ㅢ": "ㅡㅣ"}
+_TOKEN = re.compile(r"\w+")
+
+
+def _is_syllable(ch: str) -> bool:
+    return "가" <= ch <= "힣"
+
+
+def decompose(value: str) -> str:
+    """Hangul syllables as a flat jamo sequence; other characters are kept."""
+    out = []
+    for ch in value:
+        if _is_syllable(ch):
+            code = ord(ch) - 0xAC00
+            out.append(_INITIALS[code // 588] + _MEDIALS[(code % 588) // 28] + _FINALS[code % 28])
+        else:
+            out.append(_COMPOUND_JAMO.get(ch, ch))
+    return "".join(out)
+
+
+def choseong(value: str) -> str:
+    """Initial consonant of every syllable, e.g. "탐욕" -> "ㅌㅇ"."""
+    return "".join(_INITIALS[(ord(ch) - 0xAC00) // 588] for ch in value if _is_syllable(ch))
+
+
+def is_choseong_query(query: str) -> bool:
+    return bool(query) and all(ch in _INITIALS for ch in query)
+
+
+def normalize(value: str) -> str:
+    return " ".join(value.casefold().split())
+
+
+class Entry(NamedTuple):
+    group_id: int
+    spelling: str
+    summary_meaning: str
+    full_definition: str
+
+
+class Field:
+    """Sorted (key, item_id) arrays for one kind of key."""
+
+    def __init__(self, pairs: Iterable[Tuple[str, int]] = ()):
+        pairs = sorted(pairs)
+        self.keys = [key for key, _ in pairs]
+        self.ids = [item_id for _, item_id in pairs]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def merged(self, drop: set, add: List[Tuple[str, int]]) -> "Field":
+        """A new Field without `drop` item ids and with `add` merged in, in one linear pass."""
+        kept = ((key, item_id) for key, item_id in zip(self.keys, self.ids) if item_id not in drop)
+        field = Field()
+        for key, item_id in heapq.merge(kept, sorted(add)):
+            field.keys.append(key)
+            field.ids.append(item_id)
+        return field
+
+    def prefix(self, prefix: str, limit: int, seen: set) -> Iterable[int]:
+        i = bisect_left(self.keys, prefix)
+        found = 0
+        while i < len(self.keys) and found < limit and self.keys[i].startswith(prefix):
+            item_id = self.ids[i]
+            if item_id not in seen:
+                seen.add(item_id)
+                found += 1
+                yield item_id
+            i += 1
+
+
+def field_keys(entry: Entry) -> Dict[str, List[str]]:
+    """Index keys of one item, per field."""
+    meaning = normalize(entry.summary_meaning)
+    tokens = _TOKEN.findall(meaning)
+    return {
+        "spelling": [normalize(entry.spelling)],
+        "meaning": [decompose(token) for token in tokens] + ([decompose(meaning)] if " " in meaning else []),
+        # Per token like "meaning", so later meanings of "열망하는, 열렬한" match too
+        "choseong": [key for key in dict.fromkeys([choseong(token) for token in tokens] + [choseong(meaning)]) if key],
+        "definition": list({decompose(token) for token in _TOKEN.findall(normalize(entry.full_definition))}),
+    }
+
+
+FIELDS = ("spelling", "meaning", "choseong", "definition")
+
+
+class SearchIndex:
+    def __init__(self, ttl: float = _TTL):
+        self.ttl = ttl
+        # (entries, fields), replaced as one object so readers see a consistent pair
+        self._data: Tuple[Dict[int, Entry], Dict[str, Field]] = ({}, {name: Field() for name in FIELDS})
+        self._built_at: Optional[float] = None
+        self._stale = True
+        self._retry_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def __len__(self) -> int:
+        return len(self._data[0])
+
+    @property
+    def ready(self) -> bool:
+        return self._built_at is not None
+
+    def update(self, rows: Iterable[Tuple[int, int, str, str, str]]) -> Tuple[int, int]:
+        """
+        Bring the index in line with (item_id, group_id, spelling, meaning,
+        definition) rows. Returns (changed, removed) item counts.
+        """
+        started = time.perf_counter()
+        entries: Dict[int, Entry] = {}
+        for item_id, group_id, spelling, meaning, definition in rows:
+            # A word with several detail rows keeps the first one
+            if item_id not in entries:
+                entries[item_id] = Entry(group_id, spelling or "", meaning or "", definition or "")
+
+        old, old_fields = self._data
+        changed = [item_id for item_id, entry in entries.items() if old.get(item_id) != entry]
+        removed = [item_id for item_id in old if item_id not in entries]
+        if changed or removed or not self.ready:
+            drop = set(changed) | set(removed)
+            added: Dict[str, List[Tuple[str, int]]] = {name: [] for name in FIELDS}
+            for item_id in changed:
+                for name, keys in field_keys(entries[item_id]).items():
+                    added[name].extend((key, item_id) for key in keys)
+            self._data = (entries, {name: old_fields[name].merged(drop, added[name]) for name in FIELDS})
+
+        self._built_at = time.monotonic()
+        self._stale = False
+        SEARCH_BUILD_SECONDS.observe(time.perf_counter() - started)
+        return len(changed), len(removed)
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def needs_refresh(self) -> bool:
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        return self._stale or (self._built_at is not None and now - self._built_at > self.ttl)
+
+    def refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh, name="search-index", daemon=True).start()
+
+    def _refresh(self) -> None:
+        import catalog_snapshot
+        from database import SessionLocal
+
+        db = SessionLocal()
+        try:
+            rows = catalog_snapshot.catalog_rows()
+            self.update(db.execute(SEARCH_INDEX_QUERY) if rows is None else rows)
+        except Exception as exc:
+            self._retry_at = time.monotonic() + _RETRY_SECONDS
+            print(f"search_index: rebuild failed: {exc}")
+        finally:
+            db.close()
+            with self._lock:
+                self._refreshing = False
+
+    def search(self, query: str, limit: int = 20) -> Optional[List[Dict]]:
+        """
+        Prefix matches on spelling, then meaning (or choseong), then definition
+        words. None until the first build has finished.
+        """
+        if self.needs_refresh():
+            self.refresh_in_background()
+        if not self.ready:
+            return None
+        started = time.perf_counter()
+        entries, fields = self._data
+        query = normalize(query)
+        if not query:
+            return []
+
+        if is_choseong_query(query):
+            plan = [("choseong", query)]
+        else:
+            jamo = decompose(query)
+            plan = [("spelling", query), ("meaning", jamo), ("definition", jamo)]
+
+        results = []
+        seen: set = set()
+        for name, key in plan:
+            for item_id in fields[name].prefix(key, limit - len(results), seen):
+                entry = entries[item_id]
+                results.append({
+                    "item_id": item_id,
+                    "group_id": entry.group_id,
+                    "spelling": entry.spelling,
+                    "summary_meaning": entry.summary_meaning,
+                    "match": name,
+                })
+            if len(results) >= limit:
+                break
+        SEARCH_QUERY_SECONDS.observe(time.perf_counter() - started)
+        return results
+
+
+index = SearchIndex()
+
+catalog_cache.on_invalidate(lambda namespace: index.mark_stale() if namespace is None else None)
+
+
+def search(query: str, limit: int = 20) -> Optional[List[Dict]]:
+    return index.search(query, limit)
+
+
+def start() -> None:
+    index.refresh_in_background()
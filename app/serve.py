@@ -0,0 +1,61 @@
+"""
+Production entry point: a master process plus one uvicorn worker per CPU.
+
+    python serve.py
+    python serve.py --workers 8 --port 8000
+
+The master creates missing tables once (workers skip it), writes the catalog
+snapshot the workers map (catalog_snapshot.py) and runs the worker bus
+(worker_bus.py), which rebuilds the snapshot and invalidates every worker when
+the catalog changes. Workers are started by uvicorn's supervisor and restarted
+if they die; they share the listening socket.
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_workers() -> int:
+    """WEB_CONCURRENCY, else the CPUs this process may run on."""
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with one worker process per CPU.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=default_workers())
+    args = parser.parse_args()
+
+    # Read by the workers, which uvicorn spawns with this environment
+    os.environ["SKIP_SCHEMA_SETUP"] = "true"
+    os.environ["WORKER_POOL"] = "true"
+
+    import uvicorn
+    import models
+    import catalog_snapshot
+    import worker_bus
+    from database import engine
+
+    # Claim the bus first: it fails if another master is serving it
+    broker = worker_bus.Broker(catalog_snapshot.build)
+    broker.start()
+    try:
+        models.Base.metadata.create_all(bind=engine)
+        broker.generation = catalog_snapshot.build()
+        print(f"serve: wrote catalog snapshot {broker.generation} to {catalog_snapshot.SNAPSHOT_PATH}")
+        uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)))
+    finally:
+        broker.stop()
+
+
+if __name__ == "__main__":
+    main()
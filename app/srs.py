@@ -0,0 +1,245 @@
+"""
+Spaced-repetition review scheduling (SM-2).
+
+Each (user, item) pair carries SM-2 state: repetitions, interval and ease. Due
+dates live in binary heaps per user and per (user, group), so the next due
+items come off the top in O(k log n) without scanning a user's history.
+Entries are never updated in place: a review pushes a new (due_at, item_id)
+entry, and entries that no longer match the item's current due date are
+skipped and dropped lazily, with the heap rebuilt once most of it is stale.
+
+State is derived from quiz_attempts: it is replayed in the background at
+startup, and each graded answer then updates it incrementally. It lives in the
+serving process; under serve.py every worker also applies the answers its
+siblings graded, relayed over worker_bus. Separate servers (other hosts, or
+uvicorn started without serve.py) only see the submissions they handled since
+their own replay.
+"""
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import metrics
+
+_RELEARN_SECONDS = float(os.getenv("SRS_RELEARN_SECONDS", "600"))
+_DAY = 86400.0
+
+# SM-2 quality for a graded answer: correct recalls pass, anything else lapses
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+SRS_REVIEWS = metrics.Counter("srs_reviews_total", "Reviews applied to the spaced-repetition state.")
+SRS_STATES = metrics.Gauge("srs_review_states", "(user, item) pairs with review state.",
+                           fn=lambda: len(scheduler._states))
+SRS_REPLAY_SECONDS = metrics.Histogram("srs_replay_seconds", "Time to replay quiz_attempts at startup.",
+                                       buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+
+HeapKey = Tuple[int, Optional[int]]
+
+
+class ReviewState:
+    __slots__ = ("group_id", "repetitions", "interval", "ease", "due_at", "last_reviewed_at")
+
+    def __init__(self, group_id: int):
+        self.group_id = group_id
+        self.repetitions = 0
+        self.interval = 0.0
+        self.ease = 2.5
+        self.due_at = 0.0
+        self.last_reviewed_at = 0.0
+
+
+class DueItem(NamedTuple):
+    item_id: int
+    group_id: int
+    due_at: float
+
+
+def sm2(state: ReviewState, quality: int, reviewed_at: float) -> None:
+    """Apply one SM-2 review (quality 0-5) to the state in place."""
+    if quality >= 3:
+        if state.repetitions == 0:
+            state.interval = 1.0
+        elif state.repetitions == 1:
+            state.interval = 6.0
+        else:
+            state.interval = round(state.interval * state.ease, 2)
+        state.repetitions += 1
+        state.due_at = reviewed_at + state.interval * _DAY
+    else:
+        state.repetitions = 0
+        state.interval = 0.0
+        # Lapsed items come back within the same session
+        state.due_at = reviewed_at + _RELEARN_SECONDS
+    state.last_reviewed_at = reviewed_at
+    state.ease = max(1.3, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+
+class ReviewScheduler:
+    def __init__(self):
+        self._states: Dict[Tuple[int, int], ReviewState] = {}
+        self._heaps: Dict[HeapKey, List[Tuple[float, int]]] = {}
+        self._live: Dict[HeapKey, int] = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        self._pending: List[Tuple[int, int, int, bool, float]] = []
+        # Replay covers attempts recorded before this process started; anything
+        # later was submitted here and is applied live (or from _pending)
+        self.started_at = time.time()
+
+    def review(self, user_id: int, group_id: int, item_id: int, correct: bool,
+               reviewed_at: Optional[float] = None) -> None:
+        """Record a graded answer. Reviews arriving during the replay are applied after it."""
+        reviewed_at = time.time() if reviewed_at is None else reviewed_at
+        with self._lock:
+            if not self.ready:
+                self._pending.append((user_id, group_id, item_id, correct, reviewed_at))
+                return
+            self._apply(user_id, group_id, item_id, correct, reviewed_at)
+
+    def _apply(self, user_id: int, group_id: int, item_id: int, correct: bool, reviewed_at: float) -> None:
+        state = self._states.get((user_id, item_id))
+        if state is None:
+            state = self._states[(user_id, item_id)] = ReviewState(group_id)
+            for key in ((user_id, None), (user_id, group_id)):
+                self._live[key] = self._live.get(key, 0) + 1
+        elif reviewed_at < state.last_reviewed_at:
+            # SM-2 depends on review order; a synced answer older than the last
+            # review is left to the next replay, which sorts by answered_at
+            return
+        sm2(state, QUALITY_CORRECT if correct else QUALITY_INCORRECT, reviewed_at)
+        for key in ((user_id, None), (user_id, state.group_id)):
+            heap = self._heaps.setdefault(key, [])
+            heapq.heappush(heap, (state.due_at, item_id))
+            if len(heap) > 2 * self._live[key] + 16:
+                self._compact(key)
+        SRS_REVIEWS.inc()
+
+    def _is_current(self, user_id: int, entry: Tuple[float, int]) -> bool:
+        state = self._states.get((user_id, entry[1]))
+        return state is not None and state.due_at == entry[0]
+
+    def _compact(self, key: HeapKey) -> None:
+        user_id = key[0]
+        heap = [entry for entry in self._heaps[key] if self._is_current(user_id, entry)]
+        heapq.heapify(heap)
+        self._heaps[key] = heap
+
+    def due(self, user_id: int, group_id: Optional[int] = None, limit: int = 10,
+            now: Optional[float] = None) -> List[DueItem]:
+        """Up to `limit` items due by `now`, most overdue first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            heap = self._heaps.get((user_id, group_id))
+            if not heap:
+                return []
+            taken = []
+            while heap and len(taken) < limit and heap[0][0] <= now:
+                entry = heapq.heappop(heap)
+                if self._is_current(user_id, entry):
+                    taken.append(entry)
+            # Only stale entries were dropped; the due ones go back
+            for entry in taken:
+                heapq.heappush(heap, entry)
+            return [DueItem(item_id, self._states[(user_id, item_id)].group_id, due_at)
+                    for due_at, item_id in taken]
+
+    def is_new(self, user_id: int, item_id: int) -> bool:
+        return (user_id, item_id) not in self._states
+
+    def replay(self, rows, chunk_size: int = 10000) -> int:
+        """
+        Rebuild state from (user_id, group_id, item_id, is_correct, answered_at)
+        rows, oldest first. The lock is taken per chunk so live submissions are
+        only queued, never blocked, while the rows stream in.
+        """
+        count = 0
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                count += self._apply_chunk(chunk)
+                chunk = []
+        count += self._apply_chunk(chunk)
+        with self._lock:
+            for review in self._pending:
+                self._apply(*review)
+            self._pending = []
+            self.ready = True
+        return count
+
+    def _apply_chunk(self, chunk) -> int:
+        with self._lock:
+            for user_id, group_id, item_id, is_correct, answered_at in chunk:
+                self._apply(user_id, group_id, item_id, bool(is_correct), answered_at)
+        return len(chunk)
+
+
+scheduler = ReviewScheduler()
+
+
+def _load() -> None:
+    from sqlalchemy import select
+    from database import SessionLocal
+    from models import QuizAttempts
+
+    started = time.perf_counter()
+    # Times are stored as naive UTC. The boundary is when a row was recorded,
+    # not answered: a synced attempt recorded later is applied live
+    cutoff_at = datetime.fromtimestamp(scheduler.started_at, timezone.utc).replace(tzinfo=None)
+    query = (
+        select(QuizAttempts.user_id, QuizAttempts.group_id, QuizAttempts.item_id,
+               QuizAttempts.is_correct, QuizAttempts.answered_at)
+        .where(QuizAttempts.recorded_at < cutoff_at)
+        .order_by(QuizAttempts.answered_at, QuizAttempts.attempt_id)
+    )
+    db = SessionLocal()
+    try:
+        rows = db.execute(query, execution_options={"yield_per": 10000})
+        count = scheduler.replay(
+            ((u, g, i, c, a.replace(tzinfo=timezone.utc).timestamp()) for u, g, i, c, a in rows)
+        )
+    except Exception as exc:
+        print(f"srs: replay of quiz_attempts failed, starting from empty state: {exc}")
+        scheduler.replay([])
+        return
+    finally:
+        db.close()
+    SRS_REPLAY_SECONDS.observe(time.perf_counter() - started)
+    print(f"srs: replayed {count} quiz attempts in {time.perf_counter() - started:.1f}s")
+
+
+def start() -> None:
+    threading.Thread(target=_load, name="srs-replay", daemon=True).start()
+
+
+def record_review(user_id: int, group_id: int, item_id: int, correct: bool,
+                  reviewed_at: Optional[float] = None) -> None:
+    scheduler.review(user_id, group_id, item_id, correct, reviewed_at)
+
+
+def next_items(user_id: int, group_id: Optional[int] = None, limit: int = 10,
+               group_item_ids: Optional[List[int]] = None) -> List[Dict]:
+    """
+    Due reviews first; with a group, fill the rest with items the user has not
+    seen yet (in `group_item_ids` order).
+    """
+    items = [{"item_id": d.item_id, "group_id": d.group_id, "due_at": d.due_at, "is_new": False}
+             for d in scheduler.due(user_id, group_id, limit)]
+    if group_id is not None and group_item_ids:
+        for item_id in group_item_ids:
+            if len(items) >= limit:
+                break
+            if scheduler.is_new(user_id, item_id):
+                items.append({"item_id": item_id, "group_id": group_id, "due_at": None, "is_new": True})
+    return items
+
+
+def group_quiz(user_id: int, group_id: int, group_items: List[Dict], limit: int = 10) -> List[Dict]:
+    """The user's quiz for a group: its due items, then unseen ones, as group item rows."""
+    by_id = {item["item_id"]: item for item in group_items}
+    picked = next_items(user_id, group_id, limit, list(by_id))
+    return [by_id[p["item_id"]] for p in picked if p["item_id"] in by_id]
@@ -0,0 +1,237 @@
+"""
+Local pub/sub between serve.py's master and its workers, over a Unix socket.
+
+Messages are newline-delimited JSON. The master's Broker accepts two kinds of
+connection: workers subscribe and stay connected, while publishers (the import
+scripts, through catalog_cache.invalidate) send one message and hang up.
+
+    {"invalidate": ns}                  publisher -> master
+    {"invalidate": ns, "generation": g} master -> every worker, after the
+                                        snapshot is rebuilt
+    {"generation": g}                   master -> a worker that just subscribed
+    {"graded": [user, group, [[item, ok, answered_at], ...], recorded_at]}
+                                        worker -> master -> the other workers
+
+Graded answers are relayed so srs and progress, which each worker keeps in
+memory, see submissions handled by its siblings. Only processes on this host
+are reached; deployments spanning several hosts still rely on the TTLs.
+"""
+import json
+import os
+import selectors
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import metrics
+
+SOCKET_PATH = os.getenv("WORKER_BUS_SOCKET", os.path.join(tempfile.gettempdir(), "vocabulary-worker-bus.sock"))
+_RECONNECT_SECONDS = 1.0
+
+BUS_MESSAGES = metrics.Counter("worker_bus_messages_total", "Messages handled on the worker bus.", ("kind",))
+
+
+def _encode(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def publish_invalidation(namespace: Optional[str]) -> bool:
+    """Ask the master to rebuild the snapshot and invalidate every worker. False if no master runs."""
+    if not os.path.exists(SOCKET_PATH):
+        return False
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.settimeout(2.0)
+            conn.connect(SOCKET_PATH)
+            conn.sendall(_encode({"invalidate": namespace}))
+    except OSError as exc:
+        print(f"worker_bus: could not publish the invalidation of {namespace or 'all namespaces'}: {exc}")
+        return False
+    return True
+
+
+class Broker:
+    """Runs in the master: relays worker messages and rebuilds the snapshot on invalidation."""
+
+    def __init__(self, rebuild: Callable[[], int], generation: int = 0, path: str = SOCKET_PATH):
+        self.path = path
+        self.generation = generation
+        self._rebuild = rebuild
+        self._selector = selectors.DefaultSelector()
+        self._buffers: Dict[socket.socket, bytes] = {}
+        self._subscribers: set = set()
+        self._pending: set = set()
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self._server: Optional[socket.socket] = None
+
+    def start(self) -> None:
+        if os.path.exists(self.path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                    conn.connect(self.path)
+            except OSError:
+                os.unlink(self.path)  # left behind by a master that died
+            else:
+                raise RuntimeError(f"Another master is serving {self.path}; set WORKER_BUS_SOCKET to run a second one.")
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self._server.listen(64)
+        self._selector.register(self._server, selectors.EVENT_READ)
+        threading.Thread(target=self._run, name="worker-bus", daemon=True).start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _run(self) -> None:
+        while True:
+            for key, _ in self._selector.select():
+                if key.fileobj is self._server:
+                    try:
+                        conn, _ = self._server.accept()
+                    except OSError:
+                        return
+                    self._buffers[conn] = b""
+                    self._selector.register(conn, selectors.EVENT_READ)
+                else:
+                    self._read(key.fileobj)
+
+    def _read(self, conn: socket.socket) -> None:
+        try:
+            data = conn.recv(65536)
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(conn)
+            return
+        buffer = self._buffers[conn] + data
+        *lines, self._buffers[conn] = buffer.split(b"\n")
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            self._handle(conn, message)
+
+    def _drop(self, conn: socket.socket) -> None:
+        self._selector.unregister(conn)
+        self._buffers.pop(conn, None)
+        with self._lock:
+            self._subscribers.discard(conn)
+        conn.close()
+
+    def _handle(self, conn: socket.socket, message: Dict[str, Any]) -> None:
+        if "subscribe" in message:
+            BUS_MESSAGES.inc(kind="subscribe")
+            conn.settimeout(1.0)
+            with self._lock:
+                self._subscribers.add(conn)
+                self._send(conn, {"generation": self.generation})
+        elif "graded" in message:
+            BUS_MESSAGES.inc(kind="graded")
+            self._broadcast(message, skip=conn)
+        elif "invalidate" in message:
+            BUS_MESSAGES.inc(kind="invalidate")
+            with self._lock:
+                self._pending.add(message["invalidate"])
+                if self._rebuilding:
+                    return
+                self._rebuilding = True
+            threading.Thread(target=self._rebuild_loop, name="worker-bus-rebuild", daemon=True).start()
+
+    def _rebuild_loop(self) -> None:
+        """One rebuild per burst of invalidations; requests arriving meanwhile trigger one more."""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._rebuilding = False
+                    return
+                namespaces, self._pending = self._pending, set()
+            try:
+                self.generation = self._rebuild()
+            except Exception as exc:
+                print(f"worker_bus: snapshot rebuild failed, workers keep the previous one: {exc}")
+            # Several namespaces at once invalidate everything
+            namespace = next(iter(namespaces)) if len(namespaces) == 1 else None
+            self._broadcast({"invalidate": namespace, "generation": self.generation})
+
+    def _send(self, conn: socket.socket, message: Dict[str, Any]) -> bool:
+        try:
+            conn.sendall(_encode(message))
+        except OSError as exc:
+            print(f"worker_bus: dropping a subscriber: {exc}")
+            return False
+        return True
+
+    def _broadcast(self, message: Dict[str, Any], skip: Optional[socket.socket] = None) -> None:
+        with self._lock:
+            for conn in list(self._subscribers):
+                if conn is not skip and not self._send(conn, message):
+                    # The selector thread closes it when the read fails
+                    self._subscribers.discard(conn)
+
+
+class Subscriber:
+    """Runs in each worker: applies master messages and sends graded answers."""
+
+    def __init__(self, on_message: Callable[[Dict[str, Any]], None], path: str = SOCKET_PATH):
+        self.path = path
+        self._on_message = on_message
+        self._conn: Optional[socket.socket] = None
+        self._send_lock = threading.Lock()
+
+    def start(self) -> None:
+        threading.Thread(target=self._run, name="worker-bus", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            try:
+                conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conn.connect(self.path)
+                conn.sendall(_encode({"subscribe": os.getpid()}))
+                self._conn = conn
+                for line in conn.makefile("rb"):
+                    try:
+                        self._on_message(json.loads(line))
+                    except Exception as exc:
+                        print(f"worker_bus: failed to apply {line!r}: {exc}")
+            except OSError as exc:
+                print(f"worker_bus: disconnected from {self.path}: {exc}")
+            self._conn = None
+            conn.close()
+            time.sleep(_RECONNECT_SECONDS)
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Best effort: dropped while disconnected."""
+        conn = self._conn
+        if conn is None:
+            return
+        with self._send_lock:
+            try:
+                conn.sendall(_encode(message))
+            except OSError:
+                pass
+
+
+_subscriber: Optional[Subscriber] = None
+
+
+def subscribe(on_message: Callable[[Dict[str, Any]], None]) -> None:
+    global _subscriber
+    _subscriber = Subscriber(on_message)
+    _subscriber.start()
+
+
+def share_graded(user_id: int, group_id: int, graded: List[Tuple[int, bool, float]], recorded_at: float) -> None:
+    """
+    Forward (item_id, correct, answered_at) answers, logged at `recorded_at`,
+    to the sibling workers; a no-op outside serve.py.
+    """
+    if _subscriber is not None and graded:
+        _subscriber.send({"graded": [user_id, group_id, graded, recorded_at]})
@@ -23,6 +23,9 @@ export interface VocabularyItem {
     spelling: string;
 }
 
+// Quiz listing rows: the spelling is withheld until an answer is submitted.
+export type QuizItem = Omit<VocabularyItem, 'spelling'>;
+
 export interface WordDetail {
     item_id: number;
     summary_meaning: string;
@@ -46,6 +49,9 @@ export interface QuizSubmitResponse {
     correct_answer: string;
     user_answer: string;
     feedback: string;
+    is_close: boolean;
+    edit_distance: number | null;
+    score: number;
 }
 
 export interface HintResponse {
@@ -53,14 +59,28 @@ export interface HintResponse {
     hint: string;
 }
 
+// Listings are paged by keyset; X-Next-Cursor is the `after` of the next page.
+const getAllPages = async <T>(url: string, params: Record<string, string | number> = {}): Promise<T[]> => {
+    const rows: T[] = [];
+    let after: string | undefined;
+    do {
+        const response = await client.get(url, { params: after === undefined ? params : { ...params, after } });
+        rows.push(...response.data);
+        after = response.headers['x-next-cursor'];
+    } while (after !== undefined);
+    return rows;
+};
+
 export const getGroups = async (): Promise<Group[]> => {
-    const response = await client.get('/groups');
-    return response.data;
+    return getAllPages<Group>('/groups');
 };
 
 export const getGroupItems = async (groupId: number): Promise<VocabularyItem[]> => {
-    const response = await client.get(`/groups/${groupId}/items`);
-    return response.data;
+    return getAllPages<VocabularyItem>(`/groups/${groupId}/items`);
+};
+
+export const getQuizItems = async (groupId: number): Promise<QuizItem[]> => {
+    return getAllPages<QuizItem>(`/groups/${groupId}/quiz`);
 };
 
 export const getWordDetails = async (itemId: number): Promise<WordDetail> => {
@@ -68,6 +88,26 @@ export const getWordDetails = async (itemId: number): Promise<WordDetail> => {
     return response.data;
 };
 
+// All word details of a group in one request, used to prefetch the popups.
+export const getGroupWordDetails = async (groupId: number): Promise<WordDetail[]> => {
+    const response = await client.get(`/groups/${groupId}/details`);
+    return response.data;
+};
+
+export interface SearchResult {
+    item_id: number;
+    group_id: number;
+    spelling: string;
+    summary_meaning: string;
+    match: 'spelling' | 'meaning' | 'choseong' | 'definition';
+}
+
+// Prefix search over spellings, Korean meanings (incl. choseong like "ㅌㅇ") and definitions.
+export const searchWords = async (query: string, limit: number = 20): Promise<SearchResult[]> => {
+    const response = await client.get('/search', { params: { q: query, limit } });
+    return response.data;
+};
+
 export const getGroupFooter = async (groupId: number): Promise<GroupFooter> => {
     const response = await client.get(`/groups/${groupId}`);
     return response.data;
@@ -90,3 +130,25 @@ export const getQuizHint = async (itemId: number, userId: number = 1): Promise<H
     });
     return response.data;
 };
+
+// Streams a hint over Server-Sent Events, calling onToken with the text so far.
+export const streamQuizHint = (itemId: number, onToken: (textSoFar: string) => void): Promise<HintResponse> => {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(`${API_URL}/quiz/hint/stream?item_id=${itemId}`);
+        let text = '';
+
+        source.addEventListener('token', (event) => {
+            text += JSON.parse((event as MessageEvent).data).text;
+            onToken(text);
+        });
+        source.addEventListener('done', (event) => {
+            source.close();
+            resolve(JSON.parse((event as MessageEvent).data));
+        });
+        source.addEventListener('error', (event) => {
+            source.close();
+            const data = (event as MessageEvent).data;
+            reject(new Error(data ? JSON.parse(data).detail : 'Hint stream failed'));
+        });
+    });
+};
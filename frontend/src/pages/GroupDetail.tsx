@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getGroupItems, getWordDetails, getGroupFooter, type VocabularyItem, type WordDetail, type GroupFooter } from '../api/client';
+import { getGroupItems, getWordDetails, getGroupWordDetails, getGroupFooter, type VocabularyItem, type WordDetail, type GroupFooter } from '../api/client';
 import Modal from '../components/Modal';
 import './GroupDetail.css';
 
@@ -12,6 +12,7 @@ const GroupDetail = () => {
     const [selectedWord, setSelectedWord] = useState<WordDetail | null>(null);
     const [isModalOpen, setIsModalOpen] = useState(false);
     const [loadingDetails, setLoadingDetails] = useState(false);
+    const [detailsById, setDetailsById] = useState<Map<number, WordDetail>>(new Map());
     const navigate = useNavigate();
 
     useEffect(() => {
@@ -31,10 +32,29 @@ const GroupDetail = () => {
             }
         };
 
+        // Prefetch every popup in one round trip; clicks fall back to the single-item call.
+        const prefetchDetails = async () => {
+            if (!groupId) return;
+            try {
+                const details = await getGroupWordDetails(parseInt(groupId));
+                setDetailsById(new Map(details.map((detail) => [detail.item_id, detail])));
+            } catch (error) {
+                console.error('Failed to prefetch word details:', error);
+            }
+        };
+
         fetchData();
+        prefetchDetails();
     }, [groupId]);
 
     const handleWordClick = async (itemId: number) => {
+        const prefetched = detailsById.get(itemId);
+        if (prefetched) {
+            setSelectedWord(prefetched);
+            setIsModalOpen(true);
+            return;
+        }
+
         setLoadingDetails(true);
         try {
             const details = await getWordDetails(itemId);
@@ -1,6 +1,6 @@
 import { useEffect, useState, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getGroupItems, submitQuizAnswer, getQuizHint, type VocabularyItem } from '../api/client';
+import { getQuizItems, submitQuizAnswer, streamQuizHint, type QuizItem } from '../api/client';
 import Modal from '../components/Modal';
 import './GroupDetail.css'; // Reuse basic layout styles
 import './Quiz.css'; // Specific quiz styles
@@ -15,7 +15,7 @@ interface QuizItemState {
 
 const Quiz = () => {
     const { groupId } = useParams<{ groupId: string }>();
-    const [items, setItems] = useState<VocabularyItem[]>([]);
+    const [items, setItems] = useState<QuizItem[]>([]);
     const [quizState, setQuizState] = useState<Record<number, QuizItemState>>({});
     const [loading, setLoading] = useState(true);
     const [startTime] = useState(Date.now());
@@ -32,7 +32,7 @@ const Quiz = () => {
         const fetchItems = async () => {
             if (!groupId) return;
             try {
-                const data = await getGroupItems(parseInt(groupId));
+                const data = await getQuizItems(parseInt(groupId));
                 setItems(data);
                 // Initialize quiz state
                 const initial: Record<number, QuizItemState> = {};
@@ -108,12 +108,16 @@ const Quiz = () => {
     const handleAskAITutor = async () => {
         if (!selectedHintItem) return;
         setLoadingHint(true);
+        const setHint = (hint: string) => setQuizState(prev => ({
+            ...prev,
+            [selectedHintItem]: { ...prev[selectedHintItem], hint }
+        }));
         try {
-            const result = await getQuizHint(selectedHintItem);
-            setQuizState(prev => ({
-                ...prev,
-                [selectedHintItem]: { ...prev[selectedHintItem], hint: result.hint }
-            }));
+            const result = await streamQuizHint(selectedHintItem, (textSoFar) => {
+                setLoadingHint(false);
+                setHint(textSoFar);
+            });
+            setHint(result.hint);
         } catch (error) {
             console.error('Failed to get hint:', error);
         } finally {